@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+import glob
+import hashlib
+import os
 import pdb
+import pickle
+import re
+import shutil
 
+import numpy as np
 import packaging
 from packaging import version
 import warnings
@@ -10,10 +17,17 @@ from mlxtend.frequent_patterns import fpgrowth, apriori
 import pm4py
 from pm4py.objects.log.obj import EventLog, Trace
 
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Iterator
 
 from pandas import DataFrame
 from Declare4Py.Encodings.Aggregate import Aggregate
+from Declare4Py.Utils.CaseBitsets import CaseBitsets
+from Declare4Py.Utils.ColumnarLog import ColumnarLog
+from Declare4Py.Utils.PostingIndex import ActivityPostingIndex
+from Declare4Py.Utils.PrefixTrie import PrefixTrie
+from Declare4Py.Utils.SymbolTable import SymbolTable
+from Declare4Py.Utils.VariantLog import VariantLog
+from Declare4Py.Utils.XESStreamReader import XESStreamReader
 
 
 class D4PyEventLog:
@@ -23,6 +37,8 @@ class D4PyEventLog:
     Args:
         log: the input event log parsed from a XES file
         log_length: the trace number of the input log
+        columnar_log: optional integer-encoded columnar representation of the input log
+        log_stream: the incremental XES reader used when the log is parsed in streaming mode
         frequent_item_sets: list of the most frequent item sets found along the log traces, together with their support and length
     """
 
@@ -34,6 +50,8 @@ class D4PyEventLog:
             d4py_log = D4PyEventLog()
         """
 
+        self._log: Optional[EventLog] = None
+        self._log_in_cache: bool = False
         if log is not None:
             self.log: Optional[EventLog] = log
             self.log_length = len(log)
@@ -45,8 +63,36 @@ class D4PyEventLog:
             self.activity_key: Optional[str] = None
             self.timestamp_key: Optional[str] = None
         self.case_id_key: str = case_name
-
-    def parse_xes_log(self, log_path: str) -> None:
+        self.columnar_log: Optional[ColumnarLog] = None
+        self.log_stream: Optional[XESStreamReader] = None
+        self._variant_logs: Dict[Tuple[str, ...], VariantLog] = {}
+        self._prefix_tries: Dict[Tuple[str, ...], PrefixTrie] = {}
+        self._symbol_tables: Dict[Tuple[str, ...], SymbolTable] = {}
+        self._posting_index: Optional[ActivityPostingIndex] = None
+
+    @property
+    def log(self) -> Optional[EventLog]:
+        if self._log is None and self._log_in_cache:
+            # The log was loaded from the on-disk cache, the EventLog is decoded only when it is actually needed
+            self._log = self.columnar_log.to_event_log()
+            self._log_in_cache = False
+        return self._log
+
+    @log.setter
+    def log(self, log: Optional[EventLog]) -> None:
+        # All the representations derived from the previous log are stale
+        self._log = log
+        self._log_in_cache = False
+        if isinstance(log, EventLog):
+            self.log_length = len(log)
+        self.columnar_log = None
+        self._variant_logs = {}
+        self._prefix_tries = {}
+        self._symbol_tables = {}
+        self._posting_index = None
+
+    def parse_xes_log(self, log_path: str, columnar: bool = False, streaming: bool = False, cache: bool = False,
+                      cache_dir: Optional[str] = None) -> None:
         """
         Set the 'log' EventLog object and the 'log_length' integer by reading and parsing the log corresponding to
         given log file path.
@@ -56,6 +102,15 @@ class D4PyEventLog:
 
         Args:
             log_path: File path where the log is stored.
+            columnar: if True, the columnar representation of the log is also built at parsing time.
+            streaming: if True, the log is not loaded in memory. Its traces are read one at a time from the file by
+                iterating over 'iter_traces', the standard XES keys are used for activities and timestamps.
+            cache: if True, the parsed log is stored in a binary cache keyed by the content hash of the file and
+                by the case/activity/timestamp keys. Later calls on the same file memory-map the cached columnar log
+                instead of parsing the XES, and the pm4py EventLog is decoded only when it is needed. A cache whose
+                source file has changed is automatically discarded.
+            cache_dir: the directory where the cache is kept, by default the directory of the log file. Setting
+                it implies 'cache'.
 
         Example::
 
@@ -63,6 +118,39 @@ class D4PyEventLog:
             d4py_log = D4PyEventLog()
             d4py_log.parse_xes_log(log_path)
         """
+        self.columnar_log = None
+        self._variant_logs = {}
+        self._prefix_tries = {}
+        self._symbol_tables = {}
+        self._posting_index = None
+        if streaming:
+            if columnar:
+                raise RuntimeError("The columnar representation cannot be built for a streamed log.")
+            self.log = None
+            self.log_length = None
+            self.log_stream = XESStreamReader(log_path)
+            self.activity_key = "concept:name"
+            self.timestamp_key = "time:timestamp"
+            return
+
+        self.log_stream = None
+        cache_path = None
+        if cache or cache_dir is not None:
+            cache_path = self._get_cache_path(log_path, cache_dir)
+            if os.path.isdir(cache_path):
+                try:
+                    columnar_log = ColumnarLog.load(cache_path)
+                except (OSError, ValueError, KeyError, RuntimeError, EOFError, pickle.UnpicklingError):
+                    shutil.rmtree(cache_path, ignore_errors=True)  # corrupted cache, parse the log again
+                else:
+                    self.log = None
+                    self.columnar_log = columnar_log
+                    self._log_in_cache = True
+                    self.log_length = self.columnar_log.n_traces
+                    self.timestamp_key = self.columnar_log.timestamp_key
+                    self.activity_key = self.columnar_log.activity_key
+                    return
+
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore", category=DeprecationWarning)
             log = pm4py.read_xes(log_path)
@@ -75,6 +163,41 @@ class D4PyEventLog:
         self.log_length = len(self.log)
         self.timestamp_key = self.log._properties['pm4py:param:timestamp_key']
         self.activity_key = self.log._properties['pm4py:param:activity_key']
+        if cache_path is not None:
+            self._write_cache(cache_path)
+        elif columnar:
+            self.get_columnar_log()
+
+    def _get_cache_path(self, log_path: str, cache_dir: Optional[str] = None) -> str:
+        """
+        Returns the directory of the cache of the given log file. Its name contains a digest of the file content and
+        of the case/activity/timestamp keys, so that a change in any of them leads to a different cache.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(log_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        # pm4py always parses XES logs with the standard activity and timestamp keys
+        keys = "\0".join((str(self.case_id_key), "concept:name", "time:timestamp"))
+        digest.update(keys.encode("utf-8"))
+        if cache_dir is None:
+            cache_dir = os.path.dirname(os.path.abspath(log_path))
+        return os.path.join(cache_dir, f"{os.path.basename(log_path)}.{digest.hexdigest()}.d4pycache")
+
+    def _write_cache(self, cache_path: str) -> None:
+        cache_dir, cache_name = os.path.split(cache_path)
+        log_name = cache_name.rsplit(".", 2)[0]
+        stale_pattern = re.compile(re.escape(log_name) + r"\.[0-9a-f]{32}\.d4pycache")
+        for stale_cache in glob.glob(os.path.join(glob.escape(cache_dir), f"{glob.escape(log_name)}.*.d4pycache")):
+            if stale_pattern.fullmatch(os.path.basename(stale_cache)):
+                shutil.rmtree(stale_cache, ignore_errors=True)  # caches of previous versions of the same file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            self.get_columnar_log().save(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            warnings.warn(f"Unable to write the log cache in {cache_path}: {e}")
 
     def get_log(self) -> EventLog:
         """
@@ -87,6 +210,57 @@ class D4PyEventLog:
             raise RuntimeError("You must load a log before.")
         return self.log
 
+    def is_streaming(self) -> bool:
+        """
+        Returns True if the log was parsed in streaming mode and its traces are read on demand from the file.
+        """
+        return self._log is None and not self._log_in_cache and self.log_stream is not None
+
+    def iter_traces(self) -> Iterator[Trace]:
+        """
+        Yields the traces of the log one at a time. In streaming mode the traces are parsed incrementally from the XES
+        file, so that logs larger than the available memory can be processed.
+
+        Returns:
+            a generator over the traces of the log.
+
+        Example::
+
+            d4py_log.parse_xes_log(log_path, streaming=True)
+            for trace in d4py_log.iter_traces():
+                print(len(trace))
+        """
+        if self.log is not None:
+            if isinstance(self.log, DataFrame):
+                raise RuntimeError("The traces can be iterated only for logs in EventLog format.")
+            yield from self.log
+        elif self.log_stream is not None:
+            yield from self.log_stream
+        else:
+            raise RuntimeError("You must load a log before.")
+
+    def get_columnar_log(self) -> ColumnarLog:
+        """
+        Returns the integer-encoded columnar representation of the log: activity IDs, trace offsets, int64 timestamps
+        and typed attribute columns. The representation is built at the first call and then reused.
+
+        Returns:
+            the columnar representation of the log.
+
+        Example::
+
+            col_log = d4py_log.get_columnar_log()
+            first_trace_activities = col_log.get_trace_activity_ids(0)
+        """
+        if self.columnar_log is None:
+            if self.log is None:
+                raise RuntimeError("You must load a log before.")
+            if isinstance(self.log, DataFrame):
+                raise RuntimeError("The columnar log can be built only from logs in EventLog format.")
+            self.columnar_log = ColumnarLog.from_event_log(self.log, self.activity_key, self.timestamp_key,
+                                                           self.case_id_key)
+        return self.columnar_log
+
     def get_length(self) -> int:
         """
         Return the length of the log, which was previously fed in input.
@@ -181,6 +355,182 @@ class D4PyEventLog:
             return pm4py.get_variants(self.log, self.activity_key, self.timestamp_key, self.case_id_key)
         else:
             return pm4py.get_variants(self.log)
+
+    def get_variant_log(self, attributes: Optional[List[str]] = None) -> VariantLog:
+        """
+        Returns a variant-deduplicated view of the log: the distinct sequences of values of the given event attributes
+        together with their multiplicities and the positions of the traces of each variant. Tasks can evaluate
+        control-flow properties once per variant and expand the results to all the traces. The view is computed at the
+        first call for each list of attributes and then reused.
+
+        Args:
+            attributes: the event attributes the traces are projected on, by default the activity name.
+
+        Returns:
+            the variant view of the log.
+
+        Example::
+
+            variant_log = d4py_log.get_variant_log()
+            print(f"{len(variant_log)} variants for {d4py_log.get_length()} traces")
+        """
+        if self._log is None and self.columnar_log is None:
+            raise RuntimeError("You must load a log before.")
+        attributes = tuple(attributes) if attributes is not None else (self.activity_key,)
+        variant_log = self._variant_logs.get(attributes)
+        if variant_log is None:
+            if attributes == (self.activity_key,) and self.columnar_log is not None:
+                col_log = self.columnar_log
+                offsets = col_log.trace_offsets.tolist()
+                activity_ids = col_log.activity_ids
+                sequences = (activity_ids[offsets[i]:offsets[i + 1]].tobytes() for i in range(col_log.n_traces))
+                variant_log = VariantLog.from_sequences(sequences, attributes)
+                variant_log.variants = [tuple(col_log.activities[act_id] for act_id in
+                                              activity_ids[offsets[trace_idx]:offsets[trace_idx + 1]].tolist())
+                                        for trace_idx in variant_log.representatives]
+            else:
+                if isinstance(self.log, DataFrame):
+                    raise RuntimeError("The variants can be computed only for logs in EventLog format.")
+                if len(attributes) == 1:
+                    attr = attributes[0]
+                    sequences = (tuple(event.get(attr) for event in trace) for trace in self.log)
+                else:
+                    sequences = (tuple(tuple(event.get(attr) for attr in attributes) for event in trace)
+                                 for trace in self.log)
+                variant_log = VariantLog.from_sequences(sequences, attributes)
+            self._variant_logs[attributes] = variant_log
+        return variant_log
+
+    def get_prefix_trie(self, attributes: Optional[List[str]] = None) -> PrefixTrie:
+        """
+        Returns the prefix tree of the variants of the log projected on the given event attributes. Each letter of
+        the tree is the tuple of the values of the attributes in an event, and the i-th sequence of the tree is the i-th
+        variant of get_variant_log(attributes). The tree is computed at the first call for each list of attributes and
+        then reused.
+
+        Args:
+            attributes: the event attributes the traces are projected on, by default the activity name.
+
+        Returns:
+            the prefix tree of the variants of the log.
+
+        Example::
+
+            prefix_trie = d4py_log.get_prefix_trie()
+            print(f"{len(prefix_trie)} nodes for {d4py_log.get_length()} traces")
+        """
+        attributes = tuple(attributes) if attributes is not None else (self.activity_key,)
+        prefix_trie = self._prefix_tries.get(attributes)
+        if prefix_trie is None:
+            variant_log = self.get_variant_log(list(attributes))
+            if len(attributes) == 1:
+                sequences = (tuple((value,) for value in variant) for variant in variant_log.variants)
+            else:
+                sequences = variant_log.variants
+            prefix_trie = PrefixTrie.from_sequences(sequences)
+            self._prefix_tries[attributes] = prefix_trie
+        return prefix_trie
+
+    def get_symbol_table(self, attributes: Optional[List[str]] = None) -> SymbolTable:
+        """
+        Returns the encoding of the events of the log as letter ids, a letter being the tuple of the values of the
+        given event attributes, together with the propositions of the LTLf formulas matched by each letter. The
+        encoding is computed at the first call for each list of attributes and then reused.
+
+        Args:
+            attributes: the event attributes the letters are made of, by default the activity name.
+
+        Returns:
+            the symbol table of the log.
+
+        Example::
+
+            symbol_table = d4py_log.get_symbol_table()
+            print(f"{len(symbol_table)} letters for {len(symbol_table.codes)} events")
+        """
+        if self._log is None and self.columnar_log is None:
+            raise RuntimeError("You must load a log before.")
+        attributes = tuple(attributes) if attributes is not None else (self.activity_key,)
+        symbol_table = self._symbol_tables.get(attributes)
+        if symbol_table is None:
+            if attributes == (self.activity_key,) and self.columnar_log is not None:
+                # The activities are already integer-encoded
+                col_log = self.columnar_log
+                symbol_table = SymbolTable.from_letter_ids(attributes, [(act,) for act in col_log.activities],
+                                                           col_log.activity_ids, col_log.trace_offsets)
+            else:
+                if isinstance(self.log, DataFrame):
+                    raise RuntimeError("The symbol table can be computed only for logs in EventLog format.")
+                symbol_table = SymbolTable.from_traces(self.log, attributes)
+            self._symbol_tables[attributes] = symbol_table
+        return symbol_table
+
+    def get_posting_index(self) -> ActivityPostingIndex:
+        """
+        Returns the inverted index from the activities to the positions of the traces containing them, together with
+        the positions of their occurrences in each trace. The index is computed at the first call and then reused.
+
+        Returns:
+            the posting index of the activities of the log.
+
+        Example::
+
+            posting_index = d4py_log.get_posting_index()
+            print(f"'A' occurs in {posting_index.get_num_cases('A')} traces")
+        """
+        if self._log is None and self.columnar_log is None:
+            raise RuntimeError("You must load a log before.")
+        if self._posting_index is None:
+            if self.columnar_log is not None:
+                col_log = self.columnar_log
+                self._posting_index = ActivityPostingIndex.from_activity_ids(col_log.activities, col_log.activity_ids,
+                                                                             col_log.trace_offsets)
+            else:
+                if isinstance(self.log, DataFrame):
+                    raise RuntimeError("The posting index can be computed only for logs in EventLog format.")
+                self._posting_index = ActivityPostingIndex.from_traces(self.log, self.activity_key)
+        return self._posting_index
+
+    def get_case_bitsets(self, categorical_attributes: List[str]) -> CaseBitsets:
+        """
+        Returns, for each value of the given event attributes, the bitset of the cases having an event with that value.
+        The items are named '<attribute>_<value>' as the columns of the one-hot encoding of the log.
+
+        Args:
+            categorical_attributes: the names of the event attributes, e.g. 'concept:name' for the activity names.
+
+        Returns:
+            the bitsets of the cases of the items.
+        """
+        if self._log is None and self.columnar_log is None:
+            raise RuntimeError("You must load a log before.")
+        if self.columnar_log is not None and list(categorical_attributes) == [self.activity_key]:
+            # The activities are already integer-encoded
+            col_log = self.columnar_log
+            case_ids = np.repeat(np.arange(col_log.n_traces), np.diff(col_log.trace_offsets))
+            items = [f"{self.activity_key}_{activity}" for activity in col_log.activities]
+            return CaseBitsets.from_occurrences(items, col_log.activity_ids, case_ids, col_log.n_traces)
+        if isinstance(self.log, DataFrame):
+            raise RuntimeError("The case bitsets can be computed only for logs in EventLog format.")
+
+        item_index: Dict[Tuple[str, object], int] = {}
+        item_ids, case_ids = [], []
+        n_cases = 0
+        for case_id, trace in enumerate(self.log):
+            n_cases += 1
+            for event in trace:
+                for attr_name in categorical_attributes:
+                    value = event.get(attr_name)
+                    if value is not None:
+                        item_ids.append(item_index.setdefault((attr_name, value), len(item_index)))
+                        case_ids.append(case_id)
+        for attr_name in categorical_attributes:
+            if not any(item_attr == attr_name for item_attr, _ in item_index):
+                raise RuntimeError(f"{attr_name} attribute does not exist. Check the log.")
+        items = [f"{attr_name}_{value}" for attr_name, value in item_index]
+        return CaseBitsets.from_occurrences(items, np.asarray(item_ids, dtype=np.int64),
+                                            np.asarray(case_ids, dtype=np.int64), n_cases)
+
     """
     def get_log_alphabet_attribute(self, attribute_name: str = None) -> List[str]:
         if self.log is None:
@@ -253,7 +603,9 @@ class D4PyEventLog:
             min_support: the minimum support of the returned item sets.
             case_id_col: the name of the log attribute containing the ids of the cases
             categorical_attributes: a list of strings containing the names of the attributes to be encoded. For example, 'concept:name' for the activity names and 'org:group' for the resources.
-            algorithm: the algorithm for extracting frequent itemsets, choose between 'fpgrowth' (default) and 'apriori'.
+            algorithm: the algorithm for extracting frequent itemsets, choose between 'fpgrowth' (default), 'apriori' and
+                'bitset'. The latter counts the supports directly on per-item bitsets of the cases, without encoding
+                the log into a DataFrame.
             len_itemset: the maximum length of the extracted itemsets.
         """
         if self.log is None:
@@ -261,6 +613,23 @@ class D4PyEventLog:
         if not 0 <= min_support <= 1:
             raise RuntimeError("Min. support must be in range [0, 1].")
 
+        if algorithm == 'bitset':
+            frequent_itemsets = self._compute_bitset_itemsets(min_support, categorical_attributes, len_itemset,
+                                                              remove_column_prefix)
+        else:
+            frequent_itemsets = self._compute_encoded_itemsets(min_support, case_id_col, categorical_attributes,
+                                                               algorithm, remove_column_prefix)
+
+        frequent_itemsets['length'] = frequent_itemsets['itemsets'].apply(lambda x: len(x))
+        if len_itemset is None:
+            return frequent_itemsets
+        elif len_itemset < 1:
+            raise RuntimeError(f"The parameter len_itemset must be greater than 0.")
+        else:
+            return frequent_itemsets[(frequent_itemsets['length'] <= len_itemset)]
+
+    def _compute_encoded_itemsets(self, min_support: float, case_id_col: str, categorical_attributes: List[str],
+                                  algorithm: str, remove_column_prefix: bool) -> DataFrame:
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore", category=DeprecationWarning)
             log_df = pm4py.convert_to_dataframe(self.log)
@@ -287,15 +656,22 @@ class D4PyEventLog:
             elif algorithm == 'apriori':
                 frequent_itemsets = apriori(binary_encoded_log, min_support=min_support, use_colnames=True)
             else:
-                raise RuntimeError(f"{algorithm} algorithm not supported. Choose between fpgrowth and apriori")
-
-        frequent_itemsets['length'] = frequent_itemsets['itemsets'].apply(lambda x: len(x))
-        if len_itemset is None:
-            return frequent_itemsets
-        elif len_itemset < 1:
-            raise RuntimeError(f"The parameter len_itemset must be greater than 0.")
-        else:
-            return frequent_itemsets[(frequent_itemsets['length'] <= len_itemset)]
+                raise RuntimeError(f"{algorithm} algorithm not supported. Choose between fpgrowth, apriori and "
+                                   f"bitset")
+        return frequent_itemsets
+
+    def _compute_bitset_itemsets(self, min_support: float, categorical_attributes: List[str],
+                                 len_itemset: Optional[int], remove_column_prefix: bool) -> DataFrame:
+        case_bitsets = self.get_case_bitsets(categorical_attributes)
+        item_names = case_bitsets.items
+        if remove_column_prefix:
+            item_names = ['_'.join(item_name.split('_')[1:]) for item_name in item_names]
+        max_length = len_itemset if len_itemset is not None and len_itemset >= 1 else None
+        frequent_itemsets = case_bitsets.mine_frequent_itemsets(min_support, max_length)
+        return DataFrame({'support': [support for support, _ in frequent_itemsets],
+                          'itemsets': [frozenset(item_names[item_id] for item_id in itemset)
+                                       for _, itemset in frequent_itemsets]},
+                         columns=['support', 'itemsets'])
 
     def save_xes(self, path: str):
         if self.log is None:
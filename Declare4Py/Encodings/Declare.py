@@ -47,7 +47,7 @@ class Declare(BaseEstimator, TransformerMixin):
         frequent_itemsets = self.event_log.compute_frequent_itemsets(self.itemset_support,
                                                                      case_id_col=self.event_log.case_id_key,
                                                                      categorical_attributes=[self.act_col],
-                                                                     algorithm='fpgrowth', len_itemset=2,
+                                                                     algorithm='bitset', len_itemset=2,
                                                                      remove_column_prefix=True)
 
         declare_model = DeclareModel()
@@ -77,17 +77,19 @@ class Declare(BaseEstimator, TransformerMixin):
         declare_model.set_constraints()
 
         basic_checker = MPDeclareAnalyzer(log=self.event_log, declare_model=declare_model, consider_vacuity=False)
-        conf_check_res: MPDeclareResultsBrowser = basic_checker.run()
+        # The boolean encoding only needs the states, the number of activations is not computed
+        conf_check_res: MPDeclareResultsBrowser = basic_checker.run(state_only=self.boolean)
 
-        df_activations = conf_check_res.get_metric(metric="num_activations")
         df_state = conf_check_res.get_metric(metric="state")
-        df_transformed = df_state.combine(df_activations, self.combine_fulfillments_and_state)
         self.columns = df_state.columns
-        self.transform_time = time() - start
 
         if self.boolean:
+            self.transform_time = time() - start
             return df_state
         else:
+            df_activations = conf_check_res.get_metric(metric="num_activations")
+            df_transformed = df_state.combine(df_activations, self.combine_fulfillments_and_state)
+            self.transform_time = time() - start
             return pd.DataFrame(df_transformed, columns=self.columns)
 
     def get_feature_names(self) -> Index:
@@ -3,110 +3,88 @@ from __future__ import annotations
 import multiprocessing
 import pdb
 import time
+from itertools import islice
 
-from pm4py.objects.log.obj import Trace
+import numpy as np
 from pythomata.impl.symbolic import SymbolicDFA
 from pylogics.parsers import parse_ltl
 from Declare4Py.D4PyEventLog import D4PyEventLog
 from Declare4Py.ProcessMiningTasks.AbstractConformanceChecking import AbstractConformanceChecking
 from Declare4Py.ProcessModels.LTLModel import LTLModel
-from Declare4Py.Utils.utils import Utils
-from logaut import ltl2dfa
-from functools import reduce
+from Declare4Py.Utils.DFATable import DFATable, ProductDFATable
+from Declare4Py.Utils.SymbolTable import SymbolTable
+from typing import List, Optional, Tuple
 import pandas
 
 """
 Provides basic conformance checking functionalities
 """
 
+STREAM_BATCH_SIZE = 256  # traces sent to each worker at a time when the log is streamed
+CHUNKS_PER_WORKER = 4  # chunks of encoded traces each worker gets on average, to balance traces of different lengths
 
-def is_sink(dfa: SymbolicDFA, current_state: int):
-    sink = True
-    for output_state in dfa._transition_function[current_state].keys():
-        if output_state != current_state:
-            sink = False
-    return sink
+# State of the pool workers, set once per worker by _init_worker
+_worker_tables: Optional[List[DFATable]] = None
 
 
-def run_single_trace(trace: Trace, dfa: SymbolicDFA, backend, attribute_type: [str] = ['concept:name']) -> bool:
+def _init_worker(tables: List[DFATable]) -> None:
     """
-    Function that is run when then 'jobs' count is set to 1. It checks if the automata can reach the accepting state or not.
-    Args:
-        trace: A trace of the log
-        dfa: the automata
-        backend: backend used in the creation of the automata
-        attribute_type: the type of the attributes used in the formula.
-
-    Returns:
-        bool: If the automata reached its final state
+    Initializer of the pool workers: the compiled automata are handed to each worker once, so the tasks only carry
+    the encoded traces.
     """
-    current_states = {dfa.initial_state}
-    for event in trace:
-        temp = dict()
-        for attribute in attribute_type:
-            symbol = event[attribute]
-            symbol = Utils.parse_parenthesis(symbol)
-            symbol = Utils.encode_attribute_type(attribute) + "_" + symbol
-            symbol = Utils.parse_activity(symbol)
-            if backend == 'lydia':
-                symbol = symbol.lower()
-            else:
-                symbol = symbol.upper()
-            temp[symbol] = True
+    global _worker_tables
+    _worker_tables = tables
 
-        current_states = reduce(
-            set.union,
-            map(lambda x: dfa.get_successors(x, temp), current_states),
-            set(),
-        )
 
-        sink_state = all(is_sink(dfa, state) for state in current_states)
-        if sink_state:
-            break
+def _run_chunk(chunk: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    codes, offsets = chunk
+    return run_tables(_worker_tables, codes, offsets)
 
-    is_accepted = any(dfa.is_accepting(state) for state in current_states)
-    return is_accepted
 
-
-def run_single_trace_par(args):
+def run_tables(tables: List[DFATable], codes: np.ndarray, offsets: np.ndarray) -> np.ndarray:
     """
-    Function that is run when then 'jobs' count is greater than 1. It checks if the automata can reach the accepting
-    state or not.
+    Runs the compiled automata on the encoded traces, each automaton only on the traces accepted by the previous ones.
     Args:
-        args: same arguments as above
+        tables: the automata, compiled over the same letters
+        codes: the letter ids of the events, concatenated trace after trace
+        offsets: the start of each trace in 'codes', plus a final end offset
 
     Returns:
-
+        the bool array telling, for each trace, whether all the automata accept it
     """
-    trace, dfa, backend, attributes = args
+    accepted = np.ones(len(offsets) - 1, dtype=bool)
+    trace_ids = np.arange(len(offsets) - 1)
+    for table in tables:
+        if len(trace_ids) == 0:
+            break
+        table_accepted = table.run_traces(codes, offsets, trace_ids)
+        accepted[trace_ids[~table_accepted]] = False
+        trace_ids = trace_ids[table_accepted]
+    return accepted
 
-    # Run single trace
-    is_accepted = run_single_trace(trace, dfa, backend, attributes)
-    return trace.attributes['concept:name'], is_accepted
+
+def split_traces(codes: np.ndarray, offsets: np.ndarray, num_chunks: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Splits the encoded traces into chunks of consecutive traces, each one with its own codes and offsets.
+    """
+    bounds = [(len(offsets) - 1) * chunk // num_chunks for chunk in range(num_chunks + 1)]
+    return [(codes[offsets[start]:offsets[end]], offsets[start:end + 1] - offsets[start])
+            for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
 
 
-def run_single_trace_par_MM(args):
+def compile_dfa(dfa: SymbolicDFA, backend, symbol_table: SymbolTable, attribute_type: List[str]) -> DFATable:
     """
-    Same as the other run_trace functions, with the exception that this function is called when using multiple
-    models.
+    Compiles the automaton into a transition table over the letters of the symbol table.
     Args:
-        args:
+        dfa: the automata
+        backend: backend used in the creation of the automata
+        symbol_table: the symbol table of the traces to run
+        attribute_type: the type of the attributes used in the formula, a subset of the ones of the symbol table
 
     Returns:
-
+        DFATable: the compiled automata
     """
-    trace, list_LTLModels = args
-    is_accepted = True
-    for unpacked_model in list_LTLModels:
-        backend2dfa = unpacked_model[0]
-        dfa = unpacked_model[1]
-        attributes = unpacked_model[2]
-
-        # Run single trace
-        is_accepted = run_single_trace(trace, dfa, backend2dfa, attributes)
-        if not is_accepted:
-            return trace.attributes['concept:name'], is_accepted
-    return trace.attributes['concept:name'], is_accepted
+    return DFATable.from_dfa(dfa, symbol_table.get_propositions(backend, attribute_type))
 
 
 class LTLAnalyzer(AbstractConformanceChecking):
@@ -124,13 +102,18 @@ class LTLAnalyzer(AbstractConformanceChecking):
             self.log = log
             self.list_LTLModels = args[0]
 
-    def run(self, jobs: int = 1, minimize_automaton: bool = True) -> pandas.DataFrame:
+    def run(self, jobs: int = 1, minimize_automaton: bool = True, use_variants: bool = True,
+            use_trie: bool = False) -> pandas.DataFrame:
         """
         Performs conformance checking for the provided event log and a single LTL model.
         Based on the number of jobs performs standard computation or parallel.
         Args:
             jobs: Number of jobs, indicates how many
             minimize_automaton: If the automata should be minimized, may add extra burden on the computation
+            use_variants: If the automata should be run once per variant of the log (projected on the attributes of
+                the formula) instead of once per trace. Ignored for streamed logs.
+            use_trie: If the automata should be run once on the prefix tree of the variants of the log, so that the
+                prefixes shared by many variants are run only once. The jobs are ignored. Ignored for streamed logs.
 
         Returns:
             DataFrame: A pandas Dataframe containing the id of the traces and the result of the conformance check
@@ -150,32 +133,72 @@ class LTLAnalyzer(AbstractConformanceChecking):
             raise RuntimeError(f"{jobs} not a valid number of jobs. Allowed values goes from -1.")
 
         backend2dfa = self.process_model.backend
-        dfa = ltl2dfa(self.process_model.parsed_formula, backend=backend2dfa)  # lydia
-
-        if minimize_automaton:
-            dfa = dfa.minimize()
-        g_log = self.event_log.get_log()
+        dfa = self.process_model.to_dfa(minimize_automaton)
         attributes = self.process_model.attribute_type
-        if sequential:
+        if self.event_log.is_streaming():
+            # The traces are encoded in batches, the table is compiled again only when a batch brings new letters.
+            # Batches are sent to the pool to keep the memory footprint of the stream bounded, and the pool is started
+            # again, with the new table, only when the table changes.
             results = []
-            for trace in g_log:
-                is_accepted = run_single_trace(trace, dfa, backend2dfa, attributes)
-                results.append([trace.attributes[self.event_log.activity_key], is_accepted])
+            symbol_table = SymbolTable(attributes)
+            table = None
+            pool = None
+            traces = self.event_log.iter_traces()
+            batch_size = STREAM_BATCH_SIZE if sequential else workers * STREAM_BATCH_SIZE
+            try:
+                batch = list(islice(traces, batch_size))
+                while batch:
+                    codes, offsets = symbol_table.encode_traces(batch)
+                    if table is None or len(table.letters) < len(symbol_table):
+                        table = compile_dfa(dfa, backend2dfa, symbol_table, attributes)
+                        if not sequential:
+                            if pool is not None:
+                                pool.terminate()
+                            pool = multiprocessing.Pool(processes=workers, initializer=_init_worker,
+                                                        initargs=([table],))
+                    if sequential:
+                        accepted = table.run_traces(codes, offsets)
+                    else:
+                        accepted = np.concatenate(pool.map(_run_chunk, split_traces(codes, offsets, workers)))
+                    results += [[trace.attributes[self.event_log.activity_key], is_accepted]
+                                for trace, is_accepted in zip(batch, accepted.tolist())]
+                    batch = list(islice(traces, batch_size))
+            finally:
+                if pool is not None:
+                    pool.terminate()
         else:
-            traces = g_log._list
-            with multiprocessing.Pool(processes=workers) as pool:
-                results = pool.map(run_single_trace_par, zip(traces, [dfa] * len(traces),
-                                                                  [backend2dfa] * len(traces)
-                                                                  [attributes] * len(traces)))
+            traces = self.event_log.get_log()
+            symbol_table = self.event_log.get_symbol_table(attributes)
+            table = compile_dfa(dfa, backend2dfa, symbol_table, attributes)
+            if use_trie:
+                variant_log = self.event_log.get_variant_log(attributes)
+                prefix_trie = self.event_log.get_prefix_trie(attributes)
+                trie_table = DFATable.from_dfa(dfa, [table.letters[symbol_table.letter_index[letter]]
+                                                     for letter in prefix_trie.letters])
+                accepted = variant_log.expand(prefix_trie.run_dfa(trie_table).tolist())
+            elif use_variants:
+                # Traces with the same projection on the formula attributes share the outcome
+                variant_log = self.event_log.get_variant_log(attributes)
+                codes, offsets = symbol_table.get_traces(variant_log.representatives)
+                accepted = variant_log.expand(self._run_log([table], codes, offsets, workers).tolist())
+            else:
+                accepted = self._run_log([table], symbol_table.codes, symbol_table.offsets, workers).tolist()
+            results = [[trace.attributes[self.event_log.activity_key], is_accepted]
+                       for trace, is_accepted in zip(traces, accepted)]
         return pandas.DataFrame(results, columns=[self.event_log.case_id_key, "accepted"])
 
-    def run_multiple_models(self, jobs: int = 1, minimize_automaton: bool = True) -> pandas.DataFrame:
+    def run_multiple_models(self, jobs: int = 1, minimize_automaton: bool = True, use_product: bool = False,
+                            per_model: bool = False) -> pandas.DataFrame:
         """
         Performs conformance checking for the provided event log and multiple LTL models.
         Based on the number of jobs performs standard computation or parallel.
         Args:
             jobs: Number of jobs, indicates how many
             minimize_automaton: If the automata should be minimized, may add extra burden on the computation
+            use_product: If the traces should be run once on the product of the automata of all the models, built
+                lazily over the events of the log, instead of once per model. The jobs are ignored.
+            per_model: If the result of each model should be reported too, in the columns accepted_<position of the
+                model>. It implies use_product.
 
         Returns:
             DataFrame: A pandas Dataframe containing the id of the traces and the result of the conformance check
@@ -196,42 +219,62 @@ class LTLAnalyzer(AbstractConformanceChecking):
 
         g_log = self.log.get_log()
         results = {}
+        if use_product or per_model:
+            tables, codes, offsets = self._compile_models(minimize_automaton)
+            accepted = ProductDFATable(tables).run_traces(codes, offsets, per_automaton=per_model)
+            case_ids = [trace.attributes[self.log.activity_key] for trace in g_log]
+            if not per_model:
+                return pandas.DataFrame(list(zip(case_ids, accepted.tolist())),
+                                        columns=[self.log.case_id_key, "accepted"])
+            results = pandas.DataFrame(accepted, columns=[f"accepted_{id_model}"
+                                                          for id_model in range(len(self.list_LTLModels))])
+            results.insert(0, "accepted", accepted.all(axis=1))
+            results.insert(0, self.log.case_id_key, case_ids)
+            return results
         if sequential:
+            # Each model is run only on the traces accepted by the previous ones
+            trace_ids = np.arange(len(g_log))
             for id_model, model in enumerate(self.list_LTLModels):
-                n = len(g_log)
-                if n > 0:
-                    temp_list = []
-                    backend2dfa = model.backend
-                    dfa = ltl2dfa(model.parsed_formula, backend=model.backend)
-
-                    if minimize_automaton:
-                        dfa = dfa.minimize()
-
-                    attributes = model.attribute_type
-                    for trace in g_log:
-                        is_accepted = run_single_trace(trace, dfa, backend2dfa, attributes)
-                        if is_accepted:
-                            temp_list.append(trace)
-                        results[trace.attributes[self.log.activity_key]] = is_accepted
-                    n = len(temp_list)
-                    g_log = temp_list
-                if n == 0:
+                if len(trace_ids) == 0:
                     break
+                symbol_table = self.log.get_symbol_table(model.attribute_type)
+                table = compile_dfa(model.to_dfa(minimize_automaton), model.backend, symbol_table, model.attribute_type)
+                accepted = table.run_traces(symbol_table.codes, symbol_table.offsets, trace_ids)
+                for trace_idx, is_accepted in zip(trace_ids.tolist(), accepted.tolist()):
+                    results[g_log[trace_idx].attributes[self.log.activity_key]] = is_accepted
+                trace_ids = trace_ids[accepted]
             results = results.items()
         else:
-            traces = g_log._list
-            with multiprocessing.Pool(processes=workers) as pool:
-                tmp_model_list = []
-                for model in self.list_LTLModels:
-                    dfa = ltl2dfa(model.parsed_formula, backend=model.backend)
-                    if minimize_automaton:
-                        dfa = dfa.minimize()
-                    tmp_model_list.append((model.backend, dfa, model.attribute_type))
-
-                results = pool.map(run_single_trace_par_MM, zip(traces, [tmp_model_list]*len(traces)))
+            tables, codes, offsets = self._compile_models(minimize_automaton)
+            results = [[trace.attributes[self.log.activity_key], is_accepted]
+                       for trace, is_accepted in zip(g_log, self._run_log(tables, codes, offsets, workers).tolist())]
 
         return pandas.DataFrame(results, columns=[self.log.case_id_key, "accepted"])
 
+    def _compile_models(self, minimize_automaton: bool) -> Tuple[List[DFATable], np.ndarray, np.ndarray]:
+        """
+        Compiles the automata of all the models over the same letters of the log: the letters are the values of all
+        the attributes used by the models, each automaton reads the values of its own attributes.
+        """
+        attributes = list(dict.fromkeys(attr for model in self.list_LTLModels for attr in model.attribute_type))
+        symbol_table = self.log.get_symbol_table(attributes)
+        tables = [compile_dfa(model.to_dfa(minimize_automaton), model.backend, symbol_table, model.attribute_type)
+                  for model in self.list_LTLModels]
+        return tables, symbol_table.codes, symbol_table.offsets
+
+    @staticmethod
+    def _run_log(tables: List[DFATable], codes: np.ndarray, offsets: np.ndarray, workers: int) -> np.ndarray:
+        """
+        Runs the compiled automata on the encoded traces with a pool of workers. The automata are shipped once per
+        worker and the traces are sent in chunks of int arrays. With at most one worker, or a single trace, the
+        automata are run in the current process.
+        """
+        if workers <= 1 or len(offsets) < 3:
+            return run_tables(tables, codes, offsets)
+        chunks = split_traces(codes, offsets, min(len(offsets) - 1, workers * CHUNKS_PER_WORKER))
+        with multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(tables,)) as pool:
+            return np.concatenate(pool.map(_run_chunk, chunks))
+
     def run_aggregate(self) -> pandas.DataFrame:
         """
         Performs a groupby from Pandas on the event log.
@@ -244,8 +287,7 @@ class LTLAnalyzer(AbstractConformanceChecking):
             raise RuntimeError("You must load the log before checking the model.")
         if self.process_model is None:
             raise RuntimeError("You must load the LTL model before checking the model.")
-        dfa = ltl2dfa(self.process_model.parsed_formula, backend=self.process_model.backend)
-        dfa = dfa.minimize()
+        dfa = self.process_model.to_dfa()
         group = self.event_log.groupby(self.event_log.case_id_key, as_index=True)
         results = group[self.event_log.activity_key].aggregate(self.run_single_trace, dfa=dfa, engine='cython')
 
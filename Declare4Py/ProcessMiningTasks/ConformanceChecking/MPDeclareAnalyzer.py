@@ -1,17 +1,84 @@
 from __future__ import annotations
 
-import pdb
+import multiprocessing
+from itertools import islice, repeat
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
 
 from Declare4Py.D4PyEventLog import D4PyEventLog
 from Declare4Py.ProcessMiningTasks.AbstractConformanceChecking import AbstractConformanceChecking
-from Declare4Py.ProcessMiningTasks.ConformanceChecking.MPDeclareResultsBrowser import MPDeclareResultsBrowser
+from Declare4Py.ProcessMiningTasks.ConformanceChecking.MPDeclareResultsBrowser import MPDeclareResultsBrowser, \
+    RESULT_DTYPE, MISSING
 from Declare4Py.ProcessModels.DeclareModel import DeclareModel
 from Declare4Py.Utils.Declare.Checkers import ConstraintChecker
+from Declare4Py.Utils.Declare.FusedChecker import FusedConstraintChecker
 
 """
 Provides basic conformance checking functionalities
 """
 
+SHARDS_PER_WORKER = 4  # index ranges each worker gets on average, to balance traces of different lengths
+STREAM_BATCH_SIZE = 256  # traces sent to each worker at a time when the log is streamed
+
+# State of the pool workers, set once per worker by _init_worker
+_worker_traces: Optional[list] = None
+_worker_checker: Optional[FusedConstraintChecker] = None
+_worker_state_only: bool = False
+
+
+def _init_worker(traces: Optional[list], checker: FusedConstraintChecker, state_only: bool = False) -> None:
+    """
+    Initializer of the pool workers: the traces and the checker are handed to each worker once (inherited without
+    copies when processes are forked), so the tasks only carry index ranges.
+    """
+    global _worker_traces, _worker_checker, _worker_state_only
+    _worker_traces = traces
+    _worker_checker = checker
+    _worker_state_only = state_only
+
+
+def _check_shard(bounds: Tuple[int, int]) -> np.ndarray:
+    start, end = bounds
+    return _check_traces((_worker_traces[idx] for idx in range(start, end)), trace_ids=range(start, end))
+
+
+def _check_traces(traces, checker: Optional[FusedConstraintChecker] = None,
+                  trace_ids: Optional[Iterable[int]] = None, state_only: Optional[bool] = None) -> np.ndarray:
+    """
+    Checks the traces and encodes the results into rows of the result matrix, so that no CheckerResult object
+    outlives its trace. The positions of the traces in the log, if given, let the checker read the outcomes of the
+    conditions from the masks computed over the columnar log. With state_only, only the states are computed.
+    """
+    checker = checker if checker is not None else _worker_checker
+    state_only = state_only if state_only is not None else _worker_state_only
+    n_constraints = len(checker.checkers)
+    trace_ids = trace_ids if trace_ids is not None else repeat(None)
+    if state_only:
+        rows = [MPDeclareResultsBrowser.encode_trace_states(checker.check_trace_states(trace, trace_id))
+                for trace, trace_id in zip(traces, trace_ids)]
+    else:
+        rows = [MPDeclareResultsBrowser.encode_trace_results(checker.check_trace_conformance(trace,
+                                                                                             trace_id=trace_id),
+                                                             n_constraints)
+                for trace, trace_id in zip(traces, trace_ids)]
+    return np.stack(rows) if rows else np.empty((0, n_constraints), dtype=RESULT_DTYPE)
+
+
+def _check_trace_prefixes(trace, checker: FusedConstraintChecker) -> np.ndarray:
+    """
+    Checks the prefixes of a trace and encodes the results into rows of the result matrix, one per event. Each row
+    starts as a copy of the previous one, and only the results recomputed after the event are encoded again.
+    """
+    trace = list(trace)
+    rows = np.full((len(trace), len(checker.checkers)), MISSING, dtype=RESULT_DTYPE)
+    for index, prefix_results in enumerate(checker.check_trace_prefixes(trace)):
+        if index > 0:
+            rows[index] = rows[index - 1]
+        for idx, res in prefix_results:
+            rows[index, idx] = MPDeclareResultsBrowser.encode_result(res)
+    return rows
+
 
 class MPDeclareAnalyzer(AbstractConformanceChecking):
 
@@ -19,21 +86,31 @@ class MPDeclareAnalyzer(AbstractConformanceChecking):
         super().__init__(log, declare_model)
         self.consider_vacuity = consider_vacuity
 
-    def run(self) -> MPDeclareResultsBrowser:
+    def run(self, jobs: int = 1, use_variants: bool = True, state_only: bool = False) -> MPDeclareResultsBrowser:
         """
-        Performs conformance checking for the provided event log and DECLARE model.
+        Performs conformance checking for the provided event log and DECLARE model. When the log has a columnar
+        representation (e.g. it is parsed with columnar=True), the data conditions of the constraints are evaluated
+        over its attribute columns, once for all the events.
 
         Parameters
         ----------
-        consider_vacuity : bool
-            True means that vacuously satisfied traces are considered as satisfied, violated otherwise.
+        jobs : int
+            number of worker processes the log is sharded across: 1 (or 0) checks the traces sequentially, -1 uses
+            all the available cores. The results are in the order of the traces in the log.
+        use_variants : bool
+            when all the constraints of the model are control-flow only, check a single trace per variant of the log and
+            share its results with the other traces of the variant.
+        state_only : bool
+            compute only the truth value of the traces for the constraints, e.g. for a boolean encoding of the log:
+            the checkers stop at the event deciding the state and the other metrics are left missing. The states of
+            the constraints whose conditions are not properly formatted are left missing, in their own columns, on
+            the traces where the conditions are evaluated, without being reported.
 
         Returns
         -------
         conformance_checking_results
-            dictionary where the key is a list containing trace position inside the log and the trace name, the value is
-            a dictionary with keys the names of the constraints and values a CheckerResult object containing
-            the number of pendings, activations, violations, fulfillments and the truth value of the trace for that
+            MPDeclareResultsBrowser wrapping a traces x constraints matrix with, for each trace and constraint, the
+            number of pendings, activations, violations, fulfillments and the truth value of the trace for that
             constraint.
         """
         if self.event_log is None:
@@ -41,9 +118,79 @@ class MPDeclareAnalyzer(AbstractConformanceChecking):
         if self.process_model is None:
             raise RuntimeError("You must load the DECLARE model before checking the model.")
 
-        log_checkers_results = []
-        for trace in self.event_log.get_log():
-            log_checkers_results.append(ConstraintChecker().check_trace_conformance(trace, self.process_model,
-                                                                                    self.consider_vacuity,
-                                                                                    self.event_log.activity_key))
-        return MPDeclareResultsBrowser(log_checkers_results, self.process_model.serialized_constraints)
+        if jobs == 1 or jobs == 0:
+            workers = 1
+        elif jobs == -1:
+            workers = multiprocessing.cpu_count()
+        elif jobs > 1:
+            workers = jobs
+        else:
+            raise RuntimeError(f"{jobs} not a valid number of jobs. Allowed values goes from -1.")
+
+        checker = FusedConstraintChecker(self.process_model, self.consider_vacuity, self.event_log.activity_key)
+        if self.event_log.is_streaming():
+            results = self._check_stream(checker, workers, state_only)
+        elif use_variants and all(ConstraintChecker.is_control_flow(constraint)
+                                  for constraint in self.process_model.constraints):
+            variant_log = self.event_log.get_variant_log()
+            traces = self.event_log.get_log()
+            representatives = [traces[trace_idx] for trace_idx in variant_log.representatives]
+            results = self._check_log(checker, representatives, workers, state_only)[variant_log.trace_variants]
+        else:
+            if self.event_log.columnar_log is not None:
+                # The data conditions are evaluated over the attribute columns of the log, all the events at once
+                checker.set_columnar_log(self.event_log.get_columnar_log())
+            results = self._check_log(checker, self.event_log.get_log(), workers, state_only)
+        return MPDeclareResultsBrowser(results, self.process_model.serialized_constraints)
+
+    def run_prefixes(self) -> MPDeclareResultsBrowser:
+        """
+        Performs conformance checking on every prefix of every trace of the log, e.g. to label the prefixes of a
+        predictive monitoring dataset. The results on a prefix are the ones on a running trace (completed=False), and
+        each trace is walked once, updating after each event only the results the event may have changed.
+
+        Returns
+        -------
+        conformance_checking_results
+            MPDeclareResultsBrowser wrapping a prefixes x constraints matrix, with a row per event of the log. The
+            trace and the length of the prefix of each row are given by its get_prefix_index method.
+        """
+        if self.event_log is None:
+            raise RuntimeError("You must load the log before checking the model.")
+        if self.process_model is None:
+            raise RuntimeError("You must load the DECLARE model before checking the model.")
+
+        checker = FusedConstraintChecker(self.process_model, self.consider_vacuity, self.event_log.activity_key)
+        results = [np.empty((0, len(checker.checkers)), dtype=RESULT_DTYPE)]
+        offsets = [0]
+        for trace in self.event_log.iter_traces():
+            results.append(_check_trace_prefixes(trace, checker))
+            offsets.append(offsets[-1] + len(results[-1]))
+        return MPDeclareResultsBrowser(np.concatenate(results), self.process_model.serialized_constraints,
+                                       np.asarray(offsets, dtype=np.int64))
+
+    @staticmethod
+    def _check_log(checker: FusedConstraintChecker, traces, workers: int, state_only: bool = False) -> np.ndarray:
+        if workers == 1 or len(traces) < 2:
+            return _check_traces(traces, checker, range(len(traces)), state_only)
+        num_shards = min(len(traces), workers * SHARDS_PER_WORKER)
+        bounds = [len(traces) * shard // num_shards for shard in range(num_shards + 1)]
+        with multiprocessing.Pool(processes=workers, initializer=_init_worker,
+                                  initargs=(traces, checker, state_only)) as pool:
+            shard_results = pool.map(_check_shard, zip(bounds[:-1], bounds[1:]))
+        return np.concatenate(shard_results)
+
+    def _check_stream(self, checker: FusedConstraintChecker, workers: int, state_only: bool = False) -> np.ndarray:
+        traces = self.event_log.iter_traces()
+        if workers == 1:
+            return _check_traces(traces, checker, state_only=state_only)
+        # Traces are sent to the pool in bounded batches to keep the memory footprint of the stream bounded
+        results = [np.empty((0, len(checker.checkers)), dtype=RESULT_DTYPE)]
+        with multiprocessing.Pool(processes=workers, initializer=_init_worker,
+                                  initargs=(None, checker, state_only)) as pool:
+            batch = list(islice(traces, workers * STREAM_BATCH_SIZE))
+            while batch:
+                chunks = [batch[idx:idx + STREAM_BATCH_SIZE] for idx in range(0, len(batch), STREAM_BATCH_SIZE)]
+                results += pool.map(_check_traces, chunks)
+                batch = list(islice(traces, workers * STREAM_BATCH_SIZE))
+        return np.concatenate(results)
@@ -1,6 +1,9 @@
 from __future__ import annotations
+import os
 from typing import List, Union, Optional
 from Declare4Py.Utils.Declare.Checkers import CheckerResult
+from Declare4Py.Utils.Declare.TraceStates import TraceState
+import numpy as np
 import pandas as pd
 
 """
@@ -8,62 +11,174 @@ Initializes class ConformanceCheckingResults
 
 Attributes
 -------
-    dict_results : dict
-        dictionary of conformance checking results
+    results : np.ndarray
+        structured array (traces x constraints) with the fields state, num_activations, num_fulfillments,
+        num_violations and num_pendings. States are stored as their position in TraceState, missing values as -1.
 """
 
+METRICS = ["num_activations", "num_violations", "num_fulfillments", "num_pendings", "state"]
+RESULT_DTYPE = np.dtype([("state", np.int8), ("num_activations", np.int32), ("num_fulfillments", np.int32),
+                         ("num_violations", np.int32), ("num_pendings", np.int32)])
+MISSING = -1
+TRACE_STATES = list(TraceState)
+STATE_CODES = {state: code for code, state in enumerate(TRACE_STATES)}
+VIOLATED_CODE = STATE_CODES[TraceState.VIOLATED]
+
 
 class MPDeclareResultsBrowser:
 
-    def __init__(self, matrix_results: List[List[CheckerResult]], serialized_constraints: List[str]):
+    def __init__(self, matrix_results: Union[np.ndarray, List[List[CheckerResult]]], serialized_constraints: List[str],
+                 prefix_offsets: Optional[np.ndarray] = None):
+        """
+        prefix_offsets, when given, tells that the rows of the results are the prefixes of the traces instead of the
+        traces: the rows of the prefixes of the i-th trace go from prefix_offsets[i] to prefix_offsets[i + 1].
+        """
         self.serialized_constraints = serialized_constraints
-        self.model_check_res: List[List[CheckerResult]] = matrix_results
+        if isinstance(matrix_results, np.ndarray):
+            self.results: np.ndarray = matrix_results
+        else:
+            self.results: np.ndarray = self.encode_log_results(matrix_results, len(serialized_constraints))
+        self.prefix_offsets: Optional[np.ndarray] = None if prefix_offsets is None else np.asarray(prefix_offsets,
+                                                                                                   dtype=np.int64)
+
+    @staticmethod
+    def encode_result(res: Optional[CheckerResult]) -> tuple:
+        """
+        Encodes the result of a constraint into a cell of the result matrix, all missing for None.
+        """
+        if res is None:
+            return (MISSING,) * len(RESULT_DTYPE)
+        return (STATE_CODES.get(res.state, MISSING),
+                MISSING if res.num_activations is None else res.num_activations,
+                MISSING if res.num_fulfillments is None else res.num_fulfillments,
+                MISSING if res.num_violations is None else res.num_violations,
+                MISSING if res.num_pendings is None else res.num_pendings)
+
+    @staticmethod
+    def encode_trace_results(trace_results: List[Optional[CheckerResult]], n_constraints: int) -> np.ndarray:
+        """
+        Encodes the results of the constraints on a trace, the i-th one being the result of the i-th constraint, into
+        a row of the result matrix. A None result (e.g. of a constraint with malformed conditions) is left missing in
+        the column of its constraint.
+        """
+        row = np.full(n_constraints, MISSING, dtype=RESULT_DTYPE)
+        if trace_results:
+            row[:len(trace_results)] = [MPDeclareResultsBrowser.encode_result(res) for res in trace_results]
+        return row
+
+    @staticmethod
+    def encode_trace_states(trace_states: List[Optional[TraceState]]) -> np.ndarray:
+        """
+        Encodes the states of the constraints on a trace, one per constraint, into a row of the result matrix whose
+        other metrics are missing. Constraints without a state (e.g. with malformed conditions) are left missing.
+        """
+        row = np.full(len(trace_states), MISSING, dtype=RESULT_DTYPE)
+        row["state"] = [STATE_CODES.get(state, MISSING) for state in trace_states]
+        return row
+
+    @staticmethod
+    def encode_log_results(matrix_results: List[List[CheckerResult]], n_constraints: int) -> np.ndarray:
+        """
+        Encodes the results of the constraints on all the traces into the result matrix.
+        """
+        results = np.full((len(matrix_results), n_constraints), MISSING, dtype=RESULT_DTYPE)
+        for trace_id, trace_results in enumerate(matrix_results):
+            results[trace_id] = MPDeclareResultsBrowser.encode_trace_results(trace_results, n_constraints)
+        return results
+
+    @property
+    def model_check_res(self) -> List[List[CheckerResult]]:
+        """
+        The results as CheckerResult objects, rebuilt from the result matrix. Missing results are left out.
+        """
+        return [[self.decode_result(result) for result in trace_results if result["state"] != MISSING]
+                for trace_results in self.results]
+
+    @staticmethod
+    def decode_result(result: np.void) -> CheckerResult:
+        state, num_activations, num_fulfillments, num_violations, num_pendings = result.tolist()
+        return CheckerResult(num_fulfillments=None if num_fulfillments == MISSING else num_fulfillments,
+                             num_violations=None if num_violations == MISSING else num_violations,
+                             num_pendings=None if num_pendings == MISSING else num_pendings,
+                             num_activations=None if num_activations == MISSING else num_activations,
+                             state=None if state == MISSING else TRACE_STATES[state])
 
     def get_metric(self, metric: str, trace_id: int = None, constr_id: int = None) -> Union[pd.DataFrame, List, int]:
         if type(metric) is not str:
             raise RuntimeError("You must specify a metric among num_activations, num_violations, num_fulfillments, "
                                "num_pendings, state.")
-        if metric not in ["num_activations", "num_violations", "num_fulfillments", "num_pendings", "state"]:
+        if metric not in METRICS:
             raise RuntimeError("You must specify a metric among num_activations, num_violations, num_fulfillments, "
                                "num_pendings, state.")
         results = []
         if trace_id is None and constr_id is None:
-            for trace_res in self.model_check_res:
-                tmp_list = []
-                for result_checker in trace_res:
-                    tmp_list.append(self.retrieve_metric(result_checker, metric))
-                results.append(tmp_list)
-            results = pd.DataFrame(results, columns=self.serialized_constraints)
+            values = self.retrieve_metric(self.results, metric)
+            missing = values == MISSING
+            if not missing.any():
+                results = pd.DataFrame(values.astype(np.int64), columns=self.serialized_constraints)
+            else:
+                results = pd.DataFrame({col_id: np.where(missing[:, col_id], np.nan, values[:, col_id])
+                                        if missing[:, col_id].any() else values[:, col_id].astype(np.int64)
+                                        for col_id in range(values.shape[1])})
+                results.columns = self.serialized_constraints
         elif trace_id is not None and constr_id is None:
-            for result_checker in self.model_check_res[trace_id]:
-                results.append(self.retrieve_metric(result_checker, metric))
+            results = self._to_list(self.retrieve_metric(self.results[trace_id], metric))
         elif trace_id is None and constr_id is not None:
-            for trace_res in self.model_check_res:
-                result_checker = trace_res[constr_id]
-                results.append(self.retrieve_metric(result_checker, metric))
+            results = self._to_list(self.retrieve_metric(self.results[:, constr_id], metric))
         else:
             try:
-                if metric == "state":
-                    results = 0 if getattr(self.model_check_res[trace_id][constr_id], metric).value == 'Violated' else 1
-                else:
-                    results = getattr(self.model_check_res[trace_id][constr_id], metric)
+                value = int(self.retrieve_metric(self.results[trace_id, constr_id], metric))
+                results = None if value == MISSING else value
             except IndexError:
                 print("The index of the trace must be lower than the log size. The index of the constraint must be "
                       "lower than the total number of constraints in the Declare model.")
             except TypeError as e:
                 print(f"The index of the trace/constraint must be integers or slices, not {e}.")
-            except AttributeError:
-                print("You must specify a metric among num_activations, num_violations, num_fulfillments, "
-                      "num_pendings, state.")
         return results
 
     @staticmethod
-    def retrieve_metric(result_checker: CheckerResult, metric: str) -> Optional[int]:
-        try:
-            if metric == "state":
-                return 0 if getattr(result_checker, metric).value == 'Violated' else 1
-            else:
-                return getattr(result_checker, metric)
-        except AttributeError:
-            print("You must specify a metric among num_activations, num_violations, num_fulfillments, "
-                  "num_pendings, state.")
+    def retrieve_metric(results: np.ndarray, metric: str) -> np.ndarray:
+        """
+        Returns the values of a metric for a slice of the result matrix. The state is 0 for violated constraints and
+        1 otherwise.
+        """
+        if metric == "state":
+            states = results["state"]
+            return np.where(states == MISSING, MISSING, (states != VIOLATED_CODE).astype(np.int8))
+        return results[metric]
+
+    def get_prefix_index(self) -> pd.DataFrame:
+        """
+        Returns, for each row of results on the prefixes of the traces, the position of the trace in the log and the
+        length of the prefix.
+        """
+        if self.prefix_offsets is None:
+            raise RuntimeError("The results are not on the prefixes of the traces.")
+        lengths = np.diff(self.prefix_offsets)
+        trace_ids = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        prefix_lens = np.arange(len(trace_ids), dtype=np.int64) - np.repeat(self.prefix_offsets[:-1], lengths) + 1
+        return pd.DataFrame({"trace_id": trace_ids, "prefix_len": prefix_lens})
+
+    @staticmethod
+    def _to_list(values: np.ndarray) -> List[Optional[int]]:
+        return [None if value == MISSING else value for value in values.tolist()]
+
+    def save(self, path: str) -> None:
+        """
+        Saves the result matrix, the constraints and the prefix offsets, if any, in a compressed NumPy archive.
+        """
+        arrays = {"results": self.results, "constraints": np.array(self.serialized_constraints, dtype=str)}
+        if self.prefix_offsets is not None:
+            arrays["prefix_offsets"] = self.prefix_offsets
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> MPDeclareResultsBrowser:
+        """
+        Loads the results saved with save().
+        """
+        if not os.path.exists(path) and os.path.exists(path + ".npz"):
+            path += ".npz"  # np.savez_compressed adds the extension
+        with np.load(path) as archive:
+            prefix_offsets = archive["prefix_offsets"] if "prefix_offsets" in archive.files else None
+            return cls(archive["results"], archive["constraints"].tolist(), prefix_offsets)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from abc import ABC
+from typing import Dict, List, Optional, Tuple
 
 from Declare4Py.D4PyEventLog import D4PyEventLog
 from Declare4Py.ProcessMiningTasks.AbstractDiscovery import AbstractDiscovery
 from Declare4Py.ProcessModels.DeclareModel import DeclareModel, DeclareModelTemplate
 from Declare4Py.Utils.Declare.Checkers import ConstraintChecker
+from Declare4Py.Utils.Declare.SupportEngine import DeclareSupportEngine
 
 
 
@@ -24,18 +26,45 @@ Attributes
         inheriting from class Discovery
     output_path : str
         if specified, save the discovered constraints in a DECLARE model to the provided path.
+    remove_redundant : bool
+        if True, the discovered constraints implied by a stronger discovered constraint on the same activities are
+        left out of the model.
 
 """
 
+# Subsumptions between templates, keyed by template name: a trace satisfying a constraint of the key template also
+# satisfies the constraint of the value template on the same activities, so the support can only decrease from a
+# template to the stronger ones.
+WEAKER_TEMPLATES: Dict[str, str] = {
+    DeclareModelTemplate.EXCLUSIVE_CHOICE.templ_str: DeclareModelTemplate.CHOICE.templ_str,
+    DeclareModelTemplate.RESPONSE.templ_str: DeclareModelTemplate.RESPONDED_EXISTENCE.templ_str,
+    DeclareModelTemplate.ALTERNATE_RESPONSE.templ_str: DeclareModelTemplate.RESPONSE.templ_str,
+    DeclareModelTemplate.CHAIN_RESPONSE.templ_str: DeclareModelTemplate.ALTERNATE_RESPONSE.templ_str,
+    DeclareModelTemplate.ALTERNATE_PRECEDENCE.templ_str: DeclareModelTemplate.PRECEDENCE.templ_str,
+    DeclareModelTemplate.CHAIN_PRECEDENCE.templ_str: DeclareModelTemplate.ALTERNATE_PRECEDENCE.templ_str,
+    DeclareModelTemplate.NOT_RESPONDED_EXISTENCE.templ_str: DeclareModelTemplate.NOT_RESPONSE.templ_str,
+    DeclareModelTemplate.NOT_RESPONSE.templ_str: DeclareModelTemplate.NOT_CHAIN_RESPONSE.templ_str,
+}
+
+
+def _get_subsumption_depth(template: DeclareModelTemplate) -> int:
+    depth = 0
+    templ_str = template.templ_str
+    while templ_str in WEAKER_TEMPLATES:
+        templ_str = WEAKER_TEMPLATES[templ_str]
+        depth += 1
+    return depth
+
 
 class DeclareMiner(AbstractDiscovery, ABC):
 
     def __init__(self, log: D4PyEventLog, consider_vacuity: bool, min_support: float, itemsets_support: float = 0.9,
-                 max_declare_cardinality: int = 1):
+                 max_declare_cardinality: int = 1, remove_redundant: bool = False):
         super().__init__(log, DeclareModel(), min_support)
         self.consider_vacuity: bool = consider_vacuity
         self.itemsets_support: float = itemsets_support
         self.max_declare_cardinality: int = max_declare_cardinality
+        self.remove_redundant: bool = remove_redundant
 
     def run(self) -> DeclareModel:
         """
@@ -69,65 +98,101 @@ class DeclareMiner(AbstractDiscovery, ABC):
         frequent_item_sets = self.event_log.compute_frequent_itemsets(min_support=self.itemsets_support,
                                                                       case_id_col=self.event_log.get_case_name(),
                                                                       categorical_attributes=[self.event_log.get_concept_name()],
-                                                                      algorithm='fpgrowth', remove_column_prefix=True)
+                                                                      algorithm='bitset', remove_column_prefix=True)
 
         tpm_activities = self.event_log.get_event_attribute_values(self.event_log.get_concept_name())
         if not isinstance(tpm_activities, list):
             self.process_model.activities = tpm_activities.keys()
 
+        # The supports of all the templates of an item set are computed together, from the activity positions
+        support_engine = DeclareSupportEngine(self.event_log, self.consider_vacuity)
         for item_set in frequent_item_sets['itemsets']:
             length = len(item_set)
             if length == 1:
+                activities = list(item_set)
+                supports = support_engine.get_unary_supports(activities[0], self.max_declare_cardinality)
                 for template in DeclareModelTemplate.get_unary_templates():
-                    constraint = {"template": template, "activities": list(item_set), "condition": ("", "")}
+                    constraint = {"template": template, "activities": list(activities), "condition": ("", "")}
 
                     if not template.supports_cardinality:
-                        constraint_satisfaction = ConstraintChecker().constraint_checking_with_support(constraint,
-                                                                                                       self.event_log,
-                                                                                                       self.consider_vacuity,
-                                                                                                       self.min_support)
-                        # self.basic_discovery_results,= self.discover_constraint(self.event_log, constraint,
-                        #                                                        self.consider_vacuity)
-                        if constraint_satisfaction:
+                        if self.is_supported(constraint, supports.get((template.templ_str, None))):
                             self.process_model.constraints.append(constraint.copy())
                     else:
                         for i in range(self.max_declare_cardinality):
                             constraint['n'] = i + 1
-                            constraint_satisfaction = ConstraintChecker().constraint_checking_with_support(constraint,
-                                                                                                           self.event_log,
-                                                                                                           self.consider_vacuity,
-                                                                                                           self.min_support)
-                            # self.basic_discovery_results,= self.discover_constraint(self.event_log, constraint,
-                            #                                                        self.consider_vacuity)
-                            if constraint_satisfaction:
+                            if self.is_supported(constraint, supports.get((template.templ_str, i + 1))):
                                 self.process_model.constraints.append(constraint.copy())
+                            elif template.templ_str == DeclareModelTemplate.EXISTENCE.templ_str:
+                                break  # Existence(n + 1) is stronger than Existence(n)
 
             elif length == 2:
+                activities = list(item_set)
+                supports, reversed_supports = support_engine.get_binary_supports(activities[0], activities[1])
+                reversed_activities = list(reversed(activities))
+                supported = self.check_binary_templates(activities, supports)
+                reversed_supported = self.check_binary_templates(reversed_activities, reversed_supports)
                 for template in DeclareModelTemplate.get_binary_not_shortcut_templates():
-                    # constraint = {"template": templ, "activities": ', '.join(item_set), "condition": ("", "", "")}
-                    constraint = {"template": template, "activities": list(item_set), "condition": ("", "")}
-                    # self.basic_discovery_results,= self.discover_constraint(self.event_log, constraint,
-                    #                                                        self.consider_vacuity)
-                    constraint_satisfaction = ConstraintChecker().constraint_checking_with_support(constraint,
-                                                                                                   self.event_log,
-                                                                                                   self.consider_vacuity,
-                                                                                                   self.min_support)
-                    if constraint_satisfaction:
-                        self.process_model.constraints.append(constraint.copy())
-                    # constraint['activities'] = ', '.join(reversed(list(item_set)))
-
-                    constraint['activities'] = list(reversed(list(item_set)))
-                    # self.basic_discovery_results,= self.discover_constraint(self.event_log, constraint,
-                    #                                                        self.consider_vacuity)
-                    constraint_satisfaction = ConstraintChecker().constraint_checking_with_support(constraint,
-                                                                                                   self.event_log,
-                                                                                                   self.consider_vacuity,
-                                                                                                   self.min_support)
-                    if constraint_satisfaction:
-                        self.process_model.constraints.append(constraint.copy())
+                    if supported[template.templ_str]:
+                        self.process_model.constraints.append({"template": template, "activities": list(activities),
+                                                               "condition": ("", "")})
+                    if reversed_supported[template.templ_str]:
+                        self.process_model.constraints.append({"template": template,
+                                                               "activities": list(reversed_activities),
+                                                               "condition": ("", "")})
+        if self.remove_redundant:
+            self.process_model.constraints = self.get_non_redundant_constraints(self.process_model.constraints)
         self.process_model.set_constraints()
         return self.process_model
 
+    def is_supported(self, constraint: dict, support: Optional[float]) -> bool:
+        """
+        Tells whether a candidate constraint reaches the minimum support. The support is the one computed by the
+        support engine, if any, otherwise the constraint is checked on the log.
+        """
+        if support is None:
+            return ConstraintChecker().constraint_checking_with_support(constraint, self.event_log,
+                                                                        self.consider_vacuity, self.min_support)
+        # A constraint satisfied by no trace is never discovered, even with a min. support of 0
+        return support > 0 and support >= self.min_support
+
+    def check_binary_templates(self, activities: List[str], supports: Dict[str, float]) -> Dict[str, bool]:
+        """
+        Tells which binary templates reach the minimum support on the given activities. The templates are checked from
+        the weakest to the strongest ones and a template is skipped when a template it is subsumed by has already
+        failed.
+        """
+        supported = {}
+        templates = sorted(DeclareModelTemplate.get_binary_not_shortcut_templates(), key=_get_subsumption_depth)
+        for template in templates:
+            weaker = WEAKER_TEMPLATES.get(template.templ_str)
+            if weaker is not None and not supported.get(weaker, True):
+                supported[template.templ_str] = False
+                continue
+            constraint = {"template": template, "activities": activities, "condition": ("", "")}
+            supported[template.templ_str] = self.is_supported(constraint, supports.get(template.templ_str))
+        return supported
+
+    @staticmethod
+    def get_non_redundant_constraints(constraints: List[dict]) -> List[dict]:
+        """
+        Removes the constraints implied by a stronger constraint of the list on the same activities, i.e. a constraint
+        whose template is subsumed by another template or an Existence(n) when Existence(n + 1) is in the list.
+        """
+        def get_key(templ_str: str, activities: List[str], n: Optional[int]) -> Tuple[str, Tuple[str, ...], Optional[int]]:
+            return templ_str, tuple(activities), n
+
+        keys = {get_key(constraint['template'].templ_str, constraint['activities'], constraint.get('n'))
+                for constraint in constraints}
+        implied = set()
+        for templ_str, activities, n in keys:
+            if templ_str in WEAKER_TEMPLATES:
+                implied.add(get_key(WEAKER_TEMPLATES[templ_str], activities, n))
+            elif templ_str == DeclareModelTemplate.EXISTENCE.templ_str and n is not None and n > 1:
+                implied.add(get_key(templ_str, activities, n - 1))
+        return [constraint for constraint in constraints
+                if get_key(constraint['template'].templ_str, constraint['activities'], constraint.get('n'))
+                not in implied]
+
     """
     def filter_discovery(self, min_support: float = 0, output_path: str = None) \
             -> Dict[str: Dict[Tuple[int, str]: CheckerResult]]:
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas
+
+from Declare4Py.D4PyEventLog import D4PyEventLog
+from Declare4Py.ProcessMiningTasks.AbstractMonitoring import AbstractMonitoring
+from Declare4Py.ProcessModels.DeclareModel import DeclareModel
+from Declare4Py.Utils.Declare.FusedChecker import FusedConstraintChecker, IncrementalTemplateChecker
+from Declare4Py.Utils.Declare.TraceStates import TraceState
+
+"""
+Online conformance checking of the running cases of a process against a MP-Declare model. Each case keeps an
+incremental checker per constraint, fed with the events of the case as they arrive, and the monitor reports the
+changes of the state of the constraints (e.g. from POSSIBLY_SATISFIED to VIOLATED) as soon as they happen.
+"""
+
+class StateTransition:
+    """
+    Change of the state of a constraint on a running case.
+
+    Parameters
+    ----------
+    case_id: the id of the case
+    event_index: the position in the case of the event causing the change, None when the change is caused by the
+        completion of the case
+    constraint_index: the position of the constraint in the model
+    old_state: the state before the change, None before the first event of the case
+    new_state: the state after the change, None when the conditions of the constraint are not properly formatted
+    """
+
+    def __init__(self, case_id: Any, event_index: Optional[int], constraint_index: int,
+                 old_state: Optional[TraceState], new_state: Optional[TraceState]):
+        self.case_id = case_id
+        self.event_index = event_index
+        self.constraint_index = constraint_index
+        self.old_state = old_state
+        self.new_state = new_state
+
+
+class _RunningCase:
+    """
+    The events of a running case, the incremental checkers of the constraints on them and the last states.
+    """
+
+    def __init__(self, checkers: List[Optional[IncrementalTemplateChecker]]):
+        self.trace: List[dict] = []
+        self.checkers: List[Optional[IncrementalTemplateChecker]] = []
+        for checker in checkers:
+            if checker is not None:
+                checker = checker.clone()
+                checker.reset(self.trace)
+            self.checkers.append(checker)
+        self.states: List[Optional[TraceState]] = [None] * len(checkers)
+
+
+class MPDeclareMonitor(AbstractMonitoring):
+    """
+    Monitors running cases against a MP-Declare model. Events are fed one at a time with process_event, which
+    advances only the checkers of the constraints the event can affect and returns the resulting state transitions.
+    The states on a running case are the ones of the checkers of TemplateConstraintChecker with completed=False, and
+    complete_case gives the final ones. Besides the constraints mentioning the activity of the event, only the
+    positional ones (Init, End and the chain response and chain succession templates) are updated, each in constant
+    time. The constraints whose conditions cannot be parsed are checked again on the whole case at every event.
+
+    Parameters
+    ----------
+    declare_model: the MP-Declare model
+    consider_vacuity: True means that vacuously satisfied traces are considered as satisfied, violated otherwise
+    log: the event log replayed by run, None to only monitor the events fed with process_event
+    concept_name: the event attribute with the activity name, by default the activity key of the log
+
+    Example::
+
+        monitor = MPDeclareMonitor(declare_model, consider_vacuity=False)
+        for case_id, event in event_stream:
+            for transition in monitor.process_event(case_id, event):
+                print(transition.case_id, transition.constraint_index, transition.new_state)
+    """
+
+    def __init__(self, declare_model: DeclareModel, consider_vacuity: bool = False, log: D4PyEventLog = None,
+                 concept_name: Optional[str] = None):
+        super().__init__(log, declare_model)
+        self.consider_vacuity: bool = consider_vacuity
+        if concept_name is None:
+            concept_name = log.activity_key if log is not None and log.activity_key is not None else "concept:name"
+        self.concept_name: str = concept_name
+        self.checker: FusedConstraintChecker = FusedConstraintChecker(declare_model, consider_vacuity, concept_name)
+        self.cases: Dict[Any, _RunningCase] = {}
+        self._error_constraints = set()
+
+    def process_event(self, case_id: Any, event: dict) -> List[StateTransition]:
+        """
+        Feeds an event of a running case to the monitor, starting the case at its first event.
+
+        Parameters
+        ----------
+        case_id: the id of the case
+        event: the event, with at least the activity name
+
+        Returns
+        -------
+        the transitions of the states of the constraints caused by the event
+        """
+        case = self.cases.get(case_id)
+        if case is None:
+            case = self.cases[case_id] = _RunningCase(self.checker.checkers)
+        index = len(case.trace)
+        case.trace.append(event)
+        activity = event[self.concept_name]
+        dispatch_constraints = self.checker.dispatch_constraints.get(activity, [])
+        for idx in dispatch_constraints:
+            checker = case.checkers[idx]
+            if checker.failed:
+                continue
+            try:
+                checker.on_event(index, event, activity)
+            except SyntaxError:
+                checker.failed = True
+
+        if index == 0:
+            to_update = range(len(case.checkers))
+        else:
+            to_update = dict.fromkeys(dispatch_constraints + self.checker.positional_constraints)
+        return self._update_states(case_id, case, to_update, index, False)
+
+    def complete_case(self, case_id: Any) -> List[StateTransition]:
+        """
+        Ends a running case, computing the final states of the constraints, and frees its state.
+
+        Parameters
+        ----------
+        case_id: the id of the case
+
+        Returns
+        -------
+        the transitions of the states of the constraints caused by the completion of the case
+        """
+        case = self.cases.pop(case_id, None)
+        if case is None:
+            raise RuntimeError(f"The case {case_id} is not running.")
+        return self._update_states(case_id, case, range(len(case.checkers)), None, True)
+
+    def get_states(self, case_id: Any) -> List[Optional[TraceState]]:
+        """
+        Returns the current state of each constraint of the model on a running case.
+        """
+        case = self.cases.get(case_id)
+        if case is None:
+            raise RuntimeError(f"The case {case_id} is not running.")
+        return list(case.states)
+
+    def run(self) -> pandas.DataFrame:
+        """
+        Replays the traces of the log one at a time, event after event, completing each case at its last event.
+
+        Returns
+        -------
+        DataFrame with a row for each state transition: the case id, the position of the event in the case (NaN
+        for the completion of the case), the constraint, the old and the new state.
+        """
+        if self.event_log is None:
+            raise RuntimeError("You must load the log before monitoring it.")
+        if self.process_model is None:
+            raise RuntimeError("You must load the DECLARE model before monitoring the log.")
+        constraints = self.process_model.serialized_constraints
+        rows = []
+        for trace in self.event_log.iter_traces():
+            case_id = trace.attributes[self.event_log.activity_key]
+            transitions = []
+            for event in trace:
+                transitions += self.process_event(case_id, event)
+            transitions += self.complete_case(case_id)
+            rows += [[case_id, transition.event_index, constraints[transition.constraint_index],
+                      transition.old_state, transition.new_state] for transition in transitions]
+        return pandas.DataFrame(rows, columns=[self.event_log.case_id_key, "event_index", "constraint", "old_state",
+                                               "new_state"])
+
+    def _update_states(self, case_id: Any, case: _RunningCase, to_update: Iterable[int], event_index: Optional[int],
+                       completed: bool) -> List[StateTransition]:
+        transitions = []
+        for idx in to_update:
+            state = self._get_state(case, idx, completed)
+            if state != case.states[idx]:
+                transitions.append(StateTransition(case_id, event_index, idx, case.states[idx], state))
+                case.states[idx] = state
+        return transitions
+
+    def _get_state(self, case: _RunningCase, idx: int, completed: bool) -> Optional[TraceState]:
+        result = self.checker.get_prefix_result(case.trace, idx, completed, case.checkers)
+        if result is None:
+            constraint_str = self.process_model.serialized_constraints[idx]
+            if constraint_str not in self._error_constraints:
+                self._error_constraints.add(constraint_str)
+                print('Condition not properly formatted for constraint "' + constraint_str + '".')
+            return None
+        return result.state
@@ -3,12 +3,21 @@ from __future__ import annotations
 import pdb
 import re
 from abc import ABC
-from typing import Optional
+from math import ceil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pm4py.objects.log.obj import EventLog
+
 from Declare4Py.D4PyEventLog import D4PyEventLog
 from Declare4Py.ProcessMiningTasks.AbstractQueryChecking import AbstractQueryChecking
 from Declare4Py.ProcessMiningTasks.QueryChecking.DeclareResultsBrowser import DeclareResultsBrowser
 from Declare4Py.ProcessModels.DeclareModel import DeclareModel, DeclareModelTemplate
+from Declare4Py.Utils.ColumnarLog import ColumnarLog
 from Declare4Py.Utils.Declare.Checkers import ConstraintChecker
+from Declare4Py.Utils.Declare.FusedChecker import FusedConstraintChecker
+from Declare4Py.Utils.Declare.SupportEngine import DeclareSupportEngine
+from Declare4Py.Utils.Declare.TraceStates import TraceState
 
 """
 Initializes class QueryCheckingResults
@@ -60,6 +69,8 @@ class DeclareQueryChecker(AbstractQueryChecking, ABC):
         self.target_condition: Optional[str] = target_condition if target_condition is not None else ""
         self.time_condition: Optional[str] = time_condition if time_condition is not None else ""
         self.max_declare_cardinality: int = max_declare_cardinality
+        # Built for the couples checked with conditions when the event log has no columnar representation of its own
+        self._columnar_log: Optional[ColumnarLog] = None
 
     def run(self) -> DeclareResultsBrowser:
         """
@@ -157,6 +168,8 @@ class DeclareQueryChecker(AbstractQueryChecking, ABC):
 
         # activity_combos = tuple(filter(lambda c: c[0] != c[1], product(activations_to_check, targets_to_check)))
         query_checker_results = []
+        self._columnar_log = None
+        support_matrices = {}  # filled at the first control-flow template checked in bulk
         for template_str in templates_to_check:
             template_str, cardinality = re.search(r'(^.+?)(\d*$)', template_str).groups()
             template = DeclareModelTemplate.get_template_from_string(template_str)
@@ -167,22 +180,12 @@ class DeclareQueryChecker(AbstractQueryChecking, ABC):
 
             if template.is_binary:
                 constraint['condition'] = (self.activation_condition, self.target_condition, self.time_condition)
-                for couple in activity_combos:
-                    # constraint['activities'] = ', '.join(couple)
-                    constraint['activities'] = couple
-
-                    # constraint_str = self.constraint_checking_with_support(constraint)
-                    constraint_satisfaction = ConstraintChecker().constraint_checking_with_support(constraint,
-                                                                                                   self.event_log,
-                                                                                                   self.consider_vacuity,
-                                                                                                   self.min_support)
+                if self.return_first:  # the couples are checked one at a time, until the first one satisfied
+                    couples_satisfaction = (self.check_couple(constraint, couple) for couple in activity_combos)
+                else:  # the supports of all the couples are computed together, then thresholded
+                    couples_satisfaction = self.check_couples(constraint, activity_combos, support_matrices)
+                for couple, constraint_satisfaction in zip(activity_combos, couples_satisfaction):
                     if constraint_satisfaction:
-                        # res_value = {
-                        #    "template": template_str, "activation": couple[0], "target": couple[1],
-                        #    "activation_condition": self.activation_condition, "target_condition": self.target_condition,
-                        #    "time_condition": self.time_condition
-                        # }
-                        # self.basic_query_checking_results[constraint_str] = res_value
                         query_checker_results.append([template_str, couple[0], couple[1], self.activation_condition,
                                                          self.target_condition, self.time_condition])
                         if self.return_first:
@@ -212,6 +215,81 @@ class DeclareQueryChecker(AbstractQueryChecking, ABC):
 
         return DeclareResultsBrowser(query_checker_results)
 
-
-
-
+    def check_couples(self, constraint: dict, activity_combos: List[Tuple[str, str]],
+                      support_matrices: Dict[str, np.ndarray]) -> List[bool]:
+        """
+        Tells which couples of activities satisfy the binary constraint up to the minimum support. Without data and
+        time conditions, the support matrices of all the templates over the activities of the couples are computed
+        once with a single scan of the log variants (and stored in support_matrices for the following templates).
+        Otherwise, the constraints of all the couples are checked together in a single pass over the log. A single
+        couple is checked as a single constraint.
+        """
+        template = constraint['template']
+        if len(activity_combos) <= 1:
+            return [self.check_couple(constraint, couple) for couple in activity_combos]
+
+        if ConstraintChecker.is_control_flow(constraint) and not self.event_log.is_streaming():
+            activities = list(dict.fromkeys(activity for couple in activity_combos for activity in couple))
+            if not support_matrices:
+                support_engine = DeclareSupportEngine(self.event_log, self.consider_vacuity)
+                support_matrices.update(support_engine.get_support_matrices(activities))
+            support_matrix = support_matrices.get(template.templ_str)
+            if support_matrix is not None:
+                activity_ids = {activity: act_id for act_id, activity in enumerate(activities)}
+                supports = [support_matrix[activity_ids[act_a], activity_ids[act_b]]
+                            for act_a, act_b in activity_combos]
+                # A constraint satisfied by no trace is never returned, even with a min. support of 0
+                return [bool(support > 0 and support >= self.min_support) for support in supports]
+            return [self.check_couple(constraint, couple) for couple in activity_combos]
+
+        model = DeclareModel()
+        for couple in activity_combos:
+            model.constraints.append({"template": template, "activities": couple,
+                                      "condition": constraint['condition']})
+        model.set_constraints()
+        checker = FusedConstraintChecker(model, self.consider_vacuity, self.event_log.activity_key)
+        # The conditions shared by all the couples are evaluated once over the attribute columns of the log
+        checker.set_columnar_log(self.get_columnar_log())
+        log_length = self.event_log.get_length()
+        min_sat = ceil(log_length * self.min_support)
+        sat_ctr = np.zeros(len(activity_combos), dtype=np.int64)
+        decided = np.zeros(len(activity_combos), dtype=bool)
+        satisfied = np.zeros(len(activity_combos), dtype=bool)
+        malformed = np.zeros(len(activity_combos), dtype=bool)
+        # Same outcome as checking each couple on its own: a couple is decided as soon as it reaches the minimum
+        # support, as soon as the remaining traces cannot make it reach it, or at its first malformed condition
+        for i, trace in enumerate(self.event_log.iter_traces()):
+            states = checker.check_trace_states(trace, i)
+            trace_malformed = np.array([state is None for state in states], dtype=bool) & ~decided
+            malformed |= trace_malformed
+            decided |= trace_malformed
+            sat_ctr += np.array([state == TraceState.SATISFIED for state in states], dtype=bool) & ~decided
+            newly_satisfied = ~decided & (sat_ctr / log_length >= self.min_support) & (sat_ctr > 0)
+            satisfied |= newly_satisfied
+            decided |= newly_satisfied | (log_length - (i + 1) < min_sat - sat_ctr)
+            if decided.all():
+                break
+        for idx in np.flatnonzero(malformed).tolist():
+            print('Condition not properly formatted for constraint "' + model.serialized_constraints[idx] + '".')
+        return satisfied.tolist()
+
+    def get_columnar_log(self) -> Optional[ColumnarLog]:
+        """
+        Returns the columnar representation of the log the conditions of the couples are evaluated over: the one of
+        the event log when it has already been built, otherwise one built for the queries of this checker, which is
+        not stored in the event log. None for streamed logs and for logs not in EventLog format.
+        """
+        if self.event_log.columnar_log is not None:
+            return self.event_log.columnar_log
+        if self._columnar_log is None:
+            if self.event_log.is_streaming() or not isinstance(self.event_log.get_log(), EventLog):
+                return None
+            self._columnar_log = ColumnarLog.from_event_log(self.event_log.get_log(), self.event_log.activity_key,
+                                                            self.event_log.timestamp_key,
+                                                            self.event_log.case_id_key)
+        return self._columnar_log
+
+    def check_couple(self, constraint: dict, couple: Tuple[str, str]) -> bool:
+        constraint = {**constraint, 'activities': couple}
+        return ConstraintChecker().constraint_checking_with_support(constraint, self.event_log, self.consider_vacuity,
+                                                                    self.min_support)
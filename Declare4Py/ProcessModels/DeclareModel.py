@@ -3,9 +3,12 @@ from __future__ import annotations
 import re
 import typing
 from abc import ABC
+from datetime import datetime, timedelta
 from enum import Enum
+from functools import lru_cache
 
 from Declare4Py.ProcessModels.LTLModel import LTLModel
+from Declare4Py.Utils.ColumnarLog import datetime_to_ns
 
 
 #ok
@@ -259,8 +262,7 @@ class DeclareModelConditionParserUtility:
                             else:
                                 py_cond = py_cond + " =="
                             tmp = []
-                            while cond and not (cond.startswith(')') or cond.lower().startswith('and')
-                                                or cond.lower().startswith('or')):
+                            while cond and not (cond.startswith(')') or re.match(r'(and|or)\b', cond, re.I)):
                                 w = re.split(r'[\s()]+', cond)[0]
                                 cond = cond[len(w):].lstrip()
                                 tmp.append(w)
@@ -272,23 +274,21 @@ class DeclareModelConditionParserUtility:
                             py_cond = py_cond + " " + next_word.lower()
                         elif next_word.lower() == "same":
                             tmp = []
-                            while cond and not (cond.startswith(')') or cond.lower().startswith('and')
-                                                or cond.lower().startswith('or')):
+                            while cond and not (cond.startswith(')') or re.match(r'(and|or)\b', cond, re.I)):
                                 w = re.split(r'[\s()]+', cond)[0]
                                 cond = cond[len(w):].lstrip()
                                 tmp.append(w)
                             attr = " ".join(tmp)
-                            py_cond = py_cond + " " + attr + " in A and " + attr + " in T " \
+                            py_cond = py_cond + ' "' + attr + '" in A and "' + attr + '" in T ' \
                                       + 'and A["' + attr + '"] == T["' + attr + '"]'
                         elif next_word.lower() == "different":
                             tmp = []
-                            while cond and not (cond.startswith(')') or cond.lower().startswith('and')
-                                                or cond.lower().startswith('or')):
+                            while cond and not (cond.startswith(')') or re.match(r'(and|or)\b', cond, re.I)):
                                 w = re.split(r'[\s()]+', cond)[0]
                                 cond = cond[len(w):].lstrip()
                                 tmp.append(w)
                             attr = " ".join(tmp)
-                            py_cond = py_cond + " " + attr + " in A and " + attr + " in T " \
+                            py_cond = py_cond + ' "' + attr + '" in A and "' + attr + '" in T ' \
                                       + 'and A["' + attr + '"] != T["' + attr + '"]'
                         elif next_word.lower() == "true":
                             py_cond = py_cond + " True"
@@ -342,6 +342,185 @@ class DeclareModelConditionParserUtility:
         except Exception:
             raise SyntaxError
 
+    def parse_same_attributes(self, cond: str) -> typing.Optional[typing.List[str]]:
+        """
+        Recognizes the correlation conditions made only of a conjunction of 'same' clauses, for which the activations
+        matching a target are the ones with the same values of the attributes.
+        Parameters
+        ----------
+        cond: str
+            correlation condition
+
+        Returns
+        -------
+            the attributes of the 'same' clauses, or None if the condition has a different shape
+        """
+        attributes = _parse_same_attributes(cond)
+        return list(attributes) if attributes is not None else None
+
+    def compile_data_cond(self, cond: str) -> CompiledCondition:
+        """
+        Parse the data condition and compile it into a predicate. The result is cached, so each distinct condition is
+        parsed and compiled only once.
+        Parameters
+        ----------
+        cond: str
+            Could be activation or target condition
+
+        Returns
+        -------
+            CompiledCondition
+        """
+        return _compile_data_cond(cond)
+
+    def compile_time_cond(self, condition: str) -> CompiledCondition:
+        """
+        Parse the time condition and compile it into a predicate with the time bounds already computed. The result is
+        cached, so each distinct condition is parsed and compiled only once.
+        Parameters
+        ----------
+        condition: str
+        Returns
+        -------
+        CompiledCondition
+        """
+        return _compile_time_cond(condition)
+
+
+_CONDITION_GLOBALS = {'__builtins__': None, 'timedelta': timedelta, 'abs': abs, 'float': float}
+
+
+class CompiledCondition:
+    """
+    Predicate compiled from the python source of a data or time condition. It is called with the activation event A
+    and, for correlation and time conditions, the target event T. A source that cannot be compiled raises SyntaxError
+    when the predicate is called, as evaluating the source text would.
+
+    Parameters
+    ----------
+    source: str
+        python expression over A and T
+    constants: dict
+        additional names available to the expression
+    """
+
+    def __init__(self, source: str, constants: typing.Optional[dict] = None):
+        self.source: str = source
+        self.constants: dict = constants or {}
+        self.always_true: bool = source == "True"
+        self.well_formed: bool = True
+        try:
+            self.predicate = eval("lambda A, T=None: " + source, {**_CONDITION_GLOBALS, **self.constants})
+        except SyntaxError:
+            self.predicate = self._raise_syntax_error
+            self.well_formed = False
+
+    def __call__(self, A: dict, T: typing.Optional[dict] = None) -> bool:
+        return self.predicate(A, T)
+
+    def __reduce__(self):
+        return CompiledCondition, (self.source, self.constants)
+
+    @staticmethod
+    def _raise_syntax_error(A, T=None):
+        raise SyntaxError
+
+
+class CompiledTimeCondition(CompiledCondition):
+    """
+    Time condition whose bounds on the distance between the timestamps of A and T are known, both as timedeltas and
+    as integer nanoseconds. The timestamps can then be compared as integers (e.g. the int64 timestamp column of a
+    columnar log) and, the events being sorted by timestamp, the ones within the bounds from an event can be found by
+    binary search instead of testing each of them.
+
+    Parameters
+    ----------
+    min_td: timedelta
+        minimum distance between the timestamps
+    max_td: timedelta
+        maximum distance between the timestamps
+    """
+
+    TIMESTAMP_KEY = "time:timestamp"
+
+    def __init__(self, min_td: timedelta, max_td: timedelta):
+        super().__init__('min_td <= abs(A["time:timestamp"] - T["time:timestamp"]) <= max_td',
+                         {'min_td': min_td, 'max_td': max_td})
+        self.min_ns: int = _timedelta_to_ns(min_td)
+        self.max_ns: int = _timedelta_to_ns(max_td)
+
+    def __reduce__(self):
+        return CompiledTimeCondition, (self.constants['min_td'], self.constants['max_td'])
+
+    def match_ns(self, a_ns: int, t_ns: int) -> bool:
+        """
+        Tells whether the timestamps of A and T, as integer nanoseconds, satisfy the condition.
+        """
+        return self.min_ns <= abs(a_ns - t_ns) <= self.max_ns
+
+    def get_windows(self, t_ns: int) -> typing.List[typing.Tuple[int, int]]:
+        """
+        Returns the disjoint closed intervals of the timestamps, as integer nanoseconds, satisfying the condition
+        with the timestamp t_ns.
+        """
+        if self.min_ns > self.max_ns:
+            return []
+        if self.min_ns <= 0:
+            return [(t_ns - self.max_ns, t_ns + self.max_ns)]
+        return [(t_ns - self.max_ns, t_ns - self.min_ns), (t_ns + self.min_ns, t_ns + self.max_ns)]
+
+    @staticmethod
+    def get_timestamp(event: dict) -> typing.Optional[int]:
+        """
+        Returns the timestamp of the event as integer nanoseconds since the epoch (naive datetimes taken as UTC), None
+        if the event has no datetime timestamp.
+        """
+        value = event.get(CompiledTimeCondition.TIMESTAMP_KEY)
+        if not isinstance(value, datetime):
+            return None
+        return datetime_to_ns(value)
+
+
+def _timedelta_to_ns(td: timedelta) -> int:
+    ns = getattr(td, 'value', None)  # pandas.Timedelta already stores nanoseconds
+    if isinstance(ns, int):
+        return ns
+    return (td.days * 86400 + td.seconds) * 1_000_000_000 + td.microseconds * 1000
+
+
+@lru_cache(maxsize=1024)
+def _compile_data_cond(cond: str) -> CompiledCondition:
+    return CompiledCondition(DeclareModelConditionParserUtility().parse_data_cond(cond))
+
+
+@lru_cache(maxsize=1024)
+def _compile_time_cond(condition: str) -> CompiledCondition:
+    source = DeclareModelConditionParserUtility().parse_time_cond(condition)
+    if source == "True":
+        return CompiledCondition(source)
+    try:
+        min_td_src, max_td_src = source.split(' <= abs(A["time:timestamp"] - T["time:timestamp"]) <= ')
+        min_td = eval(min_td_src, _CONDITION_GLOBALS)
+        max_td = eval(max_td_src, _CONDITION_GLOBALS)
+    except Exception:
+        # Malformed bounds are reported when the condition is evaluated
+        return CompiledCondition(source)
+    if not isinstance(min_td, timedelta) or not isinstance(max_td, timedelta):
+        return CompiledCondition('min_td <= abs(A["time:timestamp"] - T["time:timestamp"]) <= max_td',
+                                 {'min_td': min_td, 'max_td': max_td})
+    return CompiledTimeCondition(min_td, max_td)
+
+
+@lru_cache(maxsize=1024)
+def _parse_same_attributes(cond: str) -> typing.Optional[typing.Tuple[str, ...]]:
+    attributes = []
+    for clause in re.split(r'\s+and\s+', cond.strip(), flags=re.I):
+        match = re.fullmatch(r'same\s+(.+)', clause.strip(), flags=re.I)
+        if match is None or re.search(r'[()]|\bor\b', match.group(1), flags=re.I):
+            return None
+        attributes.append(match.group(1))
+    return tuple(attributes)
+
 
 #ok
 class DeclareModelEvent:
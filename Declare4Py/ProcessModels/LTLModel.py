@@ -1,11 +1,11 @@
 from abc import ABC
 
-from logaut import ltl2dfa
-
 from Declare4Py.ProcessModels.AbstractModel import ProcessModel
 from pylogics.parsers import parse_ltl
 from Declare4Py.Utils.utils import Utils
-from typing import List
+from Declare4Py.Utils.DFACache import DFA_CACHE, DFACache
+from typing import List, Optional
+from pythomata.impl.symbolic import SymbolicDFA
 
 
 class LTLModel(ProcessModel, ABC):
@@ -132,6 +132,26 @@ class LTLModel(ProcessModel, ABC):
         self.formula = f"({self.formula}) U ({new_formula})"
         self.parsed_formula = parse_ltl(self.formula)
 
+    def to_dfa(self, minimize_automaton: bool = True, cache: Optional[DFACache] = None) -> SymbolicDFA:
+        """
+        Returns the automaton of the parsed formula of the LTLModel object. The automaton is built only the first time,
+        then it is taken from the cache.
+        Args:
+            minimize_automaton: If the automaton should be minimized
+            cache: the cache of the automata, the shared one if None
+
+        Returns:
+            SymbolicDFA: the automaton of the formula
+
+        """
+        if self.parsed_formula is None:
+            raise RuntimeError("You must load the LTL model before checking the model.")
+        if self.backend not in ["lydia", "ltlf2dfa"]:
+            raise RuntimeError("Only lydia and ltlf2dfa are supported backends.")
+        if cache is None:
+            cache = DFA_CACHE
+        return cache.get_dfa(self.parsed_formula, self.backend, minimize_automaton)
+
     def check_satisfiability(self, minimize_automaton: bool = True) -> bool:
         """
         Checks satisfiability of the automata built on the parsed formula of the LTLModel object.
@@ -146,9 +166,7 @@ class LTLModel(ProcessModel, ABC):
             raise RuntimeError("You must load the LTL model before checking the model.")
         if self.backend not in ["lydia", "ltlf2dfa"]:
             raise RuntimeError("Only lydia and ltlf2dfa are supported backends.")
-        dfa = ltl2dfa(self.parsed_formula, backend=self.backend)
-        if minimize_automaton:
-            dfa = dfa.minimize()
+        dfa = self.to_dfa(minimize_automaton)
         if len(dfa.accepting_states) > 0:
             return True
         else:
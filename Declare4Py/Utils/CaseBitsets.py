@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Number of set bits of each byte value
+_POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype=np.int64)
+
+
+class CaseBitsets:
+    """
+    Sets of cases containing each item (e.g. an activity) of a log, stored as packed bitsets so that the support of an
+    item set is the popcount of the intersection of the bitsets of its items.
+
+    Attributes:
+        items: the names of the items.
+        bits: uint8 matrix with a row for each item, holding the packed bitset of the cases the item occurs in.
+        n_cases: the number of cases of the log.
+    """
+
+    def __init__(self, items: List[str], bits: np.ndarray, n_cases: int):
+        self.items: List[str] = items
+        self.bits: np.ndarray = bits
+        self.n_cases: int = n_cases
+
+    @classmethod
+    def from_occurrences(cls, items: List[str], item_ids: np.ndarray, case_ids: np.ndarray,
+                         n_cases: int) -> CaseBitsets:
+        """
+        Builds the bitsets from the occurrences of the items, given as the parallel arrays of the item ids and of the
+        positions of the cases they occur in.
+        """
+        bits = np.zeros((len(items), (n_cases + 7) // 8), dtype=np.uint8)
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        case_ids = np.asarray(case_ids, dtype=np.int64)
+        np.bitwise_or.at(bits, (item_ids, case_ids >> 3), np.left_shift(1, case_ids & 7).astype(np.uint8))
+        return cls(items, bits, n_cases)
+
+    @staticmethod
+    def count(bits: np.ndarray) -> np.ndarray:
+        """
+        Returns the number of cases in each of the given bitsets (the last axis holds the packed bits).
+        """
+        return _POPCOUNT_TABLE[bits].sum(axis=-1)
+
+    def mine_frequent_itemsets(self, min_support: float,
+                               max_length: Optional[int] = None) -> List[Tuple[float, Tuple[int, ...]]]:
+        """
+        Computes level by level the item sets occurring in at least a fraction min_support of the cases. The
+        candidates of a level extend the frequent item sets of the previous one with a frequent item, and the support
+        of all the extensions of an item set is counted at once on the intersected bitsets.
+
+        Args:
+            min_support: the minimum support of the returned item sets.
+            max_length: the maximum length of the returned item sets, None for no limit.
+
+        Returns:
+            the list of (support, ids of the items) of the frequent item sets, by length and by decreasing support.
+        """
+        if self.n_cases == 0:
+            return []
+
+        def is_frequent(num_cases: int) -> bool:
+            return num_cases > 0 and num_cases / self.n_cases >= min_support
+
+        counts = self.count(self.bits).tolist()
+        frequent_items = [item_id for item_id, num_cases in enumerate(counts) if is_frequent(num_cases)]
+        level = [((item_id,), self.bits[item_id], counts[item_id]) for item_id in frequent_items]
+        frequent_itemsets = []
+        length = 1
+        while level:
+            level.sort(key=lambda entry: -entry[2])
+            frequent_itemsets += [(num_cases / self.n_cases, itemset) for itemset, _, num_cases in level]
+            if max_length is not None and length >= max_length:
+                break
+            level_itemsets = {itemset for itemset, _, _ in level}
+            next_level = []
+            for itemset, bits, _ in level:
+                # Join with the item sets of the level sharing all the items but the last one
+                extensions = [item_id for item_id in frequent_items
+                              if item_id > itemset[-1] and itemset[:-1] + (item_id,) in level_itemsets]
+                if not extensions:
+                    continue
+                extension_bits = bits & self.bits[extensions]
+                for item_id, ext_bits, num_cases in zip(extensions, extension_bits,
+                                                        self.count(extension_bits).tolist()):
+                    if is_frequent(num_cases):
+                        next_level.append((itemset + (item_id,), ext_bits, num_cases))
+            level = next_level
+            length += 1
+        return frequent_itemsets
@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import pickle
+from datetime import datetime, timedelta, timezone
+from numbers import Integral, Real
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+import pandas as pd
+from pm4py.objects.log.obj import EventLog, Trace, Event
+
+NAT_NS = np.iinfo(np.int64).min  # sentinel for missing timestamps, same bit pattern as numpy.datetime64('NaT')
+_EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+NAIVE_OFFSET = np.iinfo(np.int32).min  # UTC offset of the naive datetimes
+CASE_PREFIX = "case:"  # prefix of the trace attributes in the pm4py dataframes
+_JSON_TYPES = (str, int, float, bool, type(None))  # the types that are the same after a JSON round-trip
+
+
+def datetime_to_ns(value: datetime) -> int:
+    """
+    Converts a (pandas or python) datetime into integer nanoseconds since the Unix epoch. Naive datetimes are
+    interpreted as UTC.
+
+    Args:
+        value: the datetime to convert.
+
+    Returns:
+        the number of nanoseconds elapsed since 1970-01-01 UTC.
+    """
+    ns = getattr(value, 'value', None)  # pandas.Timestamp already stores UTC nanoseconds
+    if isinstance(ns, int):
+        return ns
+    delta = value - (_EPOCH_AWARE if value.tzinfo is not None else _EPOCH_NAIVE)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+
+def ns_to_datetime(value: int, utc_offset: int = 0, as_pandas: bool = False) -> datetime:
+    """
+    Converts integer nanoseconds since the Unix epoch into a datetime, by default a timezone-aware (UTC) python
+    datetime.
+
+    Args:
+        value: the number of nanoseconds elapsed since 1970-01-01 UTC.
+        utc_offset: the UTC offset of the datetime in seconds, NAIVE_OFFSET for a naive datetime.
+        as_pandas: if True, a pandas.Timestamp is returned.
+    """
+    tz = None if utc_offset == NAIVE_OFFSET else timezone.utc
+    if as_pandas:
+        dt = pd.Timestamp(value, tz=tz)
+    else:
+        dt = datetime.fromtimestamp(value // 1_000_000_000, tz=timezone.utc).replace(
+            microsecond=(value % 1_000_000_000) // 1000, tzinfo=tz)
+    if tz is not None and utc_offset != 0:
+        dt = dt.astimezone(timezone(timedelta(seconds=utc_offset)))
+    return dt
+
+
+def get_utc_offsets(size: int, rows: List[int], raw_values: List[datetime]) -> Optional[np.ndarray]:
+    """
+    Returns the int32 array with the UTC offset in seconds of the datetimes at the given rows (NAIVE_OFFSET for the
+    naive ones), None if they are all in UTC.
+    """
+    offsets = [NAIVE_OFFSET if v.utcoffset() is None else int(v.utcoffset().total_seconds()) for v in raw_values]
+    if not any(offsets):
+        return None
+    utc_offsets = np.zeros(size, dtype=np.int32)
+    utc_offsets[rows] = offsets
+    return utc_offsets
+
+
+def _save_values(path: str, name: str, values: List[Any]) -> Any:
+    """
+    Returns the values as they are stored in the JSON metadata: the list itself when JSON keeps their types,
+    otherwise the name of the file they are pickled into.
+    """
+    if all(type(v) in _JSON_TYPES for v in values):
+        return values
+    file_name = f"{name}.pkl"
+    with open(os.path.join(path, file_name), "wb") as f:
+        pickle.dump(values, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return {"file": file_name}
+
+
+def _load_values(path: str, stored: Any) -> Any:
+    if isinstance(stored, dict):
+        with open(os.path.join(path, stored["file"]), "rb") as f:
+            return pickle.load(f)
+    return stored
+
+
+def _is_nan(value: Any) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _category_key(value: Any) -> Optional[tuple]:
+    """
+    Returns a hashable key telling apart the distinct values of a categorical column, also for the lists and dicts
+    pm4py parses XES list and container attributes into, None if the value cannot be keyed. The type is part of the
+    key, so that e.g. True and 1 are distinct categories.
+    """
+    if isinstance(value, (list, tuple)):
+        items = tuple(_category_key(item) for item in value)
+        return None if None in items else (type(value), items)
+    if isinstance(value, dict):
+        items = tuple((_category_key(key), _category_key(item)) for key, item in value.items())
+        return None if any(None in item for item in items) else (type(value), items)
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return type(value), value
+
+
+class AttributeColumn:
+    """
+    Typed column holding the values of a single attribute along the events (or traces) of a log.
+
+    Attributes:
+        kind: one among 'int', 'float', 'datetime' and 'categorical'.
+        values: NumPy array with one entry per row. Datetimes are stored as int64 nanoseconds, categorical values as
+            int32 codes pointing into 'categories' (-1 when the attribute is missing).
+        mask: boolean NumPy array, True where the row actually has the attribute.
+        categories: the distinct raw values of a categorical column, None otherwise.
+        utc_offsets: int32 NumPy array with the UTC offset in seconds of the values of a datetime column (NAIVE_OFFSET
+            for naive datetimes), None if they are all in UTC or the column is not a datetime one.
+        as_pandas: True if the values of a datetime column are pandas Timestamps.
+    """
+
+    INT = "int"
+    FLOAT = "float"
+    DATETIME = "datetime"
+    CATEGORICAL = "categorical"
+
+    def __init__(self, kind: str, values: np.ndarray, mask: np.ndarray, categories: Optional[List[Any]] = None,
+                 utc_offsets: Optional[np.ndarray] = None, as_pandas: bool = False):
+        self.kind: str = kind
+        self.values: np.ndarray = values
+        self.mask: np.ndarray = mask
+        self.categories: Optional[List[Any]] = categories
+        self.utc_offsets: Optional[np.ndarray] = utc_offsets
+        self.as_pandas: bool = as_pandas
+
+    @classmethod
+    def from_values(cls, size: int, rows: List[int], raw_values: List[Any]) -> AttributeColumn:
+        """
+        Builds a column of 'size' rows by inferring its type from the raw values observed at the given rows. Values
+        of any other type, including unhashable ones, make a categorical column.
+        """
+        mask = np.zeros(size, dtype=bool)
+        mask[rows] = True
+        if all(isinstance(v, Real) and not isinstance(v, bool) for v in raw_values):
+            if all(isinstance(v, Integral) for v in raw_values):
+                values = np.zeros(size, dtype=np.int64)
+                values[rows] = raw_values
+                return cls(cls.INT, values, mask)
+            values = np.full(size, np.nan, dtype=np.float64)
+            values[rows] = raw_values
+            return cls(cls.FLOAT, values, mask)
+        if all(isinstance(v, datetime) for v in raw_values):
+            values = np.full(size, NAT_NS, dtype=np.int64)
+            values[rows] = [datetime_to_ns(v) for v in raw_values]
+            return cls(cls.DATETIME, values, mask, utc_offsets=get_utc_offsets(size, rows, raw_values),
+                       as_pandas=all(isinstance(v, pd.Timestamp) for v in raw_values))
+        categories: List[Any] = []
+        codes: Dict[Any, int] = {}
+        nan_code = None
+        encoded = []
+        for v in raw_values:
+            if _is_nan(v):  # NaN objects never compare equal, keep a single category for all of them
+                if nan_code is None:
+                    nan_code = len(categories)
+                    categories.append(v)
+                encoded.append(nan_code)
+                continue
+            key = _category_key(v)
+            code = codes.get(key) if key is not None else None
+            if code is None:
+                code = len(categories)
+                categories.append(v)
+                if key is not None:  # values that cannot be keyed get a category each
+                    codes[key] = code
+            encoded.append(code)
+        values = np.full(size, -1, dtype=np.int32)
+        values[rows] = encoded
+        return cls(cls.CATEGORICAL, values, mask, categories)
+
+    def get_value(self, row: int) -> Any:
+        """
+        Returns the raw value of the column at the given row, None if the attribute is missing.
+        """
+        if not self.mask[row]:
+            return None
+        if self.kind == AttributeColumn.CATEGORICAL:
+            return self.categories[self.values[row]]
+        if self.kind == AttributeColumn.DATETIME:
+            utc_offset = int(self.utc_offsets[row]) if self.utc_offsets is not None else 0
+            return ns_to_datetime(int(self.values[row]), utc_offset, self.as_pandas)
+        return self.values[row].item()
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ColumnarLog:
+    """
+    Integer-encoded, column oriented representation of an event log. Events of all the traces are stored contiguously
+    and the events of the i-th trace are the rows in [trace_offsets[i], trace_offsets[i + 1]).
+
+    Attributes:
+        activity_key: the event attribute containing the activity names.
+        timestamp_key: the event attribute containing the timestamps.
+        case_id_key: the case identifier, as the key of the pm4py dataframes (e.g. case:concept:name).
+        activities: the distinct activity names, the position of a name in the list is its activity ID.
+        activity_index: inverse mapping of 'activities', from activity names to activity IDs.
+        activity_ids: int32 array with the activity ID of each event.
+        trace_offsets: int64 array of n_traces + 1 entries with the position of the first event of each trace.
+        timestamps: int64 array with the timestamp of each event in nanoseconds (NAT_NS when missing).
+        timestamp_utc_offsets: int32 array with the UTC offset in seconds of the timestamp of each event (NAIVE_OFFSET
+            for naive datetimes), None if they are all in UTC.
+        pandas_timestamps: True if the timestamps are pandas Timestamps.
+        case_ids: the name of each trace.
+        attributes: typed columns of the remaining event attributes.
+        trace_attributes: typed columns of the trace attributes.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, activity_key: str = "concept:name", timestamp_key: str = "time:timestamp",
+                 case_id_key: str = "case:concept:name"):
+        self.activity_key: str = activity_key
+        self.timestamp_key: str = timestamp_key
+        self.case_id_key: str = case_id_key
+        self.activities: List[str] = []
+        self.activity_index: Dict[str, int] = {}
+        self.activity_ids: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.trace_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.timestamps: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.timestamp_utc_offsets: Optional[np.ndarray] = None
+        self.pandas_timestamps: bool = False
+        self.case_ids: List[str] = []
+        self.attributes: Dict[str, AttributeColumn] = {}
+        self.trace_attributes: Dict[str, AttributeColumn] = {}
+
+    @classmethod
+    def from_event_log(cls, log: EventLog, activity_key: str = "concept:name", timestamp_key: str = "time:timestamp",
+                       case_id_key: str = "case:concept:name") -> ColumnarLog:
+        """
+        Encodes a pm4py EventLog with a single pass over its events.
+
+        Args:
+            log: the pm4py EventLog to encode.
+            activity_key: the event attribute containing the activity names.
+            timestamp_key: the event attribute containing the timestamps.
+            case_id_key: the case identifier, as the key of the pm4py dataframes. In the EventLog it is the trace
+                attribute without the case: prefix.
+
+        Returns:
+            the columnar representation of the log.
+        """
+        col_log = cls(activity_key, timestamp_key, case_id_key)
+        trace_id_key = case_id_key[len(CASE_PREFIX):] if case_id_key.startswith(CASE_PREFIX) else case_id_key
+        activity_index = col_log.activity_index
+        activities = col_log.activities
+        activity_ids: List[int] = []
+        timestamps: List[int] = []
+        timestamp_rows: List[int] = []
+        timestamp_values: List[datetime] = []
+        offsets: List[int] = [0]
+        event_attrs: Dict[str, tuple] = {}
+        trace_attrs: Dict[str, tuple] = {}
+        row = 0
+        for trace_idx, trace in enumerate(log):
+            col_log.case_ids.append(trace.attributes.get(trace_id_key))
+            for key, value in trace.attributes.items():
+                rows, raw_values = trace_attrs.setdefault(key, ([], []))
+                rows.append(trace_idx)
+                raw_values.append(value)
+            for event in trace:
+                activity = event.get(activity_key)
+                act_id = activity_index.get(activity)
+                if act_id is None:
+                    act_id = activity_index[activity] = len(activities)
+                    activities.append(activity)
+                activity_ids.append(act_id)
+                timestamp = event.get(timestamp_key)
+                if isinstance(timestamp, datetime):
+                    timestamps.append(datetime_to_ns(timestamp))
+                    timestamp_rows.append(row)
+                    timestamp_values.append(timestamp)
+                else:
+                    timestamps.append(NAT_NS)
+                for key, value in event.items():
+                    if key == activity_key or key == timestamp_key:
+                        continue
+                    rows, raw_values = event_attrs.setdefault(key, ([], []))
+                    rows.append(row)
+                    raw_values.append(value)
+                row += 1
+            offsets.append(row)
+
+        col_log.activity_ids = np.asarray(activity_ids, dtype=np.int32)
+        col_log.timestamps = np.asarray(timestamps, dtype=np.int64)
+        col_log.timestamp_utc_offsets = get_utc_offsets(row, timestamp_rows, timestamp_values)
+        col_log.pandas_timestamps = len(timestamp_values) > 0 and all(isinstance(timestamp, pd.Timestamp)
+                                                                      for timestamp in timestamp_values)
+        col_log.trace_offsets = np.asarray(offsets, dtype=np.int64)
+        for key, (rows, raw_values) in event_attrs.items():
+            col_log.attributes[key] = AttributeColumn.from_values(row, rows, raw_values)
+        for key, (rows, raw_values) in trace_attrs.items():
+            col_log.trace_attributes[key] = AttributeColumn.from_values(len(col_log.case_ids), rows, raw_values)
+        return col_log
+
+    @property
+    def n_traces(self) -> int:
+        return len(self.trace_offsets) - 1
+
+    @property
+    def n_events(self) -> int:
+        return len(self.activity_ids)
+
+    def __len__(self):
+        return self.n_traces
+
+    def get_activity_id(self, activity: str) -> int:
+        """
+        Returns the ID of the given activity name, -1 if the activity never occurs in the log.
+        """
+        return self.activity_index.get(activity, -1)
+
+    def get_trace_lengths(self) -> np.ndarray:
+        return np.diff(self.trace_offsets)
+
+    def get_trace_activity_ids(self, trace_id: int) -> np.ndarray:
+        """
+        Returns the slice of 'activity_ids' containing the activity IDs of the events of the given trace.
+        """
+        return self.activity_ids[self.trace_offsets[trace_id]:self.trace_offsets[trace_id + 1]]
+
+    def get_trace_timestamps(self, trace_id: int) -> np.ndarray:
+        return self.timestamps[self.trace_offsets[trace_id]:self.trace_offsets[trace_id + 1]]
+
+    def get_event_trace_ids(self) -> np.ndarray:
+        """
+        Returns an int64 array with, for each event, the position of its trace in the log.
+        """
+        return np.repeat(np.arange(self.n_traces, dtype=np.int64), self.get_trace_lengths())
+
+    def save(self, path: str) -> None:
+        """
+        Stores the columnar log in the 'path' directory: one uncompressed .npy file for each array, so that it can be
+        memory-mapped when loaded, and a JSON file with the vocabularies and the remaining metadata. The vocabularies
+        with values whose type JSON does not keep (e.g. dates or lists) are pickled in their own file instead.
+
+        Args:
+            path: the directory where the log is stored, it is created if it does not exist.
+        """
+        os.makedirs(path, exist_ok=True)
+        meta = {"format_version": ColumnarLog.FORMAT_VERSION, "activity_key": self.activity_key,
+                "timestamp_key": self.timestamp_key, "case_id_key": self.case_id_key,
+                "activities": _save_values(path, "activities", self.activities),
+                "case_ids": _save_values(path, "case_ids", self.case_ids),
+                "timestamp_utc_offsets": self.timestamp_utc_offsets is not None,
+                "pandas_timestamps": self.pandas_timestamps, "attributes": [], "trace_attributes": []}
+        np.save(os.path.join(path, "activity_ids.npy"), self.activity_ids)
+        np.save(os.path.join(path, "trace_offsets.npy"), self.trace_offsets)
+        np.save(os.path.join(path, "timestamps.npy"), self.timestamps)
+        if self.timestamp_utc_offsets is not None:
+            np.save(os.path.join(path, "timestamp_utc_offsets.npy"), self.timestamp_utc_offsets)
+        for meta_key, prefix, columns in (("attributes", "ev", self.attributes),
+                                          ("trace_attributes", "tr", self.trace_attributes)):
+            for idx, (key, col) in enumerate(columns.items()):
+                file_prefix = f"{prefix}{idx}"
+                np.save(os.path.join(path, f"{file_prefix}_values.npy"), col.values)
+                np.save(os.path.join(path, f"{file_prefix}_mask.npy"), col.mask)
+                if col.utc_offsets is not None:
+                    np.save(os.path.join(path, f"{file_prefix}_utc_offsets.npy"), col.utc_offsets)
+                categories = col.categories
+                if categories is not None:
+                    categories = _save_values(path, f"{file_prefix}_categories", categories)
+                meta[meta_key].append({"key": key, "kind": col.kind, "file": file_prefix, "categories": categories,
+                                       "utc_offsets": col.utc_offsets is not None, "as_pandas": col.as_pandas})
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> ColumnarLog:
+        """
+        Loads a columnar log previously stored with 'save'.
+
+        Args:
+            path: the directory where the log is stored.
+            mmap: if True, the arrays are memory-mapped in read-only mode instead of being read in memory.
+
+        Returns:
+            the loaded columnar log.
+        """
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != ColumnarLog.FORMAT_VERSION:
+            raise RuntimeError(f"Unsupported format of the columnar log stored in {path}.")
+        col_log = cls(meta["activity_key"], meta["timestamp_key"], meta["case_id_key"])
+        col_log.activities = _load_values(path, meta["activities"])
+        col_log.activity_index = {act: idx for idx, act in enumerate(col_log.activities)}
+        col_log.case_ids = _load_values(path, meta["case_ids"])
+        col_log.activity_ids = np.load(os.path.join(path, "activity_ids.npy"), mmap_mode=mmap_mode)
+        col_log.trace_offsets = np.load(os.path.join(path, "trace_offsets.npy"), mmap_mode=mmap_mode)
+        col_log.timestamps = np.load(os.path.join(path, "timestamps.npy"), mmap_mode=mmap_mode)
+        if meta["timestamp_utc_offsets"]:
+            col_log.timestamp_utc_offsets = np.load(os.path.join(path, "timestamp_utc_offsets.npy"),
+                                                    mmap_mode=mmap_mode)
+        col_log.pandas_timestamps = meta["pandas_timestamps"]
+        for meta_key, columns in (("attributes", col_log.attributes),
+                                  ("trace_attributes", col_log.trace_attributes)):
+            for col_meta in meta[meta_key]:
+                values = np.load(os.path.join(path, f"{col_meta['file']}_values.npy"), mmap_mode=mmap_mode)
+                mask = np.load(os.path.join(path, f"{col_meta['file']}_mask.npy"), mmap_mode=mmap_mode)
+                utc_offsets = None
+                if col_meta["utc_offsets"]:
+                    utc_offsets = np.load(os.path.join(path, f"{col_meta['file']}_utc_offsets.npy"),
+                                          mmap_mode=mmap_mode)
+                columns[col_meta["key"]] = AttributeColumn(col_meta["kind"], values, mask,
+                                                           _load_values(path, col_meta["categories"]), utc_offsets,
+                                                           col_meta["as_pandas"])
+        return col_log
+
+    def to_event_log(self) -> EventLog:
+        """
+        Decodes the columnar representation back into a pm4py EventLog. Datetimes are restored with their UTC offset
+        and type.
+        """
+        log = EventLog(properties={'pm4py:param:activity_key': self.activity_key,
+                                   'pm4py:param:timestamp_key': self.timestamp_key})
+        event_columns = list(self.attributes.items())
+        trace_columns = list(self.trace_attributes.items())
+        for trace_idx in range(self.n_traces):
+            trace = Trace(attributes={key: col.get_value(trace_idx) for key, col in trace_columns
+                                      if col.mask[trace_idx]})
+            for row in range(self.trace_offsets[trace_idx], self.trace_offsets[trace_idx + 1]):
+                event = Event({self.activity_key: self.activities[self.activity_ids[row]]})
+                if self.timestamps[row] != NAT_NS:
+                    utc_offset = int(self.timestamp_utc_offsets[row]) if self.timestamp_utc_offsets is not None else 0
+                    event[self.timestamp_key] = ns_to_datetime(int(self.timestamps[row]), utc_offset,
+                                                               self.pandas_timestamps)
+                for key, col in event_columns:
+                    if col.mask[row]:
+                        event[key] = col.get_value(row)
+                trace.append(event)
+            log.append(trace)
+        return log
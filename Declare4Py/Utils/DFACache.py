@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Optional
+
+from logaut import ltl2dfa
+from pythomata.impl.symbolic import SymbolicDFA
+
+DEFAULT_MAX_SIZE = 128  # automata kept in memory by the default cache
+
+
+class DFACache:
+    """
+    Cache of the automata of the LTLf formulas. The automata are kept in an in-memory LRU cache and, when a cache
+    directory is given, also pickled on disk so that they are reused across runs (e.g. when the same model is checked
+    against a new log every day).
+    The automata are keyed by the formula, in the normalized form printed by pylogics, the backend and whether they
+    are minimized.
+
+    Attributes:
+        max_size: the maximum number of automata kept in memory.
+        cache_dir: the directory of the on-disk store, None to keep the automata only in memory.
+        hits: the number of automata found in memory or on disk.
+        misses: the number of automata built.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, cache_dir: Optional[str] = None):
+        self.max_size: int = max_size
+        self.cache_dir: Optional[str] = None
+        self._dfas: OrderedDict[str, SymbolicDFA] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.set_cache_dir(cache_dir)
+
+    def set_cache_dir(self, cache_dir: Optional[str]) -> None:
+        """
+        Sets the directory of the on-disk store, creating it if needed. None disables the on-disk store.
+        """
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def get_key(parsed_formula, backend: str, minimize_automaton: bool) -> str:
+        """
+        Returns the key of the automaton of a formula.
+
+        Args:
+            parsed_formula: the formula parsed with pylogics.
+            backend: the backend translating the formula into the automaton.
+            minimize_automaton: whether the automaton is minimized.
+        """
+        content = f"{backend}\n{bool(minimize_automaton)}\n{parsed_formula}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_dfa(self, parsed_formula, backend: str, minimize_automaton: bool = True) -> SymbolicDFA:
+        """
+        Returns the automaton of a formula, building it only if it is neither in memory nor on disk.
+
+        Args:
+            parsed_formula: the formula parsed with pylogics.
+            backend: the backend translating the formula into the automaton, lydia or ltlf2dfa.
+            minimize_automaton: whether the automaton has to be minimized.
+
+        Returns:
+            the automaton of the formula.
+        """
+        key = self.get_key(parsed_formula, backend, minimize_automaton)
+        dfa = self._dfas.get(key)
+        if dfa is not None:
+            self._dfas.move_to_end(key)
+            self.hits += 1
+            return dfa
+        dfa = self._load(key)
+        if dfa is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            dfa = ltl2dfa(parsed_formula, backend=backend)
+            if minimize_automaton:
+                dfa = dfa.minimize()
+            self._store(key, dfa)
+        self._dfas[key] = dfa
+        if len(self._dfas) > self.max_size:
+            self._dfas.popitem(last=False)
+        return dfa
+
+    def clear(self, on_disk: bool = False) -> None:
+        """
+        Empties the in-memory cache and, if on_disk is True, the on-disk store.
+        """
+        self._dfas.clear()
+        if on_disk and self.cache_dir is not None:
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith(".dfa"):
+                    os.remove(os.path.join(self.cache_dir, file_name))
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.dfa")
+
+    def _load(self, key: str) -> Optional[SymbolicDFA]:
+        if self.cache_dir is None or not os.path.exists(self._get_path(key)):
+            return None
+        try:
+            with open(self._get_path(key), "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Unreadable entry (e.g. truncated or written by another version of the libraries): it is rebuilt
+            return None
+
+    def _store(self, key: str, dfa: SymbolicDFA) -> None:
+        if self.cache_dir is None:
+            return
+        # Written to a temporary file and renamed, so that concurrent runs never read a partial automaton
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(dfa, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._get_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+# Cache shared by the LTL models and the LTL conformance checking
+DFA_CACHE = DFACache()
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pythomata.impl.symbolic import SymbolicDFA
+
+from Declare4Py.Utils.utils import Utils
+
+
+def encode_proposition(value: str, attribute: str, backend: str) -> str:
+    """
+    Returns the proposition of the LTLf formulas matched by an event having the given value for the attribute.
+
+    Args:
+        value: the value of the attribute in the event.
+        attribute: the attribute, e.g. concept:name.
+        backend: the backend used to build the automaton, lydia or ltlf2dfa.
+    """
+    symbol = Utils.parse_parenthesis(value)
+    symbol = Utils.encode_attribute_type(attribute) + "_" + symbol
+    symbol = Utils.parse_activity(symbol)
+    if backend == 'lydia':
+        return symbol.lower()
+    return symbol.upper()
+
+
+class DFATable:
+    """
+    Automaton compiled into a dense transition table over a finite alphabet of letters, e.g. the distinct events of a
+    log. The symbolic guards of the automaton are evaluated once for each reachable state and letter, then the traces
+    encoded as arrays of letter ids are run with integer lookups only.
+    The states are the ones reachable from the initial state with the letters of the alphabet, plus a non-accepting
+    dead state when some letter has no successor. As in the symbolic run, a state whose transitions all loop on it
+    is final once reached: it loops on all the letters, even the ones it has no transition for.
+
+    Attributes:
+        letters: the letters of the alphabet, each one as the propositions it makes true.
+        transitions: int64 matrix (states x letters) with the successor of each state for each letter.
+        accepting: bool array with the accepting states.
+        sinks: bool array with the states looping on all the letters of the alphabet. A trace reaching a sink state
+            is accepted iff the sink state is accepting, whatever the next events are.
+        initial_state: the initial state.
+    """
+
+    def __init__(self, letters: List[Dict[str, bool]], transitions: np.ndarray, accepting: np.ndarray,
+                 initial_state: int = 0):
+        self.letters: List[Dict[str, bool]] = letters
+        self.transitions: np.ndarray = transitions
+        self.accepting: np.ndarray = accepting
+        self.sinks: np.ndarray = (transitions == np.arange(len(transitions))[:, None]).all(axis=1)
+        self.initial_state: int = initial_state
+
+    @classmethod
+    def from_dfa(cls, dfa: SymbolicDFA, letters: List[Dict[str, bool]]) -> DFATable:
+        """
+        Compiles the automaton over the given letters.
+
+        Args:
+            dfa: the automaton.
+            letters: the letters of the alphabet, each one as the dictionary of the propositions it makes true.
+        """
+        def is_final(dfa_state) -> bool:
+            return all(successor == dfa_state for successor in dfa._transition_function.get(dfa_state, {}))
+
+        # The initial state is left with the first event even if it is final, in that case it has a separate copy
+        entry_state = object() if is_final(dfa.initial_state) else dfa.initial_state
+        dead_state = object()
+        state_ids = {entry_state: 0}
+        dfa_states = [entry_state]
+        rows = {}
+        to_visit = deque([entry_state])
+
+        def get_state_id(dfa_state) -> int:
+            if dfa_state not in state_ids:
+                state_ids[dfa_state] = len(dfa_states)
+                dfa_states.append(dfa_state)
+                to_visit.append(dfa_state)
+            return state_ids[dfa_state]
+
+        while to_visit:
+            dfa_state = to_visit.popleft()
+            state_id = state_ids[dfa_state]
+            if dfa_state is dead_state or (dfa_state is not entry_state and is_final(dfa_state)):
+                rows[state_id] = [state_id] * len(letters)
+                continue
+            source = dfa.initial_state if dfa_state is entry_state else dfa_state
+            row = []
+            for letter in letters:
+                successors = dfa.get_successors(source, letter)
+                row.append(get_state_id(next(iter(successors)) if successors else dead_state))
+            rows[state_id] = row
+        transitions = np.asarray([rows[state_id] for state_id in range(len(dfa_states))],
+                                 dtype=np.int64).reshape(len(dfa_states), len(letters))
+        accepting = np.array([dfa_state is not dead_state and
+                              dfa.is_accepting(dfa.initial_state if dfa_state is entry_state else dfa_state)
+                              for dfa_state in dfa_states], dtype=bool)
+        return cls(letters, transitions, accepting)
+
+    def run_trace(self, codes: Sequence[int]) -> bool:
+        """
+        Returns whether the automaton accepts the trace encoded as the given letter ids.
+        """
+        transitions, sinks = self.transitions.tolist(), self.sinks.tolist()
+        state = self.initial_state
+        for code in codes:
+            state = transitions[state][code]
+            if sinks[state]:
+                break
+        return bool(self.accepting[state])
+
+    def run_traces(self, codes: np.ndarray, offsets: np.ndarray, trace_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Runs the automaton on many traces at once, advancing all the traces of one event at each step. Traces stop
+        as soon as they are over or they reach a sink state.
+
+        Args:
+            codes: the letter ids of the events of the traces, concatenated trace after trace.
+            offsets: the start of each trace in 'codes', plus a final end offset.
+            trace_ids: the positions of the traces to run, all the traces if None.
+
+        Returns:
+            the bool array telling, for each trace to run, whether the automaton accepts it.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        starts = offsets[:-1]
+        lengths = np.diff(offsets)
+        if trace_ids is not None:
+            starts, lengths = starts[trace_ids], lengths[trace_ids]
+        states = np.full(len(lengths), self.initial_state, dtype=np.int64)
+        active = np.flatnonzero(lengths > 0)
+        step = 0
+        while len(active):
+            states[active] = self.transitions[states[active], codes[starts[active] + step]]
+            step += 1
+            active = active[(lengths[active] > step) & ~self.sinks[states[active]]]
+        return self.accepting[states]
+
+
+class ProductDFATable:
+    """
+    Product of automata compiled over the same letters, whose states are the tuples of the states of the automata.
+    The product is built lazily: a transition is computed the first time a trace takes it, so only the product
+    states reached by the traces are built. A trace accepted by the product is accepted by all the automata, and the
+    outcome of each automaton can be read from the components of the final state.
+
+    Attributes:
+        tables: the automata, compiled over the same letters.
+        components: int64 matrix (states x automata) with the state of each automaton in each product state.
+        transitions: int64 matrix (states x letters) with the successor of each product state for each letter, -1 for
+            the transitions not computed yet.
+        accepting: bool matrix (states x automata) telling which automata accept in each product state.
+        sinks: bool array with the product states whose components are all in sink states.
+        rejecting: bool array with the product states having a component in a non-accepting sink state: the traces
+            reaching them are not accepted by the product, whatever the next events are.
+        initial_state: the initial state.
+    """
+
+    def __init__(self, tables: List[DFATable]):
+        self.tables: List[DFATable] = tables
+        n_letters = len(tables[0].letters) if tables else 0
+        self._state_ids: Dict[tuple, int] = {}
+        self.components: np.ndarray = np.zeros((0, len(tables)), dtype=np.int64)
+        self.transitions: np.ndarray = np.zeros((0, n_letters), dtype=np.int64)
+        self.accepting: np.ndarray = np.zeros((0, len(tables)), dtype=bool)
+        self.sinks: np.ndarray = np.zeros(0, dtype=bool)
+        self.rejecting: np.ndarray = np.zeros(0, dtype=bool)
+        self.initial_state: int = self._get_state_ids(np.array([[table.initial_state for table in tables]],
+                                                               dtype=np.int64))[0]
+
+    def __len__(self):
+        return len(self.components)
+
+    def _get_state_ids(self, components: np.ndarray) -> np.ndarray:
+        state_ids = np.empty(len(components), dtype=np.int64)
+        new_components = []
+        for idx, component in enumerate(map(tuple, components.tolist())):
+            state_id = self._state_ids.get(component)
+            if state_id is None:
+                state_id = self._state_ids[component] = len(self._state_ids)
+                new_components.append(component)
+            state_ids[idx] = state_id
+        if new_components:
+            new_components = np.asarray(new_components, dtype=np.int64).reshape(-1, len(self.tables))
+            accepting = np.stack([table.accepting[new_components[:, idx]] for idx, table in enumerate(self.tables)],
+                                 axis=1).reshape(len(new_components), len(self.tables))
+            sinks = np.stack([table.sinks[new_components[:, idx]] for idx, table in enumerate(self.tables)],
+                             axis=1).reshape(len(new_components), len(self.tables))
+            self.components = np.concatenate((self.components, new_components))
+            self.transitions = np.concatenate((self.transitions, np.full((len(new_components),
+                                                                          self.transitions.shape[1]), -1)))
+            self.accepting = np.concatenate((self.accepting, accepting))
+            self.sinks = np.concatenate((self.sinks, sinks.all(axis=1)))
+            self.rejecting = np.concatenate((self.rejecting, (sinks & ~accepting).any(axis=1)))
+        return state_ids
+
+    def get_successors(self, states: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        Returns the successors of the product states for the letters, computing the missing transitions.
+        """
+        successors = self.transitions[states, codes]
+        missing = successors < 0
+        if missing.any():
+            pairs = np.unique(np.stack((states[missing], codes[missing]), axis=1), axis=0)
+            components = self.components[pairs[:, 0]]
+            next_components = np.stack([table.transitions[components[:, idx], pairs[:, 1]]
+                                        for idx, table in enumerate(self.tables)], axis=1)
+            self.transitions[pairs[:, 0], pairs[:, 1]] = self._get_state_ids(next_components)
+            successors[missing] = self.transitions[states[missing], codes[missing]]
+        return successors
+
+    def run_traces(self, codes: np.ndarray, offsets: np.ndarray, trace_ids: Optional[np.ndarray] = None,
+                   per_automaton: bool = False) -> np.ndarray:
+        """
+        Runs the product on many traces at once, as DFATable.run_traces.
+
+        Args:
+            codes: the letter ids of the events of the traces, concatenated trace after trace.
+            offsets: the start of each trace in 'codes', plus a final end offset.
+            trace_ids: the positions of the traces to run, all the traces if None.
+            per_automaton: if True, the outcome of each automaton is returned. Otherwise, a trace stops as soon as
+                one of the automata can no longer accept it.
+
+        Returns:
+            the bool array telling, for each trace to run, whether all the automata accept it or, if per_automaton
+            is True, the bool matrix (traces x automata) telling which automata accept each trace.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        starts = offsets[:-1]
+        lengths = np.diff(offsets)
+        if trace_ids is not None:
+            starts, lengths = starts[trace_ids], lengths[trace_ids]
+        states = np.full(len(lengths), self.initial_state, dtype=np.int64)
+        active = np.flatnonzero(lengths > 0)
+        step = 0
+        while len(active):
+            states[active] = self.get_successors(states[active], codes[starts[active] + step])
+            step += 1
+            stopped = self.sinks[states[active]]
+            if not per_automaton:
+                stopped |= self.rejecting[states[active]]
+            active = active[(lengths[active] > step) & ~stopped]
+        if per_automaton:
+            return self.accepting[states]
+        return self.accepting[states].all(axis=1)
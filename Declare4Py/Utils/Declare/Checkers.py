@@ -2,21 +2,37 @@ from __future__ import annotations
 
 import pdb
 from abc import ABC
-from datetime import timedelta
 from math import ceil
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from Declare4Py.D4PyEventLog import D4PyEventLog
 from Declare4Py.ProcessModels.DeclareModel import DeclareModel
-from Declare4Py.ProcessModels.DeclareModel import DeclareModelConditionParserUtility, DeclareModelTemplate
+from Declare4Py.ProcessModels.DeclareModel import CompiledCondition, DeclareModelConditionParserUtility, \
+    DeclareModelTemplate
+from Declare4Py.Utils.Declare.Pendings import PendingActivations
 from Declare4Py.Utils.Declare.TraceStates import TraceState
-glob = {'__builtins__': None}
+
+# Templates grouped by the activities deciding their outcome when absent from a trace (see
+# ConstraintChecker.get_absence_outcome), keyed by template name
+ABSENCE_VIOLATED_TEMPLATES = {DeclareModelTemplate.EXISTENCE.templ_str, DeclareModelTemplate.EXACTLY.templ_str,
+                              DeclareModelTemplate.INIT.templ_str, DeclareModelTemplate.END.templ_str}
+CHOICE_TEMPLATES = {DeclareModelTemplate.CHOICE.templ_str, DeclareModelTemplate.EXCLUSIVE_CHOICE.templ_str}
+FIRST_ACTIVATION_TEMPLATES = {
+    DeclareModelTemplate.RESPONDED_EXISTENCE.templ_str, DeclareModelTemplate.RESPONSE.templ_str,
+    DeclareModelTemplate.ALTERNATE_RESPONSE.templ_str, DeclareModelTemplate.CHAIN_RESPONSE.templ_str,
+    DeclareModelTemplate.NOT_RESPONDED_EXISTENCE.templ_str, DeclareModelTemplate.NOT_RESPONSE.templ_str,
+    DeclareModelTemplate.NOT_CHAIN_RESPONSE.templ_str}
+SECOND_ACTIVATION_TEMPLATES = {
+    DeclareModelTemplate.PRECEDENCE.templ_str, DeclareModelTemplate.ALTERNATE_PRECEDENCE.templ_str,
+    DeclareModelTemplate.CHAIN_PRECEDENCE.templ_str, DeclareModelTemplate.NOT_PRECEDENCE.templ_str,
+    DeclareModelTemplate.NOT_CHAIN_PRECEDENCE.templ_str}
+BOTH_ACTIVATION_TEMPLATES = {template.templ_str for template in DeclareModelTemplate.get_shortcut_templates()}
 
 
 class ConstraintChecker:
 
     def check_trace_conformance(self, trace: dict, decl_model: DeclareModel, consider_vacuity: bool = False,
-                                concept_name: str = "concept:name") -> List[CheckerResult]:
+                                concept_name: str = "concept:name", state_only: bool = False) -> List[CheckerResult]:
         """
         Checks whether the constraints are fulfillment, violation, pendings, activations etc
 
@@ -25,6 +41,8 @@ class ConstraintChecker:
         :param bool consider_vacuity: True means that vacuously satisfied traces are considered as satisfied, violated otherwise
         :param d4pyEventLog trace: log
         :param DeclareModel decl_model: Process mining model
+        :param bool state_only: True to only compute the states, leaving the counts to None: each checker stops at the
+            event deciding the state of its constraint
         Args:
             concept_name:
             concept_name:
@@ -45,7 +63,8 @@ class ConstraintChecker:
             rules["time"] = constraint['condition'][-1]  # time condition is always at last position
             try:
                 trace_results.append(TemplateConstraintChecker(trace, True, constraint['activities'], rules,
-                                                               concept_name).get_template(constraint['template'])())
+                                                               concept_name, state_only)
+                                     .get_template(constraint['template'])())
             except SyntaxError:
                 # TODO: use python logger
                 if constraint_str not in error_constraint_set:
@@ -56,7 +75,8 @@ class ConstraintChecker:
     def constraint_checking_with_support(self, constraint: dict, event_log: D4PyEventLog, consider_vacuity: bool,
                                          min_support: float) -> bool:
         """
-        Check wheter a constraint is satisfied in a log up to a given minimum support
+        Check wheter a constraint is satisfied in a log up to a given minimum support. Only the states of the
+        constraint on the traces are computed (see TemplateConstraintChecker's state_only)
         Args:
             consider_vacuity:
             event_log:
@@ -71,9 +91,58 @@ class ConstraintChecker:
         tmp_model.constraints.append(constraint)
         tmp_model.set_constraints()
         sat_ctr = 0
+        log_length = event_log.get_length()
+
+        if self.is_control_flow(constraint) and not event_log.is_streaming():
+            # The outcome only depends on the activity sequence: check a trace per variant and weigh it
+            variant_log = event_log.get_variant_log()
+            traces = event_log.get_log()
+            checked_ctr = 0
+            for trace_idx, count in zip(variant_log.representatives, variant_log.counts.tolist()):
+                trc_res = self.check_trace_conformance(traces[trace_idx], tmp_model, consider_vacuity,
+                                                       event_log.activity_key, state_only=True)
+                checked_ctr += count
+                if trc_res[0].state == TraceState.SATISFIED:
+                    sat_ctr += count
+                    if sat_ctr / log_length >= min_support:
+                        return True
+                if log_length - checked_ctr < ceil(log_length * min_support) - sat_ctr:
+                    return False
+            return False
+
+        absence_outcome = self.get_absence_outcome(constraint, consider_vacuity)
+        if absence_outcome is not None and not event_log.is_streaming():
+            # Only the traces containing the activities are checked, the other ones are resolved in bulk
+            activities, absence_state = absence_outcome
+            absence_satisfied = absence_state == TraceState.SATISFIED
+            traces = event_log.get_log()
+            next_idx = 0
+            for i in event_log.get_posting_index().get_cases_with_any(activities).tolist() + [log_length]:
+                if i > next_idx:
+                    if absence_satisfied:
+                        sat_ctr += i - next_idx
+                        if sat_ctr / log_length >= min_support:
+                            return True
+                    if log_length - i < ceil(log_length * min_support) - sat_ctr:
+                        return False
+                if i == log_length:
+                    break
+                trc_res = self.check_trace_conformance(traces[i], tmp_model, consider_vacuity, event_log.activity_key,
+                                                       state_only=True)
+                if not trc_res:  # Occurring when constraint data conditions are formatted bad
+                    break
+                if trc_res[0].state == TraceState.SATISFIED:
+                    sat_ctr += 1
+                    if sat_ctr / log_length >= min_support:
+                        return True
+                if log_length - (i + 1) < ceil(log_length * min_support) - sat_ctr:
+                    return False
+                next_idx = i + 1
+            return False
 
         for i, trace in enumerate(event_log.get_log()):
-            trc_res = self.check_trace_conformance(trace, tmp_model, consider_vacuity, event_log.activity_key)
+            trc_res = self.check_trace_conformance(trace, tmp_model, consider_vacuity, event_log.activity_key,
+                                                   state_only=True)
             if not trc_res:  # Occurring when constraint data conditions are formatted bad
                 break
             # constraint_str, checker_res = next(iter(trc_res.items()))  # trc_res will always have only one element inside
@@ -81,23 +150,65 @@ class ConstraintChecker:
             if checker_res.state == TraceState.SATISFIED:
                 sat_ctr += 1
                 # If the constraint is already above the minimum support, return it directly
-                if sat_ctr / len(event_log.log) >= min_support:
+                if sat_ctr / log_length >= min_support:
                     return True #constraint_str
             # If there aren't enough more traces to reach the minimum support, return nothing
-            if event_log.get_length() - (i + 1) < ceil(event_log.get_length() * min_support) - sat_ctr:
+            if log_length - (i + 1) < ceil(log_length * min_support) - sat_ctr:
                 return False # None
         return False # None
 
+    @staticmethod
+    def get_absence_outcome(constraint: dict, consider_vacuity: bool) -> Optional[Tuple[List[str], TraceState]]:
+        """
+        Returns the activities of a constraint whose absence from a trace decides the outcome of the constraint on the
+        trace, whatever its conditions, together with that outcome: a trace without the activation of a binary
+        constraint is vacuous, a trace without the activity of a unary constraint violates (or, for Absence,
+        satisfies) it. None is returned for the templates without a checker and for the cardinality 0, whose
+        outcome on such a trace is the opposite one (e.g. Existence0 is satisfied) and Absence0 is always violated.
+        """
+        templ_str = constraint['template'].templ_str
+        activities = constraint['activities']
+        if constraint['template'].supports_cardinality and constraint.get('n') == 0:
+            return None
+        vacuous_state = TraceState.SATISFIED if consider_vacuity else TraceState.VIOLATED
+        if templ_str in ABSENCE_VIOLATED_TEMPLATES:
+            return [activities[0]], TraceState.VIOLATED
+        if templ_str == DeclareModelTemplate.ABSENCE.templ_str:
+            return [activities[0]], TraceState.SATISFIED
+        if templ_str in CHOICE_TEMPLATES:
+            return [activities[0], activities[1]], TraceState.VIOLATED
+        if templ_str in FIRST_ACTIVATION_TEMPLATES:
+            return [activities[0]], vacuous_state
+        if templ_str in SECOND_ACTIVATION_TEMPLATES:
+            return [activities[1]], vacuous_state
+        if templ_str in BOTH_ACTIVATION_TEMPLATES:
+            return [activities[0], activities[1]], vacuous_state
+        return None
+
+    @staticmethod
+    def is_control_flow(constraint: dict) -> bool:
+        """
+        Tells whether a constraint has neither data nor time conditions, i.e. whether its outcome on a trace only
+        depends on the sequence of activities of the trace.
+        """
+        return all(not condition.strip() for condition in constraint['condition'])
+
 class TemplateConstraintChecker(ABC):
+    """
+    With state_only, the checkers return only the state of the constraint, without the counts of fulfillments,
+    violations, pendings and activations, and stop scanning the trace at the event deciding the state (e.g. the
+    first unmatched activation of a Precedence, or the n-th occurrence for Existence(n)).
+    """
 
     def __init__(self, traces: dict, completed: bool, activities: List[str], rules: dict,
-                 concept_name: str = "concept:name"):
+                 concept_name: str = "concept:name", state_only: bool = False):
         self.declare_parser_utility = DeclareModelConditionParserUtility()
         self.traces: dict = traces
         self.completed: bool = completed
         self.activities: List[str] = activities
         self.rules: dict = rules
         self.concept_name: str = concept_name
+        self.state_only: bool = state_only
 
     def get_template(self, template: DeclareModelTemplate):
         """
@@ -116,20 +227,32 @@ class TemplateConstraintChecker(ABC):
 
         """
 
-        template_checker_name = f"mp{template.templ_str.replace(' ', '')}"
+        template_checker_name = f"mp{template.templ_str.replace(' ', '').replace('-', '')}"
         try:
-            return getattr(self, template_checker_name)
+            checker = getattr(self, template_checker_name)
         except AttributeError:
             print(f"The checker function for template {template.templ_str} has not been implemented yet.")
+            return None
+        if self.state_only:
+            return lambda: CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None,
+                                         num_activations=None, state=checker().state)
+        return checker
+
+    def can_stop_early(self, *rules: CompiledCondition) -> bool:
+        """
+        Tells whether the checker can stop scanning the trace as soon as the state is decided: only with state_only,
+        and only when the conditions are well formed, since a malformed one must raise SyntaxError as it does when the
+        whole trace is scanned.
+        """
+        return self.state_only and all(rule.well_formed for rule in rules)
 
     def mpChoice(self) -> CheckerResult:
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
         a_or_b_occurs = False
         for A in self.traces:
             if A[self.concept_name] == self.activities[0] or A[self.concept_name] == self.activities[1]:
-                locl = {'A': A, 'T': self.traces[0], 'timedelta': timedelta, 'abs': abs, 'float': float}
-                if eval(activation_rules, glob, locl) and eval(time_rule, glob, locl):
+                if activation_rules(A, self.traces[0]) and time_rule(A, self.traces[0]):
                     a_or_b_occurs = True
                     break
         state = None
@@ -144,17 +267,16 @@ class TemplateConstraintChecker(ABC):
                              state=state)
 
     def mpExclusiveChoice(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
         a_occurs = False
         b_occurs = False
         for A in self.traces:
-            locl = {'A': A, 'T': self.traces[0], 'timedelta': timedelta, 'abs': abs, 'float': float}
             if not a_occurs and A[self.concept_name] == self.activities[0]:
-                if eval(activation_rules, glob, locl) and eval(time_rule, glob, locl):
+                if activation_rules(A, self.traces[0]) and time_rule(A, self.traces[0]):
                     a_occurs = True
             if not b_occurs and A[self.concept_name] == self.activities[1]:
-                if eval(activation_rules, glob, locl) and eval(time_rule, glob, locl):
+                if activation_rules(A, self.traces[0]) and time_rule(A, self.traces[0]):
                     b_occurs = True
             if a_occurs and b_occurs:
                 break
@@ -177,15 +299,17 @@ class TemplateConstraintChecker(ABC):
         event a must occur at least n-times in the trace.
     """
     def mpExistence(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
+        stop_early = self.can_stop_early(activation_rules, time_rule)
+        n = self.rules["n"]
         num_activations = 0
         for A in self.traces:
             if A[self.concept_name] == self.activities[0]:
-                locl = {'A': A, 'T': self.traces[0], 'timedelta': timedelta, 'abs': abs, 'float': float}
-                if eval(activation_rules, glob, locl) and eval(time_rule, glob, locl):
+                if activation_rules(A, self.traces[0]) and time_rule(A, self.traces[0]):
                     num_activations += 1
-        n = self.rules["n"]
+                    if stop_early and num_activations >= n:
+                        break
         state = None
         if not self.completed and num_activations < n:
             state = TraceState.POSSIBLY_VIOLATED
@@ -202,17 +326,19 @@ class TemplateConstraintChecker(ABC):
         event a may occur at most n − times in the trace.
     """
     def mpAbsence(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
+        stop_early = self.can_stop_early(activation_rules, time_rule)
+        n = self.rules["n"]
         num_activations = 0
         for A in self.traces:
             if A[self.concept_name] == self.activities[0]:
-                locl = {'A': A, 'T': self.traces[0], 'timedelta': timedelta, 'abs': abs, 'float': float}
-                if eval(activation_rules, glob, locl) and eval(time_rule, glob, locl):
+                if activation_rules(A, self.traces[0]) and time_rule(A, self.traces[0]):
                     num_activations += 1
+                    if stop_early and num_activations >= n:
+                        break
 
-        n = self.rules["n"]
         state = None
         if not self.completed and num_activations < n:
             state = TraceState.POSSIBLY_SATISFIED
@@ -230,12 +356,11 @@ class TemplateConstraintChecker(ABC):
         that event e is the first event that occurs in the trace.
     """
     def mpInit(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
 
         state = TraceState.VIOLATED
         if self.traces[0][self.concept_name] == self.activities[0]:
-            locl = {'A': self.traces[0]}
-            if eval(activation_rules, glob, locl):
+            if activation_rules(self.traces[0]):
                 state = TraceState.SATISFIED
 
         return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
@@ -247,12 +372,11 @@ class TemplateConstraintChecker(ABC):
         that event e is the first event that occurs in the trace.
     """
     def mpEnd(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
 
         state = TraceState.VIOLATED
         if self.traces[-1][self.concept_name] == self.activities[0]:
-            locl = {'A': self.traces[-1]}
-            if eval(activation_rules, glob, locl):
+            if activation_rules(self.traces[-1]):
                 state = TraceState.SATISFIED
 
         return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
@@ -262,15 +386,17 @@ class TemplateConstraintChecker(ABC):
         mp-exactly constraint checker
     """
     def mpExactly(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
+        stop_early = self.can_stop_early(activation_rules, time_rule)
+        n = self.rules["n"]
         num_activations = 0
         for A in self.traces:
             if A[self.concept_name] == self.activities[0]:
-                locl = {'A': A, 'T': self.traces[0], 'timedelta': timedelta, 'abs': abs, 'float': float}
-                if eval(activation_rules, glob, locl) and eval(time_rule, glob, locl):
+                if activation_rules(A, self.traces[0]) and time_rule(A, self.traces[0]):
                     num_activations += 1
-        n = self.rules["n"]
+                    if stop_early and num_activations > n:
+                        break
         state = None
         if not self.completed and num_activations < n:
             state = TraceState.POSSIBLY_VIOLATED
@@ -291,19 +417,19 @@ class TemplateConstraintChecker(ABC):
     # then event b occurs in the trace as well.
     # Event a activates the constraint.
     def mpRespondedExistence(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
-        pendings = []
+        pendings = PendingActivations(correlation_rules, time_rule,
+                                      self.declare_parser_utility.parse_same_attributes(self.rules["correlation"]))
         num_fulfillments = 0
         num_violations = 0
         num_pendings = 0
 
         for event in self.traces:
             if event[self.concept_name] == self.activities[0]:
-                locl = {'A': event}
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     pendings.append(event)
 
         for event in self.traces:
@@ -311,11 +437,7 @@ class TemplateConstraintChecker(ABC):
                 break
 
             if event[self.concept_name] == self.activities[1]:
-                for A in reversed(pendings):
-                    locl = {'A': A, 'T': event, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                    if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                        pendings.remove(A)
-                        num_fulfillments += 1
+                num_fulfillments += pendings.match(event)
 
         if self.completed:
             num_violations = len(pendings)
@@ -344,27 +466,23 @@ class TemplateConstraintChecker(ABC):
                              num_pendings=num_pendings, num_activations=num_activations, state=state)
 
     def mpResponse(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
-        pendings = []
+        pendings = PendingActivations(correlation_rules, time_rule,
+                                      self.declare_parser_utility.parse_same_attributes(self.rules["correlation"]))
         num_fulfillments = 0
         num_violations = 0
         num_pendings = 0
 
         for event in self.traces:
             if event[self.concept_name] == self.activities[0]:
-                locl = {'A': event}
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     pendings.append(event)
 
             if pendings and event[self.concept_name] == self.activities[1]:
-                for A in reversed(pendings):
-                    locl = {'A': A, 'T': event, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                    if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                        pendings.remove(A)
-                        num_fulfillments += 1
+                num_fulfillments += pendings.match(event)
 
         if self.completed:
             num_violations = len(pendings)
@@ -399,10 +517,11 @@ class TemplateConstraintChecker(ABC):
     # before event a recurs.
     # Event a activates the constraint.
     def mpAlternateResponse(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         pending = None
         num_activations = 0
         num_fulfillments = 0
@@ -410,14 +529,16 @@ class TemplateConstraintChecker(ABC):
 
         for event in self.traces:
             if event[self.concept_name] == self.activities[0]:
-                locl = {'A': event}
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
+                    # The previous activation, if still pending, is violated
+                    violated = pending is not None
                     pending = event
                     num_activations += 1
+                    if stop_early and violated:
+                        break
 
             if event[self.concept_name] == self.activities[1] and pending is not None:
-                locl = {'A': pending, 'T': event, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
+                if correlation_rules(pending, event) and time_rule(pending, event):
                     pending = None
                     num_fulfillments += 1
 
@@ -452,10 +573,11 @@ class TemplateConstraintChecker(ABC):
         Returns:
 
         """
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         num_activations = 0
         num_fulfillments = 0
         num_pendings = 0
@@ -463,17 +585,17 @@ class TemplateConstraintChecker(ABC):
         for index, event in enumerate(self.traces):
 
             if event[self.concept_name] == self.activities[0]:
-                locl = {'A': event}
 
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     num_activations += 1
 
                     if index < len(self.traces) - 1:
-                        if self.traces[index + 1][self.concept_name] == self.activities[1]:
-                            locl = {'A': event, 'T': self.traces[index + 1], 'timedelta': timedelta, 'abs': abs,
-                                    'float': float}
-                            if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                                num_fulfillments += 1
+                        T = self.traces[index + 1]
+                        if T[self.concept_name] == self.activities[1] and correlation_rules(event, T) \
+                                and time_rule(event, T):
+                            num_fulfillments += 1
+                        elif stop_early:
+                            break
                     else:
                         if not self.completed:
                             num_pendings = 1
@@ -506,10 +628,11 @@ class TemplateConstraintChecker(ABC):
         Returns:
 
         """
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         num_activations = 0
         num_fulfillments = 0
         Ts = []
@@ -519,16 +642,17 @@ class TemplateConstraintChecker(ABC):
                 Ts.append(event)
 
             if event[self.concept_name] == self.activities[1]:
-                locl = {'A': event}
 
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     num_activations += 1
 
                     for T in Ts:
-                        locl = {'A': event, 'T': T, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                        if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
+                        if correlation_rules(event, T) and time_rule(event, T):
                             num_fulfillments += 1
                             break
+                    else:
+                        if stop_early:
+                            break
 
         num_violations = num_activations - num_fulfillments
         vacuous_satisfaction = self.rules["vacuous_satisfaction"]
@@ -556,10 +680,11 @@ class TemplateConstraintChecker(ABC):
         Returns:
 
         """
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         num_activations = 0
         num_fulfillments = 0
         Ts = []
@@ -569,14 +694,15 @@ class TemplateConstraintChecker(ABC):
                 Ts.append(event)
 
             if event[self.concept_name] == self.activities[1]:
-                locl = {'A': event}
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     num_activations += 1
                     for T in Ts:
-                        locl = {'A': event, 'T': T, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                        if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
+                        if correlation_rules(event, T) and time_rule(event, T):
                             num_fulfillments += 1
                             break
+                    else:
+                        if stop_early:
+                            break
                     Ts = []
         num_violations = num_activations - num_fulfillments
         vacuous_satisfaction = self.rules["vacuous_satisfaction"]
@@ -602,25 +728,26 @@ class TemplateConstraintChecker(ABC):
         Returns:
 
         """
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         num_activations = 0
         num_fulfillments = 0
 
         for index, event in enumerate(self.traces):
             if event[self.concept_name] == self.activities[1]:
-                locl = {'A': event}
 
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     num_activations += 1
 
-                    if index != 0 and self.traces[index - 1][self.concept_name] == self.activities[0]:
-                        locl = {'A': event, 'T': self.traces[index - 1], 'timedelta': timedelta, 'abs': abs,
-                                'float': float}
-                        if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                            num_fulfillments += 1
+                    T = self.traces[index - 1] if index != 0 else None
+                    if T is not None and T[self.concept_name] == self.activities[0] and correlation_rules(event, T) \
+                            and time_rule(event, T):
+                        num_fulfillments += 1
+                    elif stop_early:
+                        break
 
         num_violations = num_activations - num_fulfillments
         vacuous_satisfaction = self.rules["vacuous_satisfaction"]
@@ -642,31 +769,28 @@ class TemplateConstraintChecker(ABC):
                              num_activations=num_activations, state=state)
 
     def mpNotRespondedExistence(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
-        pendings = []
+        pendings = PendingActivations(correlation_rules, time_rule,
+                                      self.declare_parser_utility.parse_same_attributes(self.rules["correlation"]))
         num_fulfillments = 0
         num_violations = 0
         num_pendings = 0
 
         for event in self.traces:
             if event[self.concept_name] == self.activities[0]:
-                locl = {'A': event}
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     pendings.append(event)
 
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         for event in self.traces:
-            if not pendings:
+            if not pendings or (stop_early and num_violations > 0):
                 break
 
             if event[self.concept_name] == self.activities[1]:
-                for A in reversed(pendings):
-                    locl = {'A': A, 'T': event, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                    if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                        pendings.remove(A)
-                        num_violations += 1
+                num_violations += pendings.match(event)
 
         if self.completed:
             num_fulfillments = len(pendings)
@@ -693,27 +817,26 @@ class TemplateConstraintChecker(ABC):
                              num_pendings=num_pendings, num_activations=num_activations, state=state)
 
     def mpNotResponse(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
 
-        pendings = []
+        pendings = PendingActivations(correlation_rules, time_rule,
+                                      self.declare_parser_utility.parse_same_attributes(self.rules["correlation"]))
         num_fulfillments = 0
         num_violations = 0
         num_pendings = 0
 
         for event in self.traces:
             if event[self.concept_name] == self.activities[0]:
-                locl = {'A': event}
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     pendings.append(event)
 
             if pendings and event[self.concept_name] == self.activities[1]:
-                for A in reversed(pendings):
-                    locl = {'A': A, 'T': event, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                    if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                        pendings.remove(A)
-                        num_violations += 1
+                num_violations += pendings.match(event)
+                if stop_early and num_violations > 0:
+                    break
 
         if self.completed:
             num_fulfillments = len(pendings)
@@ -740,10 +863,11 @@ class TemplateConstraintChecker(ABC):
                              num_pendings=num_pendings, num_activations=num_activations, state=state)
 
     def mpNotPrecedence(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
 
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         num_activations = 0
         num_violations = 0
         Ts = []
@@ -753,16 +877,16 @@ class TemplateConstraintChecker(ABC):
                 Ts.append(event)
 
             if event[self.concept_name] == self.activities[1]:
-                locl = {'A': event}
 
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     num_activations += 1
 
                     for T in Ts:
-                        locl = {'A': event, 'T': T, 'timedelta': timedelta, 'abs': abs, 'float': float}
-                        if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
+                        if correlation_rules(event, T) and time_rule(event, T):
                             num_violations += 1
                             break
+                    if stop_early and num_violations > 0:
+                        break
 
         num_fulfillments = num_activations - num_violations
         vacuous_satisfaction = self.rules["vacuous_satisfaction"]
@@ -784,25 +908,26 @@ class TemplateConstraintChecker(ABC):
                              num_activations=num_activations, state=state)
 
     def mpNotChainPrecedence(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         num_activations = 0
         num_violations = 0
 
         for index, event in enumerate(self.traces):
 
             if event[self.concept_name] == self.activities[1]:
-                locl = {'A': event}
 
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     num_activations += 1
 
                     if index != 0 and self.traces[index - 1][self.concept_name] == self.activities[0]:
-                        locl = {'A': event, 'T': self.traces[index - 1], 'timedelta': timedelta, 'abs': abs,
-                                'float': float}
-                        if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
+                        T = self.traces[index - 1]
+                        if correlation_rules(event, T) and time_rule(event, T):
                             num_violations += 1
+                            if stop_early:
+                                break
 
         num_fulfillments = num_activations - num_violations
         vacuous_satisfaction = self.rules["vacuous_satisfaction"]
@@ -824,9 +949,10 @@ class TemplateConstraintChecker(ABC):
                              num_activations=num_activations, state=state)
 
     def mpNotChainResponse(self):
-        activation_rules = self.declare_parser_utility.parse_data_cond(self.rules["activation"])
-        correlation_rules = self.declare_parser_utility.parse_data_cond(self.rules["correlation"])
-        time_rule = self.declare_parser_utility.parse_time_cond(self.rules["time"])
+        activation_rules = self.declare_parser_utility.compile_data_cond(self.rules["activation"])
+        correlation_rules = self.declare_parser_utility.compile_data_cond(self.rules["correlation"])
+        time_rule = self.declare_parser_utility.compile_time_cond(self.rules["time"])
+        stop_early = self.can_stop_early(activation_rules, correlation_rules, time_rule)
         num_activations = 0
         num_violations = 0
         num_pendings = 0
@@ -834,17 +960,17 @@ class TemplateConstraintChecker(ABC):
         for index, event in enumerate(self.traces):
 
             if event[self.concept_name] == self.activities[0]:
-                locl = {'A': event}
 
-                if eval(activation_rules, glob, locl):
+                if activation_rules(event):
                     num_activations += 1
 
                     if index < len(self.traces) - 1:
                         if self.traces[index + 1][self.concept_name] == self.activities[1]:
-                            locl = {'A': event, 'T': self.traces[index + 1], 'timedelta': timedelta, 'abs': abs,
-                                    'float': float}
-                            if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
+                            T = self.traces[index + 1]
+                            if correlation_rules(event, T) and time_rule(event, T):
                                 num_violations += 1
+                                if stop_early:
+                                    break
                     else:
                         if not self.completed:
                             num_pendings = 1
@@ -869,6 +995,47 @@ class TemplateConstraintChecker(ABC):
                              num_pendings=num_pendings, num_activations=num_activations, state=state)
 
 
+    """
+        Shortcut templates
+        Description: each of them is the conjunction of two templates over the same activities, e.g.
+        succession(a, b) = response(a, b) and precedence(a, b), coexistence(a, b) = respondedExistence(a, b) and
+        respondedExistence(b, a), so that both a and b activate it. The two templates are checked with the vacuous
+        satisfaction, the vacuity of the conjunction is decided on its activations as a whole (see conjunction_result).
+    """
+    def mpSuccession(self):
+        return self.check_conjunction(("mpResponse", False), ("mpPrecedence", False))
+
+    def mpAlternateSuccession(self):
+        return self.check_conjunction(("mpAlternateResponse", False), ("mpAlternatePrecedence", False))
+
+    def mpChainSuccession(self):
+        return self.check_conjunction(("mpChainResponse", False), ("mpChainPrecedence", False))
+
+    def mpCoExistence(self):
+        return self.check_conjunction(("mpRespondedExistence", False), ("mpRespondedExistence", True))
+
+    def mpNotCoExistence(self):
+        return self.check_conjunction(("mpNotRespondedExistence", False), ("mpNotRespondedExistence", True))
+
+    def mpNotSuccession(self):
+        return self.check_conjunction(("mpNotResponse", False), ("mpNotPrecedence", False))
+
+    def mpNotChainSuccession(self):
+        return self.check_conjunction(("mpNotChainResponse", False), ("mpNotChainPrecedence", False))
+
+    def check_conjunction(self, *components: Tuple[str, bool]) -> CheckerResult:
+        """
+        Checks the conjunction of the templates given as (checker function, whether the activities are swapped).
+        """
+        rules = {**self.rules, "vacuous_satisfaction": True}
+        results = []
+        for checker_name, swapped in components:
+            activities = self.activities[::-1] if swapped else self.activities
+            checker = TemplateConstraintChecker(self.traces, self.completed, activities, rules, self.concept_name)
+            results.append(getattr(checker, checker_name)())
+        return conjunction_result(results, self.rules["vacuous_satisfaction"], self.completed)
+
+
 class CheckerResult:
     def __init__(self, num_fulfillments: Optional[int], num_violations: Optional[int], num_pendings: Optional[int],
                  num_activations: Optional[int], state: TraceState):
@@ -877,3 +1044,38 @@ class CheckerResult:
         self.num_pendings = num_pendings
         self.num_activations = num_activations
         self.state = state
+
+
+def conjunction_result(results: List[CheckerResult], vacuous_satisfaction: bool, completed: bool) -> CheckerResult:
+    """
+    Combines the results of the templates forming a shortcut template, each checked with the vacuous satisfaction.
+    The counts are summed; the conjunction is violated as soon as one of the templates is, satisfied when all of them
+    are, possibly violated when one of them is and possibly satisfied otherwise. Without vacuous satisfaction, a
+    trace activating none of the templates violates it.
+    """
+    def total(counts: List[Optional[int]]) -> Optional[int]:
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+
+    num_activations = total([result.num_activations for result in results])
+    states = [result.state for result in results]
+    state = None
+    if not vacuous_satisfaction and not num_activations:
+        if completed:
+            state = TraceState.VIOLATED
+        else:
+            state = TraceState.POSSIBLY_VIOLATED
+    elif None in states:
+        state = None
+    elif TraceState.VIOLATED in states:
+        state = TraceState.VIOLATED
+    elif all(state == TraceState.SATISFIED for state in states):
+        state = TraceState.SATISFIED
+    elif TraceState.POSSIBLY_VIOLATED in states:
+        state = TraceState.POSSIBLY_VIOLATED
+    else:
+        state = TraceState.POSSIBLY_SATISFIED
+    return CheckerResult(num_fulfillments=total([result.num_fulfillments for result in results]),
+                         num_violations=total([result.num_violations for result in results]),
+                         num_pendings=total([result.num_pendings for result in results]),
+                         num_activations=num_activations, state=state)
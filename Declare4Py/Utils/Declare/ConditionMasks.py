@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import ast
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from Declare4Py.Utils.ColumnarLog import AttributeColumn, ColumnarLog
+
+"""
+Evaluation of the data conditions of MP-Declare constraints over the typed attribute columns of a columnar log. The
+python source a condition is compiled into is parsed once into an AST, which is evaluated over all the events of the
+log at once as NumPy boolean masks, instead of calling the compiled predicate event by event.
+Only the sources made of and/or/not, comparisons of an attribute of the event with constants and attribute presence
+tests (the ones produced by DeclareModelConditionParserUtility.parse_data_cond) are vectorized. Besides the mask, the
+evaluation tells the events on which calling the predicate would raise (e.g. comparing a string with a number), so
+that those events are left to the predicate.
+"""
+
+_COMPARISONS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt,
+    ast.GtE: operator.ge, ast.In: lambda value, constant: value in constant,
+    ast.NotIn: lambda value, constant: value not in constant}
+# The comparison with the operands swapped, e.g. 2 < A["x"] is A["x"] > 2
+_SWAPPED = {ast.Eq: ast.Eq, ast.NotEq: ast.NotEq, ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE}
+_ORDERINGS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+
+class UnsupportedCondition(Exception):
+    """
+    Raised when the source of a condition cannot be evaluated over the columns of the log.
+    """
+
+
+def evaluate_condition(source: str, col_log: ColumnarLog, subject: str = "A") \
+        -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Evaluates the python source of a data condition over all the events of a columnar log, each event being in turn
+    the event named 'subject' in the source.
+
+    Parameters
+    ----------
+    source: the python source of the condition, as compiled by CompiledCondition
+    col_log: the columnar log
+    subject: the name of the event in the source, A for activation conditions and T for target conditions
+
+    Returns
+    -------
+    the bool array telling the events satisfying the condition, and the bool array telling the events on which the
+    compiled predicate would raise (the first array is meaningless there), or None if the source cannot be evaluated
+    over the columns, e.g. because it refers to other events or to the timestamps
+    """
+    try:
+        tree = _parse(source, subject)
+        return _ConditionEvaluator(col_log, subject).evaluate(tree)
+    except UnsupportedCondition:
+        return None
+
+
+def refers_only_to(source: str, subject: str) -> bool:
+    """
+    Tells whether the python source of a condition refers to the event named 'subject' only, e.g. the correlation
+    conditions of binary constraints that constrain only the target.
+    """
+    try:
+        _parse(source, subject)
+        return True
+    except UnsupportedCondition:
+        return False
+
+
+@lru_cache(maxsize=1024)
+def _parse(source: str, subject: str) -> ast.expr:
+    try:
+        tree = ast.parse(source, mode="eval").body
+    except SyntaxError:
+        raise UnsupportedCondition
+    if any(isinstance(node, ast.Name) and node.id != subject for node in ast.walk(tree)):
+        raise UnsupportedCondition
+    return tree
+
+
+def _get_constant(node: ast.expr) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        raise UnsupportedCondition
+
+
+class _ConditionEvaluator:
+    """
+    Evaluates the AST of a condition over the events of a log. Boolean nodes evaluate to a pair of bool arrays: the
+    truth value and whether the evaluation raises, which follows the short-circuit of and/or.
+    """
+
+    def __init__(self, col_log: ColumnarLog, subject: str):
+        self.col_log: ColumnarLog = col_log
+        self.subject: str = subject
+        self.n_events: int = col_log.n_events
+
+    def evaluate(self, node: ast.expr) -> Tuple[np.ndarray, np.ndarray]:
+        if isinstance(node, ast.BoolOp):
+            values, errors = self.evaluate(node.values[0])
+            for operand in node.values[1:]:
+                operand_values, operand_errors = self.evaluate(operand)
+                if isinstance(node.op, ast.And):
+                    errors = errors | (values & operand_errors)  # the operand is evaluated only if values is true
+                    values = values & operand_values
+                else:
+                    errors = errors | (~values & operand_errors)
+                    values = values | operand_values
+            return values, errors
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            values, errors = self.evaluate(node.operand)
+            return ~values, errors
+        if isinstance(node, ast.Constant):
+            return np.full(self.n_events, bool(node.value)), np.zeros(self.n_events, dtype=bool)
+        if isinstance(node, ast.Compare) and len(node.ops) == 1:
+            return self._evaluate_comparison(node.left, type(node.ops[0]), node.comparators[0])
+        raise UnsupportedCondition
+
+    def _evaluate_comparison(self, left: ast.expr, op: type, right: ast.expr) -> Tuple[np.ndarray, np.ndarray]:
+        if op in (ast.In, ast.NotIn) and self._is_subject(right):  # "key" in A
+            present = self._get_presence(_get_constant(left))
+            return (present if op is ast.In else ~present), np.zeros(self.n_events, dtype=bool)
+        if self._get_key(left) is None:
+            if op not in _SWAPPED:
+                raise UnsupportedCondition
+            left, op, right = right, _SWAPPED[op], left
+        key = self._get_key(left)
+        if key is None:
+            raise UnsupportedCondition
+        constant = _get_constant(right)
+        column = self._get_column(key)
+        if column is None:  # no event has the attribute, reading it always raises
+            return np.zeros(self.n_events, dtype=bool), np.ones(self.n_events, dtype=bool)
+        values, errors = self._compare(column, op, constant)
+        return values, errors | ~column.mask
+
+    def _is_subject(self, node: ast.expr) -> bool:
+        return isinstance(node, ast.Name) and node.id == self.subject
+
+    def _get_key(self, node: ast.expr) -> Optional[str]:
+        if isinstance(node, ast.Subscript) and self._is_subject(node.value):
+            key = _get_constant(node.slice)
+            if isinstance(key, str):
+                return key
+        return None
+
+    def _get_column(self, key: str) -> Optional[AttributeColumn]:
+        col_log = self.col_log
+        if key == col_log.timestamp_key:  # events with non-datetime timestamps have no value in the column
+            raise UnsupportedCondition
+        if key == col_log.activity_key:
+            activities = list(col_log.activities)
+            activity_ids = np.asarray(col_log.activity_ids)
+            has_activity = np.array([activity is not None for activity in activities] + [False], dtype=bool)
+            return AttributeColumn(AttributeColumn.CATEGORICAL, activity_ids, has_activity[activity_ids], activities)
+        return col_log.attributes.get(key)
+
+    def _get_presence(self, key: Any) -> np.ndarray:
+        if not isinstance(key, str):
+            raise UnsupportedCondition
+        column = self._get_column(key)
+        if column is None:
+            return np.zeros(self.n_events, dtype=bool)
+        return np.asarray(column.mask, dtype=bool)
+
+    def _compare(self, column: AttributeColumn, op: type, constant: Any) -> Tuple[np.ndarray, np.ndarray]:
+        compare = _COMPARISONS.get(op)
+        if compare is None:
+            raise UnsupportedCondition
+        if column.kind == AttributeColumn.CATEGORICAL:
+            # The few distinct values are compared in python, with the semantics of the compiled predicate
+            outcomes = []
+            for category in column.categories:
+                try:
+                    outcomes.append((bool(compare(category, constant)), False))
+                except Exception:
+                    outcomes.append((False, True))
+            outcomes.append((False, False))  # code -1, events without the attribute
+            outcomes = np.array(outcomes, dtype=bool).reshape(-1, 2)
+            codes = np.asarray(column.values)
+            return outcomes[codes, 0], outcomes[codes, 1]
+
+        values = np.asarray(column.values)
+        no_errors = np.zeros(self.n_events, dtype=bool)
+        numeric = column.kind in (AttributeColumn.INT, AttributeColumn.FLOAT)
+
+        def is_comparable(value: Any) -> bool:
+            return numeric and isinstance(value, (int, float))
+
+        if op in (ast.In, ast.NotIn):
+            if not isinstance(constant, (tuple, list, set, frozenset)):
+                raise UnsupportedCondition
+            found = np.zeros(self.n_events, dtype=bool)
+            for value in constant:
+                if is_comparable(value):
+                    found |= values == value
+            return (found if op is ast.In else ~found), no_errors
+        if is_comparable(constant):
+            return compare(values, constant), no_errors
+        if op in _ORDERINGS:  # e.g. a number or a datetime compared with a string
+            return np.zeros(self.n_events, dtype=bool), np.ones(self.n_events, dtype=bool)
+        return np.full(self.n_events, op is ast.NotEq), no_errors
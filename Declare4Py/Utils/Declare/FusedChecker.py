@@ -0,0 +1,1246 @@
+from __future__ import annotations
+
+import copy
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+
+from Declare4Py.ProcessModels.DeclareModel import DeclareModel
+from Declare4Py.ProcessModels.DeclareModel import CompiledTimeCondition, DeclareModelConditionParserUtility, \
+    DeclareModelTemplate
+from Declare4Py.Utils.ColumnarLog import ColumnarLog, NAT_NS
+from Declare4Py.Utils.Declare.ConditionMasks import evaluate_condition, refers_only_to
+from Declare4Py.Utils.Declare.Checkers import CheckerResult, ConstraintChecker, TemplateConstraintChecker, \
+    conjunction_result
+from Declare4Py.Utils.Declare.Pendings import PendingActivations
+from Declare4Py.Utils.Declare.TraceStates import TraceState
+
+"""
+Single-pass conformance checking of all the constraints of a MP-Declare model. Each constraint is checked by an
+incremental checker whose state is advanced one event at a time; the events of a trace are dispatched only to the
+checkers of the constraints mentioning their activity. The outcome is the same as the per-constraint checkers of
+TemplateConstraintChecker.
+"""
+
+
+class IncrementalTemplateChecker(ABC):
+    """
+    Checker of a single constraint that consumes the events of a trace one at a time.
+
+    Parameters
+    ----------
+    activities: the activities of the constraint
+    rules: the conditions of the constraint, 'n' for templates with cardinality and the vacuity flag
+    concept_name: the event attribute with the activity name
+    """
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        self.declare_parser_utility = DeclareModelConditionParserUtility()
+        self.activities: List[str] = activities
+        self.rules: dict = rules
+        self.concept_name: str = concept_name
+        self.trace = None
+        self.failed: bool = False
+        # Set by the checkers once their state on the completed trace cannot change with the following events, so
+        # that FusedConstraintChecker.check_trace_states stops feeding them
+        self.decided: bool = False
+        # Set by FusedConstraintChecker.set_columnar_log: the outcome of the activation condition, and of the
+        # correlation condition when it constrains only the target, on each event of the columnar log. They are read
+        # at mask_offset, the row of the first event of the trace, or ignored when mask_offset is None.
+        self.activation_mask: Optional[List[bool]] = None
+        self.target_mask: Optional[List[bool]] = None
+        self.mask_offset: Optional[int] = None
+        # Set by FusedConstraintChecker.set_columnar_log for the time conditions with known bounds: the timestamps of
+        # the events of the columnar log as integer nanoseconds, read at mask_offset as well
+        self.timestamps: Optional[List[int]] = None
+
+    def get_dispatch_activities(self) -> List[str]:
+        """
+        Returns the activities of the events that must be fed to the checker.
+        """
+        return list(dict.fromkeys(self.activities))
+
+    def reset(self, trace) -> None:
+        """
+        Clears the state of the checker before checking a new trace.
+        """
+        self.trace = trace
+        self.failed = False
+        self.decided = False
+        self.mask_offset = None
+
+    def clone(self) -> IncrementalTemplateChecker:
+        """
+        Returns a checker of the same constraint sharing the compiled conditions but not the state, e.g. to check
+        many running cases at the same time. The clone must be reset before use.
+        """
+        return copy.copy(self)
+
+    def decide(self) -> None:
+        """
+        Marks the state of the checker on the completed trace as decided, unless some of its conditions is malformed:
+        those must still raise SyntaxError on the following events, as they do when all the events are consumed.
+        """
+        self.decided = all(getattr(self, name).well_formed for name in ("activation_rules", "correlation_rules",
+                                                                          "time_rule") if hasattr(self, name))
+
+    def check_activation(self, index: int, event: dict, T: Optional[dict] = None) -> bool:
+        """
+        Tells whether the index-th event of the trace satisfies the activation condition.
+        """
+        if self.activation_mask is not None and self.mask_offset is not None:
+            return self.activation_mask[self.mask_offset + index]
+        return self.activation_rules(event, T)
+
+    def check_target(self, index: int) -> bool:
+        """
+        Tells whether the index-th event of the trace can satisfy the correlation condition as a target. It is
+        always True unless the correlation condition constrains only the target.
+        """
+        if self.target_mask is not None and self.mask_offset is not None:
+            return self.target_mask[self.mask_offset + index]
+        return True
+
+    def get_timestamp(self, index: int) -> Optional[int]:
+        """
+        Returns the timestamp, as integer nanoseconds, of the index-th event of the trace from the timestamp column of
+        the log, None if it is not available there.
+        """
+        if self.timestamps is not None and self.mask_offset is not None:
+            timestamp = self.timestamps[self.mask_offset + index]
+            if timestamp != NAT_NS:
+                return timestamp
+        return None
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        """
+        Advances the state of the checker with the index-th event of the trace, whose activity is 'activity'.
+        """
+
+    @abstractmethod
+    def get_result(self, completed: bool) -> CheckerResult:
+        """
+        Returns the outcome of the constraint on the events consumed so far.
+        """
+
+
+class ChoiceChecker(IncrementalTemplateChecker):
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.activation_rules = self.declare_parser_utility.compile_data_cond(rules["activation"])
+        self.time_rule = self.declare_parser_utility.compile_time_cond(rules["time"])
+        self.a_or_b_occurs = False
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.a_or_b_occurs = False
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if not self.a_or_b_occurs:
+            first = self.trace[0]
+            if self.check_activation(index, event, first) and self.time_rule(event, first):
+                self.a_or_b_occurs = True
+                self.decide()
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        state = None
+        if not completed and not self.a_or_b_occurs:
+            state = TraceState.POSSIBLY_VIOLATED
+        elif completed and not self.a_or_b_occurs:
+            state = TraceState.VIOLATED
+        elif self.a_or_b_occurs:
+            state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
+                             state=state)
+
+
+class ExclusiveChoiceChecker(IncrementalTemplateChecker):
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.activation_rules = self.declare_parser_utility.compile_data_cond(rules["activation"])
+        self.time_rule = self.declare_parser_utility.compile_time_cond(rules["time"])
+        self.a_occurs = False
+        self.b_occurs = False
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.a_occurs = False
+        self.b_occurs = False
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if self.a_occurs and self.b_occurs:
+            return
+        first = self.trace[0]
+        if not self.a_occurs and activity == self.activities[0]:
+            if self.check_activation(index, event, first) and self.time_rule(event, first):
+                self.a_occurs = True
+        if not self.b_occurs and activity == self.activities[1]:
+            if self.check_activation(index, event, first) and self.time_rule(event, first):
+                self.b_occurs = True
+        if self.a_occurs and self.b_occurs:
+            self.decide()
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        a_occurs, b_occurs = self.a_occurs, self.b_occurs
+        state = None
+        if not completed and (not a_occurs and not b_occurs):
+            state = TraceState.POSSIBLY_VIOLATED
+        elif not completed and (a_occurs ^ b_occurs):
+            state = TraceState.POSSIBLY_SATISFIED
+        elif (a_occurs and b_occurs) or (completed and (not a_occurs and not b_occurs)):
+            state = TraceState.VIOLATED
+        elif completed and (a_occurs ^ b_occurs):
+            state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
+                             state=state)
+
+
+class _CountingChecker(IncrementalTemplateChecker, ABC):
+    """
+    Counts the events of the activity satisfying the activation and time conditions. The state is decided once the
+    count exceeds decided_above.
+    """
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.activation_rules = self.declare_parser_utility.compile_data_cond(rules["activation"])
+        self.time_rule = self.declare_parser_utility.compile_time_cond(rules["time"])
+        self.num_activations = 0
+
+    def get_dispatch_activities(self) -> List[str]:
+        return [self.activities[0]]
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.num_activations = 0
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        first = self.trace[0]
+        if self.check_activation(index, event, first) and self.time_rule(event, first):
+            self.num_activations += 1
+            if self.num_activations > self.decided_above:
+                self.decide()
+
+    @property
+    def decided_above(self) -> int:
+        return self.rules["n"] - 1
+
+
+class ExistenceChecker(_CountingChecker):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        n = self.rules["n"]
+        state = None
+        if not completed and self.num_activations < n:
+            state = TraceState.POSSIBLY_VIOLATED
+        elif completed and self.num_activations < n:
+            state = TraceState.VIOLATED
+        elif self.num_activations >= n:
+            state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
+                             state=state)
+
+
+class AbsenceChecker(_CountingChecker):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        n = self.rules["n"]
+        state = None
+        if not completed and self.num_activations < n:
+            state = TraceState.POSSIBLY_SATISFIED
+        elif self.num_activations >= n:
+            state = TraceState.VIOLATED
+        elif completed and self.num_activations < n:
+            state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
+                             state=state)
+
+
+class ExactlyChecker(_CountingChecker):
+
+    @property
+    def decided_above(self) -> int:
+        return self.rules["n"]
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        n = self.rules["n"]
+        state = None
+        if not completed and self.num_activations < n:
+            state = TraceState.POSSIBLY_VIOLATED
+        elif not completed and self.num_activations == n:
+            state = TraceState.POSSIBLY_SATISFIED
+        elif self.num_activations > n or (completed and self.num_activations < n):
+            state = TraceState.VIOLATED
+        elif completed and self.num_activations == n:
+            state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
+                             state=state)
+
+
+class InitChecker(IncrementalTemplateChecker):
+    """
+    Only looks at the first event of the trace, when the result is requested.
+    """
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.activation_rules = self.declare_parser_utility.compile_data_cond(rules["activation"])
+
+    def get_dispatch_activities(self) -> List[str]:
+        return []
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        state = TraceState.VIOLATED
+        if self.trace[0][self.concept_name] == self.activities[0]:
+            if self.check_activation(0, self.trace[0]):
+                state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
+                             state=state)
+
+
+class EndChecker(InitChecker):
+    """
+    Only looks at the last event of the trace, when the result is requested.
+    """
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        state = TraceState.VIOLATED
+        if self.trace[-1][self.concept_name] == self.activities[0]:
+            if self.check_activation(len(self.trace) - 1, self.trace[-1]):
+                state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=None, num_violations=None, num_pendings=None, num_activations=None,
+                             state=state)
+
+
+class _BinaryChecker(IncrementalTemplateChecker, ABC):
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.activation_rules = self.declare_parser_utility.compile_data_cond(rules["activation"])
+        self.correlation_rules = self.declare_parser_utility.compile_data_cond(rules["correlation"])
+        self.time_rule = self.declare_parser_utility.compile_time_cond(rules["time"])
+
+
+class _RespondedExistenceBase(_BinaryChecker, ABC):
+    """
+    A target may precede or follow its activation: an activation is matched against the targets seen so far, as in
+    _PrecedenceBase, and is otherwise kept pending until a following target matches it, as in _ResponseBase.
+    """
+    decided_on_match = False  # a matched activation violates the negative template
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.pendings = PendingActivations(self.correlation_rules, self.time_rule,
+                                           self.declare_parser_utility.parse_same_attributes(rules["correlation"]))
+        self.Ts = []
+        self.time_window: bool = self.correlation_rules.always_true and isinstance(self.time_rule,
+                                                                                  CompiledTimeCondition)
+        # The sorted timestamps of the targets as integer nanoseconds, None when some target has no timestamp
+        self.T_timestamps: Optional[List[int]] = None
+        self.num_matched = 0
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.pendings.clear()
+        self.Ts = []
+        self.T_timestamps = [] if self.time_window else None
+        self.num_matched = 0
+
+    def clone(self) -> IncrementalTemplateChecker:
+        checker = copy.copy(self)
+        checker.pendings = self.pendings.copy()
+        return checker
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if activity == self.activities[0]:
+            if self.check_activation(index, event):
+                if self.match_previous_targets(index, event):
+                    self.num_matched += 1
+                else:
+                    self.pendings.append(event, self.get_timestamp(index))
+
+        if activity == self.activities[1] and self.check_target(index):
+            if self.pendings:
+                self.num_matched += self.pendings.match(event, self.get_timestamp(index))
+            self.Ts.append(event)
+            if self.T_timestamps is not None:
+                timestamp = self._get_event_timestamp(index, event)
+                if timestamp is None:
+                    self.T_timestamps = None
+                else:
+                    insort(self.T_timestamps, timestamp)
+
+        if self.num_matched and self.decided_on_match:
+            self.decide()
+
+    def match_previous_targets(self, index: int, event: dict) -> bool:
+        """
+        Tells whether the index-th event, an activation, satisfies the correlation and time conditions with some of
+        the targets seen so far.
+        """
+        if not self.Ts:
+            return False
+        if self.pendings.match_all:
+            return True
+        timestamp = self._get_event_timestamp(index, event) if self.T_timestamps is not None else None
+        if timestamp is not None:
+            T_timestamps = self.T_timestamps
+            return any(bisect_left(T_timestamps, low) < bisect_right(T_timestamps, high)
+                       for low, high in self.time_rule.get_windows(timestamp))
+        for T in reversed(self.Ts):
+            if self.correlation_rules(event, T) and self.time_rule(event, T):
+                return True
+        return False
+
+    def _get_event_timestamp(self, index: int, event: dict) -> Optional[int]:
+        timestamp = self.get_timestamp(index)
+        return timestamp if timestamp is not None else CompiledTimeCondition.get_timestamp(event)
+
+
+class RespondedExistenceChecker(_RespondedExistenceBase):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_fulfillments = self.num_matched
+        num_violations = 0
+        num_pendings = 0
+        if completed:
+            num_violations = len(self.pendings)
+        else:
+            num_pendings = len(self.pendings)
+
+        num_activations = num_fulfillments + num_violations + num_pendings
+        state = None
+        if not self.rules["vacuous_satisfaction"] and num_activations == 0:
+            if completed:
+                state = TraceState.VIOLATED
+            else:
+                state = TraceState.POSSIBLY_VIOLATED
+        elif not completed and num_violations > 0:
+            state = TraceState.POSSIBLY_VIOLATED
+        elif not completed and num_violations == 0:
+            state = TraceState.POSSIBLY_SATISFIED
+        elif completed and num_violations > 0:
+            state = TraceState.VIOLATED
+        elif completed and num_violations == 0:
+            state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=num_fulfillments, num_violations=num_violations,
+                             num_pendings=num_pendings, num_activations=num_activations, state=state)
+
+
+class NotRespondedExistenceChecker(_RespondedExistenceBase):
+    decided_on_match = True
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_violations = self.num_matched
+        num_fulfillments = 0
+        num_pendings = 0
+        if completed:
+            num_fulfillments = len(self.pendings)
+        else:
+            num_pendings = len(self.pendings)
+
+        num_activations = num_fulfillments + num_violations + num_pendings
+        return CheckerResult(num_fulfillments=num_fulfillments, num_violations=num_violations,
+                             num_pendings=num_pendings, num_activations=num_activations,
+                             state=_negative_state(self.rules["vacuous_satisfaction"], completed, num_activations,
+                                                   num_violations))
+
+
+class _ResponseBase(_BinaryChecker, ABC):
+    decided_on_match = False  # a matched activation violates the negative template
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.pendings = PendingActivations(self.correlation_rules, self.time_rule,
+                                           self.declare_parser_utility.parse_same_attributes(rules["correlation"]))
+        self.num_matched = 0
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.pendings.clear()
+        self.num_matched = 0
+
+    def clone(self) -> IncrementalTemplateChecker:
+        checker = copy.copy(self)
+        checker.pendings = self.pendings.copy()
+        return checker
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if activity == self.activities[0]:
+            if self.check_activation(index, event):
+                self.pendings.append(event, self.get_timestamp(index))
+
+        if self.pendings and activity == self.activities[1] and self.check_target(index):
+            self.num_matched += self.pendings.match(event, self.get_timestamp(index))
+            if self.num_matched and self.decided_on_match:
+                self.decide()
+
+
+class ResponseChecker(_ResponseBase):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_fulfillments = self.num_matched
+        num_violations = 0
+        num_pendings = 0
+        if completed:
+            num_violations = len(self.pendings)
+        else:
+            num_pendings = len(self.pendings)
+
+        num_activations = num_fulfillments + num_violations + num_pendings
+        state = None
+        if not self.rules["vacuous_satisfaction"] and num_activations == 0:
+            if completed:
+                state = TraceState.VIOLATED
+            else:
+                state = TraceState.POSSIBLY_VIOLATED
+        elif not completed and num_pendings > 0:
+            state = TraceState.POSSIBLY_VIOLATED
+        elif not completed and num_pendings == 0:
+            state = TraceState.POSSIBLY_SATISFIED
+        elif completed and num_violations > 0:
+            state = TraceState.VIOLATED
+        elif completed and num_violations == 0:
+            state = TraceState.SATISFIED
+        return CheckerResult(num_fulfillments=num_fulfillments, num_violations=num_violations,
+                             num_pendings=num_pendings, num_activations=num_activations, state=state)
+
+
+class NotResponseChecker(_ResponseBase):
+    decided_on_match = True
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_violations = self.num_matched
+        num_fulfillments = 0
+        num_pendings = 0
+        if completed:
+            num_fulfillments = len(self.pendings)
+        else:
+            num_pendings = len(self.pendings)
+
+        num_activations = num_fulfillments + num_violations + num_pendings
+        return CheckerResult(num_fulfillments=num_fulfillments, num_violations=num_violations,
+                             num_pendings=num_pendings, num_activations=num_activations,
+                             state=_negative_state(self.rules["vacuous_satisfaction"], completed, num_activations,
+                                                   num_violations))
+
+
+class AlternateResponseChecker(_BinaryChecker):
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.pending = None
+        self.num_activations = 0
+        self.num_fulfillments = 0
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.pending = None
+        self.num_activations = 0
+        self.num_fulfillments = 0
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if activity == self.activities[0]:
+            if self.check_activation(index, event):
+                if self.pending is not None:  # the previous activation is violated
+                    self.decide()
+                self.pending = event
+                self.num_activations += 1
+
+        if activity == self.activities[1] and self.pending is not None and self.check_target(index):
+            if self.correlation_rules(self.pending, event) and self.time_rule(self.pending, event):
+                self.pending = None
+                self.num_fulfillments += 1
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_pendings = 0
+        if not completed and self.pending is not None:
+            num_pendings = 1
+        num_violations = self.num_activations - self.num_fulfillments - num_pendings
+        return CheckerResult(num_fulfillments=self.num_fulfillments, num_violations=num_violations,
+                             num_pendings=num_pendings, num_activations=self.num_activations,
+                             state=_alternate_state(self.rules["vacuous_satisfaction"], completed,
+                                                    self.num_activations, num_violations, num_pendings))
+
+
+class _ChainResponseBase(_BinaryChecker, ABC):
+    """
+    The last activation is kept until the following event is consumed.
+    """
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.last_activation = None
+        self.last_activation_index = -1
+        self.num_activations = 0
+        self.num_matched = 0
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.last_activation = None
+        self.last_activation_index = -1
+        self.num_activations = 0
+        self.num_matched = 0
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if activity == self.activities[1] and index != 0 and self.last_activation_index == index - 1 \
+                and self.check_target(index):
+            if self.correlation_rules(self.last_activation, event) and self.time_rule(self.last_activation, event):
+                self.num_matched += 1
+
+        if activity == self.activities[0]:
+            if self.check_activation(index, event):
+                self.num_activations += 1
+                self.last_activation = event
+                self.last_activation_index = index
+
+    def get_pendings(self, completed: bool) -> int:
+        if not completed and self.last_activation_index == len(self.trace) - 1:
+            return 1
+        return 0
+
+
+class ChainResponseChecker(_ChainResponseBase):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_pendings = self.get_pendings(completed)
+        num_violations = self.num_activations - self.num_matched - num_pendings
+        return CheckerResult(num_fulfillments=self.num_matched, num_violations=num_violations,
+                             num_pendings=num_pendings, num_activations=self.num_activations,
+                             state=_alternate_state(self.rules["vacuous_satisfaction"], completed,
+                                                    self.num_activations, num_violations, num_pendings))
+
+
+class NotChainResponseChecker(_ChainResponseBase):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_pendings = self.get_pendings(completed)
+        num_fulfillments = self.num_activations - self.num_matched - num_pendings
+        return CheckerResult(num_fulfillments=num_fulfillments, num_violations=self.num_matched,
+                             num_pendings=num_pendings, num_activations=self.num_activations,
+                             state=_negative_state(self.rules["vacuous_satisfaction"], completed,
+                                                   self.num_activations, self.num_matched))
+
+
+class _PrecedenceBase(_BinaryChecker, ABC):
+    """
+    The targets seen so far are kept and matched against each activation. In the alternate variant they are dropped
+    after every activation. With a time condition and no correlation condition, the timestamps of the targets are
+    also kept sorted, and an activation looks for a target within the time bounds with a binary search.
+    """
+    alternate = False
+    decided_on_match = False  # an unmatched activation violates the positive templates, a matched one the negative
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.Ts = []
+        self.time_window: bool = self.correlation_rules.always_true and isinstance(self.time_rule,
+                                                                                  CompiledTimeCondition)
+        # The sorted timestamps of the targets as integer nanoseconds, None when some target has no timestamp
+        self.T_timestamps: Optional[List[int]] = None
+        self.num_activations = 0
+        self.num_matched = 0
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.Ts = []
+        self.T_timestamps = [] if self.time_window else None
+        self.num_activations = 0
+        self.num_matched = 0
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if activity == self.activities[0] and self.check_target(index):
+            self.Ts.append(event)
+            if self.T_timestamps is not None:
+                timestamp = self._get_event_timestamp(index, event)
+                if timestamp is None:
+                    self.T_timestamps = None
+                else:
+                    insort(self.T_timestamps, timestamp)
+
+        if activity == self.activities[1]:
+            if self.check_activation(index, event):
+                self.num_activations += 1
+                timestamp = self._get_event_timestamp(index, event) if self.T_timestamps is not None else None
+                num_matched = self.num_matched
+                if timestamp is not None:
+                    T_timestamps = self.T_timestamps
+                    if any(bisect_left(T_timestamps, low) < bisect_right(T_timestamps, high)
+                           for low, high in self.time_rule.get_windows(timestamp)):
+                        self.num_matched += 1
+                else:
+                    for T in self.Ts:
+                        if self.correlation_rules(event, T) and self.time_rule(event, T):
+                            self.num_matched += 1
+                            break
+                if (self.num_matched > num_matched) == self.decided_on_match:
+                    self.decide()
+                if self.alternate:
+                    self.Ts = []
+                    self.T_timestamps = [] if self.time_window else None
+
+    def _get_event_timestamp(self, index: int, event: dict) -> Optional[int]:
+        timestamp = self.get_timestamp(index)
+        return timestamp if timestamp is not None else CompiledTimeCondition.get_timestamp(event)
+
+
+class PrecedenceChecker(_PrecedenceBase):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_violations = self.num_activations - self.num_matched
+        return CheckerResult(num_fulfillments=self.num_matched, num_violations=num_violations, num_pendings=None,
+                             num_activations=self.num_activations,
+                             state=_negative_state(self.rules["vacuous_satisfaction"], completed,
+                                                   self.num_activations, num_violations))
+
+
+class AlternatePrecedenceChecker(PrecedenceChecker):
+    alternate = True
+
+
+class NotPrecedenceChecker(_PrecedenceBase):
+    decided_on_match = True
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_fulfillments = self.num_activations - self.num_matched
+        return CheckerResult(num_fulfillments=num_fulfillments, num_violations=self.num_matched, num_pendings=None,
+                             num_activations=self.num_activations,
+                             state=_negative_state(self.rules["vacuous_satisfaction"], completed,
+                                                   self.num_activations, self.num_matched))
+
+
+class _ChainPrecedenceBase(_BinaryChecker, ABC):
+    """
+    The last target is kept to be matched against an activation immediately following it.
+    """
+    decided_on_match = False
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        super().__init__(activities, rules, concept_name)
+        self.last_target = None
+        self.last_target_index = -1
+        self.num_activations = 0
+        self.num_matched = 0
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        self.last_target = None
+        self.last_target_index = -1
+        self.num_activations = 0
+        self.num_matched = 0
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        if activity == self.activities[1]:
+            if self.check_activation(index, event):
+                self.num_activations += 1
+                matched = False
+                if index != 0 and self.last_target_index == index - 1:
+                    T = self.last_target
+                    if self.correlation_rules(event, T) and self.time_rule(event, T):
+                        self.num_matched += 1
+                        matched = True
+                if matched == self.decided_on_match:
+                    self.decide()
+
+        if activity == self.activities[0]:
+            self.last_target = event
+            self.last_target_index = index if self.check_target(index) else -1
+
+
+class ChainPrecedenceChecker(_ChainPrecedenceBase):
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_violations = self.num_activations - self.num_matched
+        return CheckerResult(num_fulfillments=self.num_matched, num_violations=num_violations, num_pendings=None,
+                             num_activations=self.num_activations,
+                             state=_negative_state(self.rules["vacuous_satisfaction"], completed,
+                                                   self.num_activations, num_violations))
+
+
+class NotChainPrecedenceChecker(_ChainPrecedenceBase):
+    decided_on_match = True
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        num_fulfillments = self.num_activations - self.num_matched
+        return CheckerResult(num_fulfillments=num_fulfillments, num_violations=self.num_matched, num_pendings=None,
+                             num_activations=self.num_activations,
+                             state=_negative_state(self.rules["vacuous_satisfaction"], completed,
+                                                   self.num_activations, self.num_matched))
+
+
+def _component_attribute(name: str) -> property:
+    """
+    Attribute of a _ConjunctionChecker stored on the checkers of its templates.
+    """
+    def get(self):
+        return getattr(self.checkers[0], name)
+
+    def set(self, value):
+        for checker in self.checkers:
+            setattr(checker, name, value)
+    return property(get, set)
+
+
+class _ConjunctionChecker(_BinaryChecker, ABC):
+    """
+    Shortcut template checked as the conjunction of two templates over the same activities, each by its own checker
+    fed with the events of both activities (see TemplateConstraintChecker.check_conjunction). The masks and the
+    position in the columnar log set on this checker are shared with the two checkers.
+    """
+    # The checkers of the two templates, each with whether the activities of the constraint are swapped
+    components: Tuple[Tuple[Type[IncrementalTemplateChecker], bool], ...] = ()
+
+    def __init__(self, activities: List[str], rules: dict, concept_name: str = "concept:name"):
+        component_rules = {**rules, "vacuous_satisfaction": True}
+        self.checkers: List[IncrementalTemplateChecker] = [
+            checker_class(activities[::-1] if swapped else activities, component_rules, concept_name)
+            for checker_class, swapped in self.components]
+        super().__init__(activities, rules, concept_name)
+
+    activation_mask = _component_attribute("activation_mask")
+    target_mask = _component_attribute("target_mask")
+    timestamps = _component_attribute("timestamps")
+    mask_offset = _component_attribute("mask_offset")
+
+    def reset(self, trace) -> None:
+        super().reset(trace)
+        for checker in self.checkers:
+            checker.reset(trace)
+
+    def clone(self) -> IncrementalTemplateChecker:
+        checker = copy.copy(self)
+        checker.checkers = [component.clone() for component in self.checkers]
+        return checker
+
+    def on_event(self, index: int, event: dict, activity: str) -> None:
+        for checker in self.checkers:
+            checker.on_event(index, event, activity)
+            if checker.decided:  # only a violation decides the templates
+                self.decide()
+
+    def get_result(self, completed: bool) -> CheckerResult:
+        return conjunction_result([checker.get_result(completed) for checker in self.checkers],
+                                  self.rules["vacuous_satisfaction"], completed)
+
+
+class SuccessionChecker(_ConjunctionChecker):
+    components = ((ResponseChecker, False), (PrecedenceChecker, False))
+
+
+class AlternateSuccessionChecker(_ConjunctionChecker):
+    components = ((AlternateResponseChecker, False), (AlternatePrecedenceChecker, False))
+
+
+class ChainSuccessionChecker(_ConjunctionChecker):
+    components = ((ChainResponseChecker, False), (ChainPrecedenceChecker, False))
+
+
+class CoExistenceChecker(_ConjunctionChecker):
+    components = ((RespondedExistenceChecker, False), (RespondedExistenceChecker, True))
+
+
+class NotCoExistenceChecker(_ConjunctionChecker):
+    components = ((NotRespondedExistenceChecker, False), (NotRespondedExistenceChecker, True))
+
+
+class NotSuccessionChecker(_ConjunctionChecker):
+    components = ((NotResponseChecker, False), (NotPrecedenceChecker, False))
+
+
+class NotChainSuccessionChecker(_ConjunctionChecker):
+    components = ((NotChainResponseChecker, False), (NotChainPrecedenceChecker, False))
+
+
+def _negative_state(vacuous_satisfaction: bool, completed: bool, num_activations: int,
+                    num_violations: int) -> Optional[TraceState]:
+    """
+    State of the templates that are violated as soon as a violation occurs (precedence and negative templates).
+    """
+    state = None
+    if not vacuous_satisfaction and num_activations == 0:
+        if completed:
+            state = TraceState.VIOLATED
+        else:
+            state = TraceState.POSSIBLY_VIOLATED
+    elif not completed and num_violations == 0:
+        state = TraceState.POSSIBLY_SATISFIED
+    elif num_violations > 0:
+        state = TraceState.VIOLATED
+    elif completed and num_violations == 0:
+        state = TraceState.SATISFIED
+    return state
+
+
+def _alternate_state(vacuous_satisfaction: bool, completed: bool, num_activations: int, num_violations: int,
+                     num_pendings: int) -> Optional[TraceState]:
+    """
+    State of the alternate and chain response templates.
+    """
+    state = None
+    if not vacuous_satisfaction and num_activations == 0:
+        if completed:
+            state = TraceState.VIOLATED
+        else:
+            state = TraceState.POSSIBLY_VIOLATED
+    elif not completed and num_violations == 0 and num_pendings > 0:
+        state = TraceState.POSSIBLY_VIOLATED
+    elif not completed and num_violations == 0 and num_pendings == 0:
+        state = TraceState.POSSIBLY_SATISFIED
+    elif num_violations > 0 or (completed and num_pendings > 0):
+        state = TraceState.VIOLATED
+    elif completed and num_violations == 0 and num_pendings == 0:
+        state = TraceState.SATISFIED
+    return state
+
+
+# Keyed by template name: the members of DeclareModelTemplate all compare equal as strings
+TEMPLATE_CHECKERS: Dict[str, Type[IncrementalTemplateChecker]] = {
+    DeclareModelTemplate.CHOICE.templ_str: ChoiceChecker,
+    DeclareModelTemplate.EXCLUSIVE_CHOICE.templ_str: ExclusiveChoiceChecker,
+    DeclareModelTemplate.EXISTENCE.templ_str: ExistenceChecker,
+    DeclareModelTemplate.ABSENCE.templ_str: AbsenceChecker,
+    DeclareModelTemplate.EXACTLY.templ_str: ExactlyChecker,
+    DeclareModelTemplate.INIT.templ_str: InitChecker,
+    DeclareModelTemplate.END.templ_str: EndChecker,
+    DeclareModelTemplate.RESPONDED_EXISTENCE.templ_str: RespondedExistenceChecker,
+    DeclareModelTemplate.RESPONSE.templ_str: ResponseChecker,
+    DeclareModelTemplate.ALTERNATE_RESPONSE.templ_str: AlternateResponseChecker,
+    DeclareModelTemplate.CHAIN_RESPONSE.templ_str: ChainResponseChecker,
+    DeclareModelTemplate.PRECEDENCE.templ_str: PrecedenceChecker,
+    DeclareModelTemplate.ALTERNATE_PRECEDENCE.templ_str: AlternatePrecedenceChecker,
+    DeclareModelTemplate.CHAIN_PRECEDENCE.templ_str: ChainPrecedenceChecker,
+    DeclareModelTemplate.NOT_RESPONDED_EXISTENCE.templ_str: NotRespondedExistenceChecker,
+    DeclareModelTemplate.NOT_RESPONSE.templ_str: NotResponseChecker,
+    DeclareModelTemplate.NOT_PRECEDENCE.templ_str: NotPrecedenceChecker,
+    DeclareModelTemplate.NOT_CHAIN_PRECEDENCE.templ_str: NotChainPrecedenceChecker,
+    DeclareModelTemplate.NOT_CHAIN_RESPONSE.templ_str: NotChainResponseChecker,
+    DeclareModelTemplate.SUCCESSION.templ_str: SuccessionChecker,
+    DeclareModelTemplate.ALTERNATE_SUCCESSION.templ_str: AlternateSuccessionChecker,
+    DeclareModelTemplate.CHAIN_SUCCESSION.templ_str: ChainSuccessionChecker,
+    DeclareModelTemplate.CO_EXISTENCE.templ_str: CoExistenceChecker,
+    DeclareModelTemplate.NOT_CO_EXISTENCE.templ_str: NotCoExistenceChecker,
+    DeclareModelTemplate.NOT_SUCCESSION.templ_str: NotSuccessionChecker,
+    DeclareModelTemplate.NOT_CHAIN_SUCCESSION.templ_str: NotChainSuccessionChecker,
+}
+
+
+# Templates whose result on a prefix can change with the events of any activity: they look at the first or the last
+# event of the prefix, or at the event following an activation
+POSITIONAL_TEMPLATES = {DeclareModelTemplate.INIT.templ_str, DeclareModelTemplate.END.templ_str,
+                        DeclareModelTemplate.CHAIN_RESPONSE.templ_str,
+                        DeclareModelTemplate.NOT_CHAIN_RESPONSE.templ_str,
+                        DeclareModelTemplate.CHAIN_SUCCESSION.templ_str,
+                        DeclareModelTemplate.NOT_CHAIN_SUCCESSION.templ_str}
+
+
+class FusedConstraintChecker:
+    """
+    Checks all the constraints of a MP-Declare model in a single pass over each trace. The conditions of the
+    constraints are compiled once, when the checker is built, and every event is dispatched through an
+    activity -> checkers index only to the constraints mentioning its activity. The shortcut templates (e.g.
+    Succession, Co-Existence) are checked as the conjunction of the two templates forming them. The checker is meant
+    to be built once per model and reused for all the traces of a log.
+
+    Parameters
+    ----------
+    decl_model: the MP-Declare model
+    consider_vacuity: True means that vacuously satisfied traces are considered as satisfied, violated otherwise
+    concept_name: the event attribute with the activity name
+
+    Example::
+
+        checker = FusedConstraintChecker(declare_model, consider_vacuity=True)
+        results = [checker.check_trace_conformance(trace) for trace in d4py_log.iter_traces()]
+    """
+
+    def __init__(self, decl_model: DeclareModel, consider_vacuity: bool = False, concept_name: str = "concept:name"):
+        self.decl_model: DeclareModel = decl_model
+        self.consider_vacuity: bool = consider_vacuity
+        self.concept_name: str = concept_name
+        # One entry per constraint: the incremental checker, or the rules to run the TemplateConstraintChecker with
+        # when its conditions cannot be parsed
+        self.checkers: List[Optional[IncrementalTemplateChecker]] = []
+        self.fallback_rules: Dict[int, dict] = {}
+        self.activity_index: Dict[str, List[IncrementalTemplateChecker]] = {}
+        # Used by check_trace_states: the positions of the constraints mentioning each activity, the state of each
+        # constraint on the traces without its activities (None when it must always be checked)
+        self.activity_constraints: Dict[str, List[int]] = {}
+        self.absence_states: List[Optional[TraceState]] = []
+        # Used on growing prefixes: the positions of the constraints whose checkers consume the events of each
+        # activity, and of the ones whose result can change with any event
+        self.dispatch_constraints: Dict[str, List[int]] = {}
+        self.positional_constraints: List[int] = []
+        # Set by set_columnar_log, the log the conditions are evaluated over
+        self.columnar_log: Optional[ColumnarLog] = None
+
+        for idx, constraint in enumerate(decl_model.constraints):
+            rules = {"vacuous_satisfaction": consider_vacuity, "activation": constraint['condition'][0]}
+            if constraint['template'].supports_cardinality:
+                rules["n"] = constraint['n']
+            if constraint['template'].is_binary:
+                rules["correlation"] = constraint['condition'][1]
+            rules["time"] = constraint['condition'][-1]  # time condition is always at last position
+
+            checker = None
+            malformed = False
+            checker_class = TEMPLATE_CHECKERS.get(constraint['template'].templ_str)
+            if checker_class is not None:
+                try:
+                    checker = checker_class(constraint['activities'], rules, concept_name)
+                except SyntaxError:
+                    malformed = True
+            self.checkers.append(checker)
+            # The conditions that cannot even be parsed fail on every trace, also on the ones without the activities
+            absence_outcome = None if malformed else ConstraintChecker.get_absence_outcome(constraint,
+                                                                                           consider_vacuity)
+            self.absence_states.append(absence_outcome[1] if absence_outcome is not None else None)
+            if absence_outcome is not None:
+                for activity in dict.fromkeys(absence_outcome[0] + list(constraint['activities'])):
+                    self.activity_constraints.setdefault(activity, []).append(idx)
+            if checker is None or constraint['template'].templ_str in POSITIONAL_TEMPLATES:
+                self.positional_constraints.append(idx)
+            if checker is None:
+                self.fallback_rules[idx] = rules
+                continue
+            for activity in checker.get_dispatch_activities():
+                self.activity_index.setdefault(activity, []).append(checker)
+                self.dispatch_constraints.setdefault(activity, []).append(idx)
+
+    def set_columnar_log(self, col_log: Optional[ColumnarLog]) -> None:
+        """
+        Evaluates the activation conditions, and the correlation conditions constraining only the target, over the
+        attribute columns of a log, each distinct condition once for all the events. The checkers then read the
+        outcome of each event from the resulting masks instead of calling the compiled conditions, when the traces
+        are checked with their position in the log. The conditions that cannot be evaluated over the columns, or
+        whose evaluation raises on some events of the activities of the constraint, are still called event by event.
+        The time conditions with known bounds read the timestamps of the events from the timestamp column.
+
+        Parameters
+        ----------
+        col_log: the columnar representation of the log whose traces are checked, None to drop the masks
+        """
+        self.columnar_log = col_log
+        # For each condition: the mask as a list, and the activities of the events on which the evaluation raises
+        masks: Dict[Tuple[str, str], Optional[Tuple[List[bool], set]]] = {}
+
+        def get_mask(source: str, subject: str, activities: List[str]) -> Optional[List[bool]]:
+            if (source, subject) not in masks:
+                evaluation = evaluate_condition(source, col_log, subject)
+                if evaluation is not None:
+                    values, errors = evaluation
+                    evaluation = values.tolist(), set(np.unique(np.asarray(col_log.activity_ids)[errors]).tolist())
+                masks[(source, subject)] = evaluation
+            evaluation = masks[(source, subject)]
+            if evaluation is None or any(col_log.get_activity_id(activity) in evaluation[1]
+                                         for activity in activities):
+                return None
+            return evaluation[0]
+
+        timestamps = None
+        for checker in self.checkers:
+            if checker is None:
+                continue
+            checker.activation_mask = checker.target_mask = checker.timestamps = None
+            if col_log is None:
+                continue
+            activities = checker.get_dispatch_activities()
+            if not checker.activation_rules.always_true:
+                checker.activation_mask = get_mask(checker.activation_rules.source, "A", activities)
+            if isinstance(getattr(checker, "time_rule", None), CompiledTimeCondition) \
+                    and col_log.timestamp_key == CompiledTimeCondition.TIMESTAMP_KEY:
+                if timestamps is None:
+                    timestamps = np.asarray(col_log.timestamps).tolist()
+                checker.timestamps = timestamps
+            correlation_rules = getattr(checker, "correlation_rules", None)
+            if correlation_rules is not None and not correlation_rules.always_true \
+                    and refers_only_to(correlation_rules.source, "T"):
+                checker.target_mask = get_mask(correlation_rules.source, "T", activities)
+
+    def _reset_checkers(self, trace, trace_id: Optional[int], constraints: Optional[Iterable[int]] = None) -> None:
+        mask_offset = None
+        if trace_id is not None and self.columnar_log is not None:
+            mask_offset = int(self.columnar_log.trace_offsets[trace_id])
+        for idx in range(len(self.checkers)) if constraints is None else constraints:
+            checker = self.checkers[idx]
+            if checker is not None:
+                checker.reset(trace)
+                checker.mask_offset = mask_offset
+
+    def check_trace_conformance(self, trace, completed: bool = True, trace_id: Optional[int] = None) \
+            -> List[Optional[CheckerResult]]:
+        """
+        Checks all the constraints of the model on a trace. The results are the same as the ones of
+        ConstraintChecker.check_trace_conformance, except that constraints whose conditions are not properly
+        formatted are reported and get None, so that the i-th result is always the one of the i-th constraint.
+
+        Parameters
+        ----------
+        trace: the trace to check
+        completed: whether the trace is complete or a prefix of a running case
+        trace_id: the position of the trace in the log set with set_columnar_log, to read the outcomes of the
+            conditions from the masks. Ignored when no log is set.
+
+        Returns
+        -------
+        the list with a CheckerResult, or None, for each constraint of the model
+        """
+        concept_name = self.concept_name
+        activity_index = self.activity_index
+        self._reset_checkers(trace, trace_id)
+
+        for index, event in enumerate(trace):
+            checkers = activity_index.get(event[concept_name])
+            if checkers is None:
+                continue
+            activity = event[concept_name]
+            for checker in checkers:
+                if checker.failed:
+                    continue
+                try:
+                    checker.on_event(index, event, activity)
+                except SyntaxError:
+                    checker.failed = True
+
+        trace_results = []
+        error_constraint_set = set()
+        for idx, checker in enumerate(self.checkers):
+            try:
+                if checker is None:
+                    constraint = self.decl_model.constraints[idx]
+                    trace_results.append(TemplateConstraintChecker(trace, completed, constraint['activities'],
+                                                                   self.fallback_rules[idx], concept_name)
+                                         .get_template(constraint['template'])())
+                elif checker.failed:
+                    raise SyntaxError
+                else:
+                    trace_results.append(checker.get_result(completed))
+            except SyntaxError:
+                trace_results.append(None)
+                constraint_str = self.decl_model.serialized_constraints[idx]
+                if constraint_str not in error_constraint_set:
+                    error_constraint_set.add(constraint_str)
+                    print('Condition not properly formatted for constraint "' + constraint_str + '".')
+        return trace_results
+
+    def check_trace_states(self, trace, trace_id: Optional[int] = None) -> List[Optional[TraceState]]:
+        """
+        Computes only the state of each constraint of the model on a completed trace. The constraints none of whose
+        activities occur in the trace are not checked, their state is known in advance, and the checkers stop
+        consuming events once their state is decided. Constraints whose conditions are not properly formatted get
+        None, without being reported.
+
+        Parameters
+        ----------
+        trace: the trace to check
+        trace_id: the position of the trace in the log set with set_columnar_log, as in check_trace_conformance
+
+        Returns
+        -------
+        the list with the state of each constraint of the model
+        """
+        concept_name = self.concept_name
+        states = list(self.absence_states)
+        checked = [idx for idx, state in enumerate(states) if state is None]
+        for activity in {event[concept_name] for event in trace}:
+            checked += self.activity_constraints.get(activity, [])
+        checked = set(checked)
+        checkers = self.checkers
+        self._reset_checkers(trace, trace_id, checked)
+
+        for index, event in enumerate(trace):
+            activity = event[concept_name]
+            for checker in self.activity_index.get(activity, []):
+                if checker.failed or checker.decided:
+                    continue
+                try:
+                    checker.on_event(index, event, activity)
+                except SyntaxError:
+                    checker.failed = True
+
+        for idx in checked:
+            checker = checkers[idx]
+            try:
+                if checker is None:
+                    constraint = self.decl_model.constraints[idx]
+                    states[idx] = TemplateConstraintChecker(trace, True, constraint['activities'],
+                                                            self.fallback_rules[idx], concept_name) \
+                        .get_template(constraint['template'])().state
+                elif checker.failed:
+                    states[idx] = None
+                else:
+                    states[idx] = checker.get_result(True).state
+            except SyntaxError:
+                states[idx] = None
+        return states
+
+    def check_trace_prefixes(self, trace) -> Iterator[List[Tuple[int, Optional[CheckerResult]]]]:
+        """
+        Checks all the constraints of the model on every prefix of a trace, walking the trace once. The results on a
+        prefix are the ones of check_trace_conformance with completed=False. After each event, only the results that
+        the event may have changed are computed: the ones of all the constraints at the first event, then the ones
+        of the constraints mentioning the activity of the event and of the positional ones.
+
+        Parameters
+        ----------
+        trace: the trace to check
+
+        Returns
+        -------
+        for each event, the list of the (position of the constraint, result) pairs computed after it. Constraints
+        whose conditions are not properly formatted get None, without being reported.
+        """
+        concept_name = self.concept_name
+        checkers = self.checkers
+        prefix = []
+        for checker in checkers:
+            if checker is not None:
+                checker.reset(prefix)
+
+        for index, event in enumerate(trace):
+            prefix.append(event)
+            activity = event[concept_name]
+            dispatch_constraints = self.dispatch_constraints.get(activity, [])
+            for idx in dispatch_constraints:
+                checker = checkers[idx]
+                if checker.failed:
+                    continue
+                try:
+                    checker.on_event(index, event, activity)
+                except SyntaxError:
+                    checker.failed = True
+            if index == 0:
+                to_update = range(len(checkers))
+            else:
+                to_update = dict.fromkeys(dispatch_constraints + self.positional_constraints)
+            yield [(idx, self.get_prefix_result(prefix, idx)) for idx in to_update]
+
+    def get_prefix_result(self, prefix: list, idx: int, completed: bool = False,
+                          checkers: Optional[List[Optional[IncrementalTemplateChecker]]] = None) \
+            -> Optional[CheckerResult]:
+        """
+        Returns the result of the idx-th constraint on the events consumed so far by its checker, which form the
+        given prefix. None if the conditions of the constraint are not properly formatted.
+
+        Parameters
+        ----------
+        prefix: the events consumed so far
+        idx: the position of the constraint in the model
+        completed: whether the prefix is the whole trace
+        checkers: the checkers of the constraints, e.g. clones of the ones of this object, by default the ones of this
+            object
+        """
+        checker = (self.checkers if checkers is None else checkers)[idx]
+        try:
+            if checker is None:
+                constraint = self.decl_model.constraints[idx]
+                return TemplateConstraintChecker(prefix, completed, constraint['activities'], self.fallback_rules[idx],
+                                                 self.concept_name).get_template(constraint['template'])()
+            if checker.failed:
+                return None
+            return checker.get_result(completed)
+        except SyntaxError:
+            return None
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from Declare4Py.ProcessModels.DeclareModel import CompiledCondition, CompiledTimeCondition
+
+
+class PendingActivations:
+    """
+    Activations of a (not) responded existence / (not) response constraint waiting for a target. A target removes all
+    the pending activations it satisfies the correlation and time conditions with, so the cost of a target is not tied
+    to the number of pending activations in the common cases:
+
+    * without correlation and time conditions, a target matches all the pendings, which are dropped at once;
+    * with a correlation condition made only of 'same' clauses, the pendings are indexed by the values of the
+      attributes and a target only looks at the ones with its own values;
+    * with a time condition and no correlation condition, the pendings are sorted by timestamp and a target drops the
+      ones within the time bounds with a binary search;
+    * otherwise, all the pendings are scanned, latest first.
+
+    Parameters
+    ----------
+    correlation_rules: the compiled correlation condition
+    time_rule: the compiled time condition
+    same_attributes: the attributes of the 'same' clauses when the correlation condition is made only of them
+    """
+
+    def __init__(self, correlation_rules: CompiledCondition, time_rule: CompiledCondition,
+                 same_attributes: Optional[List[str]] = None):
+        self.correlation_rules: CompiledCondition = correlation_rules
+        self.time_rule: CompiledCondition = time_rule
+        self.match_all: bool = correlation_rules.always_true and time_rule.always_true
+        self.same_attributes: Optional[Tuple[str, ...]] = tuple(same_attributes) if same_attributes else None
+        self.pendings: List[dict] = []
+        # Used only with 'same' correlation conditions
+        self.indexed: Dict[tuple, List[dict]] = {}
+        self.num_unmatchable: int = 0  # pendings without some of the attributes, no target can match them
+        self.num_indexed: int = 0
+        # Used only with time conditions without correlation conditions: the timestamps of the pendings, as sorted
+        # integer nanoseconds, and the pendings in the same order
+        self.time_window: bool = correlation_rules.always_true and isinstance(time_rule, CompiledTimeCondition)
+        self.timestamps: List[int] = []
+        self.timed: List[dict] = []
+
+    def __len__(self):
+        return len(self.pendings) + self.num_indexed + self.num_unmatchable + len(self.timed)
+
+    def clear(self) -> None:
+        self.pendings = []
+        self.indexed = {}
+        self.num_unmatchable = 0
+        self.num_indexed = 0
+        self.timestamps = []
+        self.timed = []
+
+    def copy(self) -> PendingActivations:
+        pendings = PendingActivations(self.correlation_rules, self.time_rule, self.same_attributes)
+        pendings.pendings = list(self.pendings)
+        pendings.indexed = {key: list(bucket) for key, bucket in self.indexed.items()}
+        pendings.num_unmatchable = self.num_unmatchable
+        pendings.num_indexed = self.num_indexed
+        pendings.timestamps = list(self.timestamps)
+        pendings.timed = list(self.timed)
+        return pendings
+
+    def append(self, activation: dict, timestamp: Optional[int] = None) -> None:
+        """
+        Adds a pending activation. Its timestamp, as integer nanoseconds, is read from the activation when not given.
+        """
+        if self.time_window:
+            if timestamp is None:
+                timestamp = CompiledTimeCondition.get_timestamp(activation)
+            if timestamp is not None:
+                if not self.timestamps or timestamp >= self.timestamps[-1]:  # events usually come in time order
+                    self.timestamps.append(timestamp)
+                    self.timed.append(activation)
+                else:
+                    position = bisect_right(self.timestamps, timestamp)
+                    self.timestamps.insert(position, timestamp)
+                    self.timed.insert(position, activation)
+                return
+        if self.same_attributes is not None:
+            key = self._get_key(activation)
+            if key is None:
+                self.num_unmatchable += 1
+                return
+            try:
+                self.indexed.setdefault(key, []).append(activation)
+                self.num_indexed += 1
+                return
+            except TypeError:  # unhashable attribute values, the activation is scanned by every target
+                pass
+        self.pendings.append(activation)
+
+    def match(self, target: dict, timestamp: Optional[int] = None) -> int:
+        """
+        Removes the pending activations matched by the target and returns how many they are. The timestamp of the
+        target, as integer nanoseconds, is read from the target when not given.
+        """
+        if self.match_all:
+            num_matched = len(self.pendings)
+            self.pendings = []
+            return num_matched
+        num_matched = 0
+        if self.timed:
+            if timestamp is None:
+                timestamp = CompiledTimeCondition.get_timestamp(target)
+            if timestamp is None:  # the time condition is evaluated on each pending, as it would fail
+                self.timed, num_matched = self._scan(self.timed, target)
+                self.timestamps = [CompiledTimeCondition.get_timestamp(activation) for activation in self.timed]
+            else:
+                num_matched = self._match_window(timestamp)
+        if self.indexed:
+            key = self._get_key(target)
+            if key is not None:
+                try:
+                    bucket = self.indexed.get(key)
+                except TypeError:  # unhashable attribute values: look at all the indexed activations
+                    for key, bucket in list(self.indexed.items()):
+                        num_matched += self._match_bucket(key, bucket, target)
+                else:
+                    if bucket is not None:
+                        num_matched += self._match_bucket(key, bucket, target)
+        if self.pendings:
+            kept, num_scan_matched = self._scan(self.pendings, target)
+            self.pendings = kept
+            num_matched += num_scan_matched
+        return num_matched
+
+    def _match_bucket(self, key: tuple, bucket: List[dict], target: dict) -> int:
+        kept, num_matched = self._scan(bucket, target)
+        if kept:
+            self.indexed[key] = kept
+        else:
+            del self.indexed[key]
+        self.num_indexed -= num_matched
+        return num_matched
+
+    def _match_window(self, timestamp: int) -> int:
+        num_matched = 0
+        # The later window first, so that the positions of the earlier one are not shifted
+        for low, high in reversed(self.time_rule.get_windows(timestamp)):
+            start, end = bisect_left(self.timestamps, low), bisect_right(self.timestamps, high)
+            if start < end:
+                del self.timestamps[start:end]
+                del self.timed[start:end]
+                num_matched += end - start
+        return num_matched
+
+    def _scan(self, pendings: List[dict], target: dict) -> Tuple[List[dict], int]:
+        correlation_rules, time_rule = self.correlation_rules.predicate, self.time_rule.predicate
+        matched = [idx for idx in range(len(pendings) - 1, -1, -1)
+                   if correlation_rules(pendings[idx], target) and time_rule(pendings[idx], target)]
+        if not matched:
+            return pendings, 0
+        matched = set(matched)
+        return [A for idx, A in enumerate(pendings) if idx not in matched], len(matched)
+
+    def _get_key(self, event: dict) -> Optional[tuple]:
+        try:
+            return tuple(event[attr] for attr in self.same_attributes)
+        except KeyError:
+            return None
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Declare4Py.D4PyEventLog import D4PyEventLog
+from Declare4Py.ProcessModels.DeclareModel import DeclareModelTemplate
+
+"""
+Support of control-flow Declare constraints computed from the positions of the activities in the variants of a log.
+The outcome of a constraint without data and time conditions on a trace only depends on where its activities occur, so
+all the templates of an activity pair are evaluated together by looking only at the variants containing the activities.
+The outcomes are the same as the ones of TemplateConstraintChecker on completed traces.
+"""
+
+UNARY_TEMPLATES: Tuple[DeclareModelTemplate, ...] = (
+    DeclareModelTemplate.EXISTENCE, DeclareModelTemplate.ABSENCE, DeclareModelTemplate.EXACTLY,
+    DeclareModelTemplate.INIT, DeclareModelTemplate.END)
+
+# The order of the outcomes returned by _binary_outcomes
+BINARY_TEMPLATES: Tuple[DeclareModelTemplate, ...] = (
+    DeclareModelTemplate.CHOICE, DeclareModelTemplate.EXCLUSIVE_CHOICE, DeclareModelTemplate.RESPONDED_EXISTENCE,
+    DeclareModelTemplate.RESPONSE, DeclareModelTemplate.ALTERNATE_RESPONSE, DeclareModelTemplate.CHAIN_RESPONSE,
+    DeclareModelTemplate.PRECEDENCE, DeclareModelTemplate.ALTERNATE_PRECEDENCE, DeclareModelTemplate.CHAIN_PRECEDENCE,
+    DeclareModelTemplate.NOT_RESPONDED_EXISTENCE, DeclareModelTemplate.NOT_RESPONSE,
+    DeclareModelTemplate.NOT_PRECEDENCE, DeclareModelTemplate.NOT_CHAIN_RESPONSE,
+    DeclareModelTemplate.NOT_CHAIN_PRECEDENCE)
+
+
+def _responds_alternately(activations: List[int], targets: List[int]) -> bool:
+    """
+    True if every activation is followed by a target before the next activation.
+    """
+    t_idx = 0
+    num_targets = len(targets)
+    for a_idx, pos in enumerate(activations):
+        while t_idx < num_targets and targets[t_idx] < pos:
+            t_idx += 1
+        if t_idx == num_targets:
+            return False
+        if a_idx + 1 < len(activations) and targets[t_idx] > activations[a_idx + 1]:
+            return False
+    return True
+
+
+def _preceded_alternately(activations: List[int], targets: List[int]) -> bool:
+    """
+    True if every activation is preceded by a target after the previous activation.
+    """
+    t_idx = 0
+    num_targets = len(targets)
+    previous = -1
+    for pos in activations:
+        while t_idx < num_targets and targets[t_idx] < previous:
+            t_idx += 1
+        if t_idx == num_targets or targets[t_idx] > pos:
+            return False
+        previous = pos
+    return True
+
+
+def _binary_outcomes(variant: Tuple[str, ...], pos_a: List[int], pos_b: List[int], act_a: str, act_b: str,
+                     vacuous: bool) -> Tuple[bool, ...]:
+    """
+    Tells whether the trace of a variant satisfies each template of BINARY_TEMPLATES with activities [act_a, act_b],
+    given the positions of the two activities in the trace.
+    """
+    num_a, num_b = len(pos_a), len(pos_b)
+    last = len(variant) - 1
+    a_followed_by_b = any(pos < last and variant[pos + 1] == act_b for pos in pos_a)
+    # Traces without the activation (act_a for the response templates, act_b for the precedence ones) are vacuous
+    return (num_a + num_b > 0,
+            (num_a > 0) != (num_b > 0),
+            num_b > 0 if num_a else vacuous,
+            (num_b > 0 and pos_b[-1] > pos_a[-1]) if num_a else vacuous,
+            _responds_alternately(pos_a, pos_b) if num_a else vacuous,
+            all(pos < last and variant[pos + 1] == act_b for pos in pos_a) if num_a else vacuous,
+            (num_a > 0 and pos_a[0] < pos_b[0]) if num_b else vacuous,
+            _preceded_alternately(pos_b, pos_a) if num_b else vacuous,
+            all(pos > 0 and variant[pos - 1] == act_a for pos in pos_b) if num_b else vacuous,
+            num_b == 0 if num_a else vacuous,
+            (num_b == 0 or pos_b[-1] < pos_a[0]) if num_a else vacuous,
+            (num_a == 0 or pos_a[0] > pos_b[-1]) if num_b else vacuous,
+            not a_followed_by_b if num_a else vacuous,
+            not a_followed_by_b if num_b else vacuous)
+
+
+class DeclareSupportEngine:
+    """
+    Computes the support of control-flow Declare constraints, i.e. the fraction of the traces of the log satisfying
+    them, for all the templates of an activity (or of an activity pair) at once. The log is reduced to its variants and
+    the positions of each activity in each variant are collected once, when the engine is built; the support of an
+    activity pair then only looks at the variants containing one of its activities, while the remaining traces are
+    vacuous for all the templates.
+
+    Parameters
+    ----------
+    event_log: the log to compute the supports on
+    consider_vacuity: True means that vacuously satisfied traces are considered as satisfied, violated otherwise
+
+    Example::
+
+        engine = DeclareSupportEngine(d4py_log, consider_vacuity=False)
+        supports, reversed_supports = engine.get_binary_supports("A", "B")
+        print(supports[DeclareModelTemplate.RESPONSE.templ_str])  # support of Response[A, B]
+    """
+
+    def __init__(self, event_log: D4PyEventLog, consider_vacuity: bool):
+        variant_log = event_log.get_variant_log()
+        self.consider_vacuity: bool = consider_vacuity
+        self.log_length: int = event_log.get_length()
+        self.variants: List[Tuple[str, ...]] = variant_log.variants
+        self.counts: List[int] = variant_log.counts.tolist()
+        # activity -> variant -> sorted positions of the activity in the variant
+        self.positions: Dict[str, Dict[int, List[int]]] = {}
+        for var_idx, variant in enumerate(self.variants):
+            for pos, activity in enumerate(variant):
+                self.positions.setdefault(activity, {}).setdefault(var_idx, []).append(pos)
+
+    def get_unary_supports(self, activity: str, max_cardinality: int = 1) -> Dict[Tuple[str, Optional[int]], float]:
+        """
+        Computes the support of the unary templates on an activity.
+
+        Parameters
+        ----------
+        activity: the activity of the constraints
+        max_cardinality: the templates with cardinality are evaluated for n from 1 to max_cardinality
+
+        Returns
+        -------
+        a dictionary with keys (template name, n), with n None for the templates without cardinality, and values the
+        supports
+        """
+        occurrences = self.positions.get(activity, {})
+        sat_counts: Dict[Tuple[str, Optional[int]], int] = {}
+        for template in UNARY_TEMPLATES:
+            for n in (range(1, max_cardinality + 1) if template.supports_cardinality else (None,)):
+                sat_counts[(template.templ_str, n)] = 0
+
+        absent = self.log_length
+        for var_idx, positions in occurrences.items():
+            count = self.counts[var_idx]
+            absent -= count
+            num = len(positions)
+            for n in range(1, max_cardinality + 1):
+                if num >= n:
+                    sat_counts[(DeclareModelTemplate.EXISTENCE.templ_str, n)] += count
+                else:
+                    sat_counts[(DeclareModelTemplate.ABSENCE.templ_str, n)] += count
+                if num == n:
+                    sat_counts[(DeclareModelTemplate.EXACTLY.templ_str, n)] += count
+            if positions[0] == 0:
+                sat_counts[(DeclareModelTemplate.INIT.templ_str, None)] += count
+            if positions[-1] == len(self.variants[var_idx]) - 1:
+                sat_counts[(DeclareModelTemplate.END.templ_str, None)] += count
+        # Traces without the activity satisfy only Absence
+        for n in range(1, max_cardinality + 1):
+            sat_counts[(DeclareModelTemplate.ABSENCE.templ_str, n)] += absent
+        return {key: sat / self.log_length for key, sat in sat_counts.items()}
+
+    def get_binary_supports(self, act_a: str, act_b: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Computes the support of the binary templates on an activity pair, in both orientations, with a single scan of
+        the variants containing the activities.
+
+        Parameters
+        ----------
+        act_a: the first activity
+        act_b: the second activity, different from the first one
+
+        Returns
+        -------
+        two dictionaries with keys the template names and values the supports of the constraints with activities
+        [act_a, act_b] and [act_b, act_a] respectively
+        """
+        occurrences_a = self.positions.get(act_a, {})
+        occurrences_b = self.positions.get(act_b, {})
+        vacuous = self.consider_vacuity
+        sat_counts = [0] * len(BINARY_TEMPLATES)
+        reversed_sat_counts = [0] * len(BINARY_TEMPLATES)
+        absent = self.log_length
+        for var_idx in occurrences_a.keys() | occurrences_b.keys():
+            count = self.counts[var_idx]
+            absent -= count
+            variant = self.variants[var_idx]
+            pos_a = occurrences_a.get(var_idx, [])
+            pos_b = occurrences_b.get(var_idx, [])
+            for t_idx, sat in enumerate(_binary_outcomes(variant, pos_a, pos_b, act_a, act_b, vacuous)):
+                if sat:
+                    sat_counts[t_idx] += count
+            for t_idx, sat in enumerate(_binary_outcomes(variant, pos_b, pos_a, act_b, act_a, vacuous)):
+                if sat:
+                    reversed_sat_counts[t_idx] += count
+        # Traces without both activities violate the choices and are vacuous for all the other templates
+        if vacuous:
+            for t_idx, template in enumerate(BINARY_TEMPLATES):
+                if not template.both_activation_condition:
+                    sat_counts[t_idx] += absent
+                    reversed_sat_counts[t_idx] += absent
+        return ({template.templ_str: sat / self.log_length for template, sat in zip(BINARY_TEMPLATES, sat_counts)},
+                {template.templ_str: sat / self.log_length
+                 for template, sat in zip(BINARY_TEMPLATES, reversed_sat_counts)})
+
+    def get_support_matrices(self, activities: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Computes the support of the binary templates on all the ordered pairs of distinct activities of a list, with a
+        single scan of the variants. A trace containing only one of the activities of a pair, or none of them, has an
+        outcome that only depends on which activities it contains, so these traces are counted from the number of
+        traces containing each activity and each pair; only the pairs co-occurring in a variant are evaluated on it.
+
+        Parameters
+        ----------
+        activities: the activities of the pairs
+
+        Returns
+        -------
+        a dictionary with keys the template names and values the matrices whose cell [i, j] is the support of the
+        constraint with activities [activities[i], activities[j]], with zeros on the diagonal
+        """
+        num_activities = len(activities)
+        activity_ids = {activity: act_id for act_id, activity in enumerate(activities)}
+        vacuous = self.consider_vacuity
+        num_traces = np.zeros(num_activities, dtype=np.int64)
+        num_both = np.zeros((num_activities, num_activities), dtype=np.int64)
+        sat_both = np.zeros((len(BINARY_TEMPLATES), num_activities, num_activities), dtype=np.int64)
+        for act_id, activity in enumerate(activities):
+            num_traces[act_id] = sum(self.counts[var_idx] for var_idx in self.positions.get(activity, {}))
+
+        for var_idx, variant in enumerate(self.variants):
+            count = self.counts[var_idx]
+            present = [(activity_ids[activity], activity, self.positions[activity][var_idx])
+                       for activity in dict.fromkeys(variant) if activity in activity_ids]
+            for id_a, act_a, pos_a in present:
+                for id_b, act_b, pos_b in present:
+                    if id_a == id_b:
+                        continue
+                    num_both[id_a, id_b] += count
+                    outcomes = _binary_outcomes(variant, pos_a, pos_b, act_a, act_b, vacuous)
+                    sat_both[:, id_a, id_b] += np.asarray(outcomes, dtype=np.int64) * count
+
+        # Outcomes of the traces with only the first activity, only the second one and none of them
+        only_a = np.asarray(_binary_outcomes(("a",), [0], [], "a", "b", vacuous), dtype=np.int64)
+        only_b = np.asarray(_binary_outcomes(("b",), [], [0], "a", "b", vacuous), dtype=np.int64)
+        neither = np.asarray(_binary_outcomes(("c",), [], [], "a", "b", vacuous), dtype=np.int64)
+        num_only_a = num_traces[:, None] - num_both
+        num_only_b = num_traces[None, :] - num_both
+        num_neither = self.log_length - num_traces[:, None] - num_traces[None, :] + num_both
+        support_matrices = {}
+        for t_idx, template in enumerate(BINARY_TEMPLATES):
+            sat = sat_both[t_idx] + num_only_a * only_a[t_idx] + num_only_b * only_b[t_idx] \
+                  + num_neither * neither[t_idx]
+            np.fill_diagonal(sat, 0)
+            support_matrices[template.templ_str] = sat / self.log_length
+        return support_matrices
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+class ActivityPostingIndex:
+    """
+    Inverted index from the activities of a log to the traces they occur in. For each activity it keeps the sorted
+    positions in the log of the traces containing it and, for each of these traces, the positions of the occurrences
+    of the activity in the trace. Tasks can resolve in bulk the traces not containing the activities of a constraint and
+    only scan the other ones.
+
+    Attributes:
+        n_traces: the number of traces of the log.
+        activities: the activities of the log.
+        case_ids: for each activity, the sorted int64 array of the positions of the traces containing it.
+        offsets: for each activity, the int64 array with the start in 'positions' of the occurrences in each of its
+            traces, plus a final end offset.
+        positions: for each activity, the int64 array of the positions of its occurrences, trace after trace.
+    """
+
+    def __init__(self, n_traces: int):
+        self.n_traces: int = n_traces
+        self.activities: List[str] = []
+        self.case_ids: Dict[str, np.ndarray] = {}
+        self.offsets: Dict[str, np.ndarray] = {}
+        self.positions: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_activity_ids(cls, activities: List[str], activity_ids: np.ndarray,
+                          trace_offsets: np.ndarray) -> ActivityPostingIndex:
+        """
+        Builds the index from the integer-encoded activities of the events of the log, concatenated trace after trace.
+
+        Args:
+            activities: the names of the activities, indexed by their ids.
+            activity_ids: the activity id of each event.
+            trace_offsets: the start of each trace in 'activity_ids', plus a final end offset.
+        """
+        trace_offsets = np.asarray(trace_offsets, dtype=np.int64)
+        activity_ids = np.asarray(activity_ids, dtype=np.int64)
+        index = cls(len(trace_offsets) - 1)
+        trace_lengths = np.diff(trace_offsets)
+        event_traces = np.repeat(np.arange(index.n_traces, dtype=np.int64), trace_lengths)
+        event_positions = np.arange(len(activity_ids), dtype=np.int64) - np.repeat(trace_offsets[:-1], trace_lengths)
+        # The events are in log order, a stable sort keeps them sorted by trace and position within each activity
+        order = np.argsort(activity_ids, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(activity_ids, minlength=len(activities)))))
+        for act_id, activity in enumerate(activities):
+            events = order[bounds[act_id]:bounds[act_id + 1]]
+            if len(events) == 0:
+                continue
+            traces = event_traces[events]
+            starts = np.flatnonzero(np.concatenate(([True], traces[1:] != traces[:-1])))
+            index.activities.append(activity)
+            index.case_ids[activity] = traces[starts]
+            index.offsets[activity] = np.append(starts, len(events)).astype(np.int64)
+            index.positions[activity] = event_positions[events]
+        return index
+
+    @classmethod
+    def from_traces(cls, traces: Iterable, activity_key: str) -> ActivityPostingIndex:
+        """
+        Builds the index from the traces of the log.
+        """
+        activity_index: Dict[str, int] = {}
+        activity_ids = []
+        trace_offsets = [0]
+        for trace in traces:
+            activity_ids += [activity_index.setdefault(event[activity_key], len(activity_index)) for event in trace]
+            trace_offsets.append(len(activity_ids))
+        return cls.from_activity_ids(list(activity_index), np.asarray(activity_ids, dtype=np.int64),
+                                     np.asarray(trace_offsets, dtype=np.int64))
+
+    def get_cases(self, activity: str) -> np.ndarray:
+        """
+        Returns the sorted positions of the traces containing the activity.
+        """
+        return self.case_ids.get(activity, np.zeros(0, dtype=np.int64))
+
+    def get_cases_with_any(self, activities: Iterable[str]) -> np.ndarray:
+        """
+        Returns the sorted positions of the traces containing at least one of the activities.
+        """
+        cases = np.zeros(0, dtype=np.int64)
+        for activity in activities:
+            cases = np.union1d(cases, self.get_cases(activity))
+        return cases
+
+    def get_cases_with_all(self, activities: Iterable[str]) -> np.ndarray:
+        """
+        Returns the sorted positions of the traces containing all the activities.
+        """
+        cases = None
+        for activity in activities:
+            act_cases = self.get_cases(activity)
+            cases = act_cases if cases is None else np.intersect1d(cases, act_cases, assume_unique=True)
+        return cases if cases is not None else np.arange(self.n_traces, dtype=np.int64)
+
+    def get_positions(self, activity: str, case_id: int) -> np.ndarray:
+        """
+        Returns the positions of the occurrences of the activity in the case_id-th trace of the log.
+        """
+        case_ids = self.get_cases(activity)
+        idx = np.searchsorted(case_ids, case_id)
+        if idx == len(case_ids) or case_ids[idx] != case_id:
+            return np.zeros(0, dtype=np.int64)
+        offsets = self.offsets[activity]
+        return self.positions[activity][offsets[idx]:offsets[idx + 1]]
+
+    def get_num_cases(self, activity: str) -> int:
+        """
+        Returns the number of traces containing the activity.
+        """
+        return len(self.get_cases(activity))
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from Declare4Py.Utils.DFATable import DFATable
+
+
+class PrefixTrie:
+    """
+    Prefix tree of a set of sequences of letters (e.g. the variants of a log): sequences sharing a prefix share the
+    nodes of the prefix. An automaton is run once per node instead of once per event of each sequence, and the
+    outcome of each sequence is read at the node where it ends.
+
+    Attributes:
+        letters: the distinct letters of the sequences, indexed by their ids.
+        parents: int64 array with the parent of each node, -1 for the root (node 0).
+        node_letters: int64 array with the id of the letter labelling the edge from the parent to each node, -1 for
+            the root.
+        levels: for each depth, the int64 array of the nodes at that depth.
+        end_nodes: int64 array with the node where each sequence ends.
+    """
+
+    def __init__(self):
+        self.letters: List[Any] = []
+        self.parents: np.ndarray = np.full(1, -1, dtype=np.int64)
+        self.node_letters: np.ndarray = np.full(1, -1, dtype=np.int64)
+        self.levels: List[np.ndarray] = [np.zeros(1, dtype=np.int64)]
+        self.end_nodes: np.ndarray = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[Tuple[Any, ...]]) -> PrefixTrie:
+        """
+        Builds the tree of the given sequences of letters.
+        """
+        trie = cls()
+        letter_index: Dict[Any, int] = {}
+        children: Dict[Tuple[int, int], int] = {}
+        parents, node_letters, depths = [-1], [-1], [0]
+        end_nodes = []
+        for sequence in sequences:
+            node = 0
+            for letter in sequence:
+                letter_id = letter_index.setdefault(letter, len(letter_index))
+                child = children.get((node, letter_id))
+                if child is None:
+                    child = children[(node, letter_id)] = len(parents)
+                    parents.append(node)
+                    node_letters.append(letter_id)
+                    depths.append(depths[node] + 1)
+                node = child
+            end_nodes.append(node)
+        trie.letters = list(letter_index)
+        trie.parents = np.asarray(parents, dtype=np.int64)
+        trie.node_letters = np.asarray(node_letters, dtype=np.int64)
+        depths = np.asarray(depths, dtype=np.int64)
+        order = np.argsort(depths, kind="stable")
+        trie.levels = np.split(order, np.cumsum(np.bincount(depths))[:-1])
+        trie.end_nodes = np.asarray(end_nodes, dtype=np.int64)
+        return trie
+
+    def __len__(self):
+        return len(self.parents)
+
+    def run_dfa(self, table: DFATable) -> np.ndarray:
+        """
+        Runs the automaton on the tree, one level at a time. The nodes below a node in a sink state are not run, they
+        take the state of their parent.
+
+        Args:
+            table: the automaton, compiled over the letters of the tree.
+
+        Returns:
+            the bool array telling, for each sequence, whether the automaton accepts it.
+        """
+        states = np.full(len(self.parents), table.initial_state, dtype=np.int64)
+        for nodes in self.levels[1:]:
+            parent_states = states[self.parents[nodes]]
+            live = ~table.sinks[parent_states]
+            states[nodes] = parent_states
+            states[nodes[live]] = table.transitions[parent_states[live], self.node_letters[nodes[live]]]
+        return table.accepting[states[self.end_nodes]]
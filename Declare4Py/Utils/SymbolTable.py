@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Declare4Py.Utils.DFATable import encode_proposition
+
+
+class SymbolTable:
+    """
+    Encoding of the events of a log as letter ids, a letter being the tuple of the values of some event attributes.
+    The propositions of the LTLf formulas matched by each letter are computed once per letter and backend, so checking
+    a trace only takes an array lookup per event.
+
+    Attributes:
+        attributes: the event attributes the letters are made of.
+        letters: the distinct letters, indexed by their ids.
+        letter_index: the id of each letter.
+        codes: int64 array with the letter id of each event of the encoded traces, concatenated trace after trace.
+        offsets: int64 array with the start of each trace in 'codes', plus a final end offset.
+    """
+
+    def __init__(self, attributes: Sequence[str]):
+        self.attributes: Tuple[str, ...] = tuple(attributes)
+        self.letters: List[Tuple[Any, ...]] = []
+        self.letter_index: Dict[Tuple[Any, ...], int] = {}
+        self.codes: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self._propositions: Dict[Tuple[str, Tuple[str, ...]], List[Dict[str, bool]]] = {}
+
+    @classmethod
+    def from_traces(cls, traces: Iterable, attributes: Sequence[str]) -> SymbolTable:
+        """
+        Builds the table encoding the given traces.
+        """
+        symbol_table = cls(attributes)
+        symbol_table.codes, symbol_table.offsets = symbol_table.encode_traces(traces)
+        return symbol_table
+
+    @classmethod
+    def from_letter_ids(cls, attributes: Sequence[str], letters: List[Tuple[Any, ...]], codes: np.ndarray,
+                        offsets: np.ndarray) -> SymbolTable:
+        """
+        Builds the table from traces already encoded as letter ids, e.g. the activity ids of a columnar log.
+        """
+        symbol_table = cls(attributes)
+        symbol_table.letters = list(letters)
+        symbol_table.letter_index = {letter: letter_id for letter_id, letter in enumerate(symbol_table.letters)}
+        symbol_table.codes = np.asarray(codes, dtype=np.int64)
+        symbol_table.offsets = np.asarray(offsets, dtype=np.int64)
+        return symbol_table
+
+    def __len__(self):
+        return len(self.letters)
+
+    def encode_traces(self, traces: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encodes the traces as letter ids, adding the new letters to the table.
+
+        Returns:
+            the letter ids of the events, concatenated trace after trace, and the start of each trace plus a final
+            end offset.
+        """
+        letter_index, letters = self.letter_index, self.letters
+        codes = []
+        offsets = [0]
+        if len(self.attributes) == 1:
+            # The letters of the events are looked up by the attribute value, without building a tuple per event
+            attr = self.attributes[0]
+            value_index = {letter[0]: letter_id for letter, letter_id in letter_index.items()}
+            for trace in traces:
+                for event in trace:
+                    value = event[attr]
+                    letter_id = value_index.get(value)
+                    if letter_id is None:
+                        letter_id = value_index[value] = letter_index[(value,)] = len(letters)
+                        letters.append((value,))
+                    codes.append(letter_id)
+                offsets.append(len(codes))
+        else:
+            for trace in traces:
+                for event in trace:
+                    letter = tuple(event[attr] for attr in self.attributes)
+                    letter_id = letter_index.get(letter)
+                    if letter_id is None:
+                        letter_id = letter_index[letter] = len(letters)
+                        letters.append(letter)
+                    codes.append(letter_id)
+                offsets.append(len(codes))
+        return np.asarray(codes, dtype=np.int64), np.asarray(offsets, dtype=np.int64)
+
+    def get_traces(self, trace_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the codes and the offsets of the given encoded traces only.
+        """
+        trace_ids = np.asarray(trace_ids, dtype=np.int64)
+        starts, ends = self.offsets[trace_ids], self.offsets[trace_ids + 1]
+        lengths = ends - starts
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        event_ids = np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1] - starts, lengths)
+        return self.codes[event_ids], offsets
+
+    def get_propositions(self, backend: str, attributes: Optional[Sequence[str]] = None) -> List[Dict[str, bool]]:
+        """
+        Returns, for each letter, the propositions it makes true, i.e. the letters to compile an automaton over.
+        They are computed only for the letters added since the last call.
+
+        Args:
+            backend: the backend used to build the automaton, lydia or ltlf2dfa.
+            attributes: the attributes read by the automaton, a subset of the attributes of the table. All the
+                attributes of the table if None.
+        """
+        attributes = self.attributes if attributes is None else tuple(attributes)
+        propositions = self._propositions.setdefault((backend, attributes), [])
+        if len(propositions) < len(self.letters):
+            positions = [self.attributes.index(attr) for attr in attributes]
+            propositions += [{encode_proposition(letter[pos], attr, backend): True
+                              for attr, pos in zip(attributes, positions)}
+                             for letter in self.letters[len(propositions):]]
+        return list(propositions)
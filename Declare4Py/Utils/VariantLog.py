@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple, Any, Iterable, Sequence
+
+import numpy as np
+
+
+class VariantLog:
+    """
+    Variant-deduplicated view of an event log. Traces having the same sequence of values for the projected
+    attributes (by default the activity names) are collapsed into a single variant.
+
+    Attributes:
+        attributes: the event attributes the traces are projected on.
+        variants: the distinct projected sequences, each one as a tuple with an entry per event.
+        counts: int64 array with the number of traces of each variant.
+        representatives: the position in the log of the first trace of each variant.
+        trace_variants: int64 array with, for each trace of the log, the position of its variant in 'variants'.
+    """
+
+    def __init__(self, attributes: Sequence[str]):
+        self.attributes: Tuple[str, ...] = tuple(attributes)
+        self.variants: List[Tuple[Any, ...]] = []
+        self.counts: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.representatives: List[int] = []
+        self.trace_variants: np.ndarray = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[Tuple[Any, ...]], attributes: Sequence[str]) -> VariantLog:
+        """
+        Builds the view from the projected sequence of each trace, in log order.
+        """
+        var_log = cls(attributes)
+        index: Dict[Tuple[Any, ...], int] = {}
+        trace_variants = []
+        for trace_idx, sequence in enumerate(sequences):
+            var_idx = index.get(sequence)
+            if var_idx is None:
+                var_idx = index[sequence] = len(var_log.variants)
+                var_log.variants.append(sequence)
+                var_log.representatives.append(trace_idx)
+            trace_variants.append(var_idx)
+        var_log.trace_variants = np.asarray(trace_variants, dtype=np.int64)
+        var_log.counts = np.bincount(var_log.trace_variants, minlength=len(var_log.variants)).astype(np.int64)
+        return var_log
+
+    def __len__(self):
+        return len(self.variants)
+
+    def get_variant_traces(self, variant_id: int) -> np.ndarray:
+        """
+        Returns the positions in the log of the traces belonging to the given variant.
+        """
+        return np.flatnonzero(self.trace_variants == variant_id)
+
+    def get_variant_cases(self) -> List[np.ndarray]:
+        """
+        Returns, for each variant, the positions in the log of its traces.
+        """
+        order = np.argsort(self.trace_variants, kind="stable")
+        return np.split(order, np.cumsum(self.counts)[:-1])
+
+    def expand(self, variant_results: Sequence[Any]) -> List[Any]:
+        """
+        Expands a list with a result for each variant into a list with a result for each trace of the log.
+        """
+        return [variant_results[var_idx] for var_idx in self.trace_variants.tolist()]
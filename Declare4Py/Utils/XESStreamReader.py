@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import gzip
+import logging
+from typing import Iterator, Optional
+from xml.etree.ElementTree import iterparse, Element
+
+from pm4py.objects.log.obj import Trace, Event
+from pm4py.util.dt_parsing import parser as dt_parser
+
+
+class XESStreamReader:
+    """
+    Incremental reader of (zipped) XES files. Traces are parsed and yielded one at a time and the XML elements already
+    consumed are discarded, so the memory footprint is bounded by the size of the largest trace and not by the size of
+    the log. Each iteration re-reads the file from the beginning.
+
+    Args:
+        log_path: File path where the log is stored.
+
+    Example::
+
+        for trace in XESStreamReader("path/to/my/xes.gz"):
+            print(trace.attributes["concept:name"], len(trace))
+    """
+
+    def __init__(self, log_path: str):
+        self.log_path: str = log_path
+        self._date_parser = dt_parser.get()
+
+    def __iter__(self) -> Iterator[Trace]:
+        with self._open() as file:
+            context = iterparse(file, events=("start", "end"))
+            root: Optional[Element] = None
+            for xml_event, elem in context:
+                if root is None:
+                    root = elem
+                if xml_event == "end" and self._local_tag(elem) == "trace":
+                    yield self._parse_trace(elem)
+                    elem.clear()
+                    root.clear()  # drop the references to the consumed traces
+
+    def _open(self):
+        if self.log_path.endswith(".gz"):
+            return gzip.open(self.log_path, "rb")
+        return open(self.log_path, "rb")
+
+    @staticmethod
+    def _local_tag(elem: Element) -> str:
+        tag = elem.tag
+        return tag[tag.rfind("}") + 1:] if "}" in tag else tag
+
+    def _parse_trace(self, trace_elem: Element) -> Trace:
+        trace = Trace()
+        for child in trace_elem:
+            tag = self._local_tag(child)
+            if tag == "event":
+                event = Event()
+                for attr_elem in child:
+                    self._parse_attribute(attr_elem, event)
+                trace.append(event)
+            else:
+                self._parse_attribute(child, trace.attributes)
+        return trace
+
+    def _parse_attribute(self, elem: Element, container: dict) -> None:
+        tag = self._local_tag(elem)
+        key = elem.get("key")
+        value = elem.get("value")
+        if key is None:
+            return
+        try:
+            if tag == "string" or tag == "id":
+                container[key] = value
+            elif tag == "date":
+                container[key] = self._date_parser.apply(value)
+            elif tag == "int":
+                container[key] = int(value)
+            elif tag == "float":
+                container[key] = float(value)
+            elif tag == "boolean":
+                container[key] = value.lower() == "true"
+        except (TypeError, ValueError):
+            logging.info(f"failed to parse {tag} attribute {key}: {value}")
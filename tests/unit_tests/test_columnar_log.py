@@ -0,0 +1,120 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from pm4py.objects.log.obj import EventLog, Trace, Event
+
+from Declare4Py.D4PyEventLog import D4PyEventLog
+from Declare4Py.ProcessMiningTasks.ConformanceChecking.MPDeclareAnalyzer import MPDeclareAnalyzer
+from Declare4Py.ProcessMiningTasks.QueryChecking.DeclareQueryChecker import DeclareQueryChecker
+from Declare4Py.ProcessModels.DeclareModel import DeclareModel, DeclareModelTemplate
+from Declare4Py.Utils.ColumnarLog import AttributeColumn, ColumnarLog
+
+MODEL = """activity a
+activity b
+Response[a, b] |A.n > 2 | |
+Existence1[b] |A.flag is True |
+"""
+
+
+def make_log() -> EventLog:
+    log = EventLog(properties={'pm4py:param:activity_key': "concept:name",
+                               'pm4py:param:timestamp_key': "time:timestamp"})
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    # pm4py parses the XES list attributes into dicts
+    tags = [{'value': None, 'children': {'t': 'x'}}, ['x', 'y'], {'value': None, 'children': {'t': 'x'}}]
+    for case_idx in range(6):
+        trace = Trace(attributes={"id": f"case_{case_idx}", "concept:name": "same name"})
+        for event_idx, activity in enumerate("abab"[:case_idx % 4 + 1]):
+            event = Event({"concept:name": activity, "time:timestamp": start + timedelta(hours=event_idx),
+                           "n": case_idx + event_idx, "tags": tags[(case_idx + event_idx) % 3]})
+            if event_idx % 2:
+                event["flag"] = True if case_idx % 2 else 1
+            trace.append(event)
+        log.append(trace)
+    return log
+
+
+class TestColumnarLog(unittest.TestCase):
+
+    def test_unhashable_attributes(self):
+        log = make_log()
+        col_log = ColumnarLog.from_event_log(log)
+        tags = col_log.attributes["tags"]
+        self.assertEqual(tags.kind, AttributeColumn.CATEGORICAL)
+        self.assertEqual(len(tags.categories), 2)  # equal values share a category
+        flags = col_log.attributes["flag"]
+        self.assertEqual(len(flags.categories), 2)  # True and 1 are kept apart
+        decoded = col_log.to_event_log()
+        for trace, decoded_trace in zip(log, decoded):
+            for event, decoded_event in zip(trace, decoded_trace):
+                self.assertEqual(event["tags"], decoded_event["tags"])
+                self.assertEqual(event.get("flag"), decoded_event.get("flag"))
+                self.assertIs(type(event.get("flag")), type(decoded_event.get("flag")))
+
+    def test_save_load(self):
+        log = make_log()
+        rome = timezone(timedelta(hours=2))
+        for case_idx, trace in enumerate(log):
+            trace.attributes["day"] = date(2020, 1, case_idx + 1)
+            for event_idx, event in enumerate(trace):
+                event["time:timestamp"] = event["time:timestamp"].astimezone(rome)
+                event["local"] = datetime(2020, 2, 1, event_idx)
+                event["recorded"] = pd.Timestamp(2020, 3, 1, event_idx, tz="UTC")
+                event["mixed"] = date(2020, 1, 1) if event_idx else "none"
+        col_log = ColumnarLog.from_event_log(log, case_id_key="case:id")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "log")
+            col_log.save(path)
+            loaded = ColumnarLog.load(path, mmap=False)
+        self.assertEqual(loaded.case_id_key, "case:id")
+        self.assertEqual(loaded.case_ids, col_log.case_ids)
+        self.assertTrue(np.array_equal(loaded.timestamps, col_log.timestamps))
+        decoded = loaded.to_event_log()
+        for trace, decoded_trace in zip(log, decoded):
+            self.assertEqual(trace.attributes, decoded_trace.attributes)
+            self.assertIs(type(decoded_trace.attributes["day"]), date)
+            for event, decoded_event in zip(trace, decoded_trace):
+                self.assertEqual(dict(event), dict(decoded_event))
+                for key, value in event.items():
+                    self.assertIs(type(value), type(decoded_event[key]))
+                    if isinstance(value, datetime):
+                        self.assertEqual(value.utcoffset(), decoded_event[key].utcoffset())
+
+    def test_case_ids(self):
+        log = make_log()
+        self.assertEqual(ColumnarLog.from_event_log(log, case_id_key="case:id").case_ids,
+                         [f"case_{case_idx}" for case_idx in range(6)])
+        d4py_log = D4PyEventLog(case_name="case:id", log=log)
+        self.assertEqual(d4py_log.get_columnar_log().case_ids, [f"case_{case_idx}" for case_idx in range(6)])
+        self.assertEqual(ColumnarLog.from_event_log(log).case_ids, ["same name"] * 6)
+
+    def test_conditions(self):
+        model = DeclareModel().parse_from_string(MODEL)
+        expected = MPDeclareAnalyzer(D4PyEventLog(log=make_log()), model, False).run()
+        columnar = D4PyEventLog(log=make_log())
+        columnar.get_columnar_log()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = MPDeclareAnalyzer(columnar, model, False).run()
+        self.assertTrue(np.array_equal(results.results, expected.results))
+
+        d4py_log = D4PyEventLog(log=make_log())
+        query_checker = DeclareQueryChecker(d4py_log, template="Response", activation_condition="A.n > 2",
+                                            min_support=0.5)
+        constraint = {"template": DeclareModelTemplate.RESPONSE, "condition": ("A.n > 2", "", "")}
+        couples = [("a", "b"), ("b", "a"), ("a", "a"), ("b", "b")]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(query_checker.check_couples(constraint, couples, {}),
+                             [query_checker.check_couple(constraint, couple) for couple in couples])
+            query_checker.run()
+        # The columnar log built for the query is not attached to the event log of the user
+        self.assertIsNone(d4py_log.columnar_log)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import unittest
+import warnings
+
+from Declare4Py.D4PyEventLog import D4PyEventLog
+from Declare4Py.ProcessMiningTasks.Monitoring.MPDeclareMonitor import MPDeclareMonitor
+from Declare4Py.ProcessModels.DeclareModel import DeclareModel
+from Declare4Py.Utils.Declare.Checkers import ConstraintChecker, TemplateConstraintChecker
+from Declare4Py.Utils.Declare.FusedChecker import FusedConstraintChecker
+from Declare4Py.Utils.Declare.TraceStates import TraceState
+
+LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "test_logs", "Sepsis Cases.xes.gz")
+
+MODEL = """activity CRP
+activity Leucocytes
+activity LacticAcid
+activity IV Liquid
+Succession[CRP, Leucocytes] | | |
+Alternate Succession[CRP, Leucocytes] |A.CRP > 50 | |
+Chain Succession[Leucocytes, CRP] | | |
+Co-Existence[LacticAcid, IV Liquid] | | |0,5,h
+Co-Existence[CRP, Leucocytes] | |same org:group |
+Not Co-Existence[LacticAcid, CRP] |A.LacticAcid > 2 | |
+Not Succession[IV Liquid, LacticAcid] | | |
+Not Chain Succession[CRP, LacticAcid] | |same org:group |
+"""
+
+TOY_MODEL = """activity a
+activity b
+Succession[a, b] | | |
+Co-Existence[a, b] | | |
+Not Succession[a, b] | | |
+Chain Succession[a, b] | | |
+"""
+
+
+def result_key(res):
+    return res.state, res.num_activations, res.num_fulfillments, res.num_violations, res.num_pendings
+
+
+class TestCompositeTemplates(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.filterwarnings("ignore")
+        with contextlib.redirect_stderr(io.StringIO()):
+            cls.log = D4PyEventLog()
+            cls.log.parse_xes_log(LOG_PATH)
+        cls.model = DeclareModel().parse_from_string(MODEL)
+
+    def test_conjunction(self):
+        model = DeclareModel().parse_from_string(TOY_MODEL)
+        satisfied, violated = TraceState.SATISFIED, TraceState.VIOLATED
+        expected = {"ab": [satisfied, satisfied, violated, satisfied],
+                    "ba": [violated, satisfied, satisfied, violated],
+                    "acb": [satisfied, satisfied, violated, violated],
+                    "a": [violated, violated, satisfied, violated],
+                    "b": [violated, violated, satisfied, violated]}
+        for activities, states in expected.items():
+            trace = [{"concept:name": activity} for activity in activities]
+            results = ConstraintChecker().check_trace_conformance(trace, model, False)
+            self.assertEqual([res.state for res in results], states)
+        # Neither a nor b: vacuously satisfied
+        for consider_vacuity, state in ((True, satisfied), (False, violated)):
+            results = ConstraintChecker().check_trace_conformance([{"concept:name": "c"}], model, consider_vacuity)
+            self.assertEqual([res.state for res in results], [state] * 4)
+        # Succession[a, b] on "ba": the activation b has no preceding a, the activation a has no following b
+        result = ConstraintChecker().check_trace_conformance([{"concept:name": "b"}, {"concept:name": "a"}], model)[0]
+        self.assertEqual((result.num_activations, result.num_violations), (2, 2))
+
+    def test_incremental_checkers(self):
+        checker = ConstraintChecker()
+        for consider_vacuity in (True, False):
+            fused = FusedConstraintChecker(self.model, consider_vacuity)
+            self.assertNotIn(None, fused.checkers)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for trace in self.log.get_log():
+                    expected = checker.check_trace_conformance(trace, self.model, consider_vacuity)
+                    self.assertEqual([result_key(res) for res in fused.check_trace_conformance(trace)],
+                                     [result_key(res) for res in expected])
+                    self.assertEqual(fused.check_trace_states(trace), [res.state for res in expected])
+
+    def reference_states(self, trace, completed: bool, consider_vacuity: bool):
+        states = []
+        for constraint in self.model.constraints:
+            rules = {"vacuous_satisfaction": consider_vacuity, "activation": constraint['condition'][0],
+                     "correlation": constraint['condition'][1], "time": constraint['condition'][-1]}
+            states.append(TemplateConstraintChecker(trace, completed, constraint['activities'], rules)
+                          .get_template(constraint['template'])().state)
+        return states
+
+    def test_monitor(self):
+        for consider_vacuity in (True, False):
+            monitor = MPDeclareMonitor(self.model, consider_vacuity)
+            for trace in self.log.get_log()[:200]:
+                case_id = trace.attributes["concept:name"]
+                for index, event in enumerate(trace):
+                    monitor.process_event(case_id, event)
+                    if index % 5 == 0:
+                        self.assertEqual(monitor.get_states(case_id),
+                                         self.reference_states(trace[:index + 1], False, consider_vacuity))
+                states = monitor.get_states(case_id)
+                for transition in monitor.complete_case(case_id):
+                    states[transition.constraint_index] = transition.new_state
+                self.assertEqual(states, self.reference_states(trace, True, consider_vacuity))
+
+
+if __name__ == '__main__':
+    unittest.main()
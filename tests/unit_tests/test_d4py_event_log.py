@@ -0,0 +1,84 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+from pm4py.objects.log.obj import EventLog
+
+from Declare4Py.D4PyEventLog import D4PyEventLog
+from Declare4Py.ProcessMiningTasks.ConformanceChecking.MPDeclareAnalyzer import MPDeclareAnalyzer
+from Declare4Py.ProcessModels.DeclareModel import DeclareModel
+
+LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "test_logs", "Sepsis Cases.xes.gz")
+
+MODEL = """activity CRP
+activity Leucocytes
+activity ER Registration
+Response[CRP, Leucocytes] | | |
+Existence2[CRP] |A.CRP > 50 |
+Precedence[Leucocytes, CRP] |A.CRP > 100 | |0,3,h
+Exactly1[ER Registration] | |
+"""
+
+
+class TestD4PyEventLog(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.filterwarnings("ignore")
+        with contextlib.redirect_stderr(io.StringIO()):
+            cls.log = D4PyEventLog()
+            cls.log.parse_xes_log(LOG_PATH)
+        cls.model = DeclareModel().parse_from_string(MODEL)
+
+    def run_analyzer(self, log: D4PyEventLog):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return MPDeclareAnalyzer(log, self.model, False).run()
+
+    def test_set_log(self):
+        full_log = self.log.get_log()
+        sub_log = EventLog(list(full_log)[:176], attributes=full_log.attributes, properties=full_log.properties)
+        with contextlib.redirect_stderr(io.StringIO()):
+            log = D4PyEventLog()
+            log.parse_xes_log(LOG_PATH, columnar=True)
+        self.assertEqual(log.get_columnar_log().n_traces, len(full_log))
+        log.get_variant_log()
+        log.get_posting_index()
+
+        # Nothing built on the previous log survives the assignment
+        log.log = sub_log
+        self.assertIsNone(log.columnar_log)
+        self.assertEqual(log.get_length(), len(sub_log))
+        self.assertEqual(int(log.get_variant_log().counts.sum()), len(sub_log))
+        self.assertEqual(log.get_posting_index().n_traces, len(sub_log))
+        self.assertEqual(log.get_columnar_log().n_traces, len(sub_log))
+        expected = self.run_analyzer(D4PyEventLog(log=sub_log))
+        self.assertTrue(np.array_equal(self.run_analyzer(log).results, expected.results))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with contextlib.redirect_stderr(io.StringIO()):
+                parsed = D4PyEventLog()
+                parsed.parse_xes_log(LOG_PATH, cache_dir=tmp_dir)
+                cached = D4PyEventLog()
+                cached.parse_xes_log(LOG_PATH, cache_dir=tmp_dir)
+            self.assertIsNotNone(cached.columnar_log)
+            self.assertEqual(cached.get_length(), self.log.get_length())
+            # The first run works on the parsed EventLog, the following ones on the one decoded from the cache
+            for trace, cached_trace in zip(self.log.get_log(), cached.get_log()):
+                self.assertEqual(trace.attributes, cached_trace.attributes)
+                self.assertEqual(len(trace), len(cached_trace))
+                for event, cached_event in zip(trace, cached_trace):
+                    self.assertEqual(event.keys(), cached_event.keys())
+                    for key, value in event.items():
+                        if value == value:  # NaN values are never equal
+                            self.assertEqual(value, cached_event[key])
+                        self.assertIs(type(value), type(cached_event[key]))
+            self.assertTrue(np.array_equal(self.run_analyzer(cached).results, self.run_analyzer(self.log).results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import itertools
+import unittest
+
+import numpy as np
+import sympy
+from pythomata.impl.symbolic import SymbolicDFA
+
+from Declare4Py.Utils.DFATable import DFATable, ProductDFATable
+from Declare4Py.Utils.PrefixTrie import PrefixTrie
+
+# The last letter makes no proposition true, as the events of the activities not in a formula
+LETTERS = [{"a": True}, {"b": True}, {"c": True}, {}]
+
+
+def make_dfa(n_states, initial_state, accepting_states, transitions) -> SymbolicDFA:
+    """
+    Builds an automaton from its (source, guard, destination) transitions, the guards as sympy strings.
+    """
+    dfa = SymbolicDFA()
+    states = [dfa.create_state() for _ in range(n_states)]
+    dfa.set_initial_state(states[initial_state])
+    for state in accepting_states:
+        dfa.set_accepting_state(states[state], True)
+    for source, guard, destination in transitions:
+        dfa.add_transition((states[source], sympy.sympify(guard), states[destination]))
+    return dfa
+
+
+AUTOMATA = {
+    # F(a): accepting sink
+    "eventually": make_dfa(2, 0, [1], [(0, "a", 1), (0, "~a", 0), (1, "True", 1)]),
+    # !F(a): non-accepting sink
+    "absence": make_dfa(2, 0, [0], [(0, "a", 1), (0, "~a", 0), (1, "True", 1)]),
+    # G(a -> F(b))
+    "response": make_dfa(2, 0, [0], [(0, "a & ~b", 1), (0, "~(a & ~b)", 0), (1, "b", 0), (1, "~b", 1)]),
+    # No transition for b from the initial state: b leads to the dead state
+    "dead state": make_dfa(2, 0, [0, 1], [(0, "a", 1), (0, "~a & ~b", 0), (1, "True", 1)]),
+    # The accepting initial state only loops on a, so it is final: the first event decides the trace
+    "final initial state": make_dfa(1, 0, [0], [(0, "a", 0)]),
+    # a and b alternate, starting with a
+    "alternate": make_dfa(3, 0, [0], [(0, "a", 1), (0, "~a & ~b", 0), (0, "b", 2), (1, "b", 0), (1, "~b & ~a", 1),
+                                      (1, "a", 2), (2, "True", 2)]),
+}
+
+
+def run_symbolic(dfa: SymbolicDFA, trace) -> bool:
+    """
+    Runs the automaton on the letters of the trace, stopping when all the current states only loop on themselves.
+    """
+    current_states = {dfa.initial_state}
+    for letter in trace:
+        current_states = set().union(*(dfa.get_successors(state, letter) for state in current_states))
+        if all(all(successor == state for successor in dfa._transition_function.get(state, {}))
+               for state in current_states):
+            break
+    return any(dfa.is_accepting(state) for state in current_states)
+
+
+def all_traces(max_length: int):
+    return [trace for length in range(max_length + 1)
+            for trace in itertools.product(range(len(LETTERS)), repeat=length)]
+
+
+def encode(traces):
+    offsets = np.concatenate(([0], np.cumsum([len(trace) for trace in traces]))).astype(np.int64)
+    codes = np.asarray([code for trace in traces for code in trace], dtype=np.int64)
+    return codes, offsets
+
+
+class TestDFATable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.traces = all_traces(4)
+        cls.expected = {name: [run_symbolic(dfa, [LETTERS[code] for code in trace]) for trace in cls.traces]
+                        for name, dfa in AUTOMATA.items()}
+
+    def test_run_trace(self):
+        for name, dfa in AUTOMATA.items():
+            table = DFATable.from_dfa(dfa, LETTERS)
+            self.assertEqual([table.run_trace(trace) for trace in self.traces], self.expected[name], name)
+
+    def test_special_states(self):
+        table = DFATable.from_dfa(AUTOMATA["final initial state"], LETTERS)
+        # The initial state has a copy left at the first event, the dead state rejects
+        self.assertEqual(len(table.transitions), 3)
+        self.assertFalse(table.sinks[table.initial_state])
+        self.assertTrue(table.run_trace([]))
+        self.assertTrue(table.run_trace([0, 1]))
+        self.assertFalse(table.run_trace([1, 0]))
+
+        table = DFATable.from_dfa(AUTOMATA["dead state"], LETTERS)
+        dead_state = table.transitions[table.initial_state, 1]
+        self.assertTrue(table.sinks[dead_state])
+        self.assertFalse(table.accepting[dead_state])
+        self.assertTrue(table.run_trace([2, 3, 0, 1]))
+        self.assertFalse(table.run_trace([2, 1, 0]))
+
+    def test_run_traces(self):
+        codes, offsets = encode(self.traces)
+        trace_ids = np.arange(len(self.traces))[::-3]
+        for name, dfa in AUTOMATA.items():
+            table = DFATable.from_dfa(dfa, LETTERS)
+            self.assertEqual(table.run_traces(codes, offsets).tolist(), self.expected[name], name)
+            self.assertEqual(table.run_traces(codes, offsets, trace_ids).tolist(),
+                             np.asarray(self.expected[name])[trace_ids].tolist(), name)
+
+    def test_product(self):
+        codes, offsets = encode(self.traces)
+        trace_ids = np.arange(len(self.traces))[::-3]
+        names = list(AUTOMATA)
+        expected = np.stack([self.expected[name] for name in names], axis=1)
+        for selected in (names, ["response", "alternate"], ["eventually"]):
+            columns = [names.index(name) for name in selected]
+            product = ProductDFATable([DFATable.from_dfa(AUTOMATA[name], LETTERS) for name in selected])
+            self.assertEqual(product.run_traces(codes, offsets, per_automaton=True).tolist(),
+                             expected[:, columns].tolist())
+            self.assertEqual(product.run_traces(codes, offsets).tolist(), expected[:, columns].all(axis=1).tolist())
+            self.assertEqual(product.run_traces(codes, offsets, trace_ids).tolist(),
+                             expected[trace_ids][:, columns].all(axis=1).tolist())
+            # The product states are built only for the transitions taken
+            self.assertLessEqual(len(product), np.prod([len(table.transitions) for table in product.tables]))
+
+    def test_prefix_trie(self):
+        trie = PrefixTrie.from_sequences(self.traces)
+        self.assertEqual(len(trie.end_nodes), len(self.traces))
+        for name, dfa in AUTOMATA.items():
+            table = DFATable.from_dfa(dfa, [LETTERS[letter] for letter in trie.letters])
+            self.assertEqual(trie.run_dfa(table).tolist(), self.expected[name], name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+import sympy
+from pythomata.impl.symbolic import SymbolicDFA
+
+from Declare4Py.ProcessMiningTasks.ConformanceChecking.LTLAnalyzer import LTLAnalyzer, run_tables
+from Declare4Py.Utils.DFATable import DFATable
+
+LETTERS = [{"a": True}, {"b": True}, {"c": True}]
+
+
+def response_dfa() -> SymbolicDFA:
+    """G(a -> F(b))"""
+    dfa = SymbolicDFA()
+    waiting = dfa.create_state()
+    dfa.set_accepting_state(dfa.initial_state, True)
+    a, b = sympy.symbols("a b")
+    dfa.add_transition((dfa.initial_state, a & ~b, waiting))
+    dfa.add_transition((dfa.initial_state, ~(a & ~b), dfa.initial_state))
+    dfa.add_transition((waiting, b, dfa.initial_state))
+    dfa.add_transition((waiting, ~b, waiting))
+    return dfa
+
+
+class TestLTLAnalyzer(unittest.TestCase):
+
+    def test_run_log_workers(self):
+        rng = np.random.default_rng(0)
+        lengths = rng.integers(0, 8, size=50)
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        codes = rng.integers(0, len(LETTERS), size=offsets[-1]).astype(np.int64)
+        tables = [DFATable.from_dfa(response_dfa(), LETTERS)]
+        expected = run_tables(tables, codes, offsets)
+        # 0 jobs is documented as sequential, like 1
+        for workers in (0, 1, 2):
+            self.assertTrue(np.array_equal(LTLAnalyzer._run_log(tables, codes, offsets, workers), expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+
+from Declare4Py.D4PyEventLog import D4PyEventLog
+from Declare4Py.ProcessMiningTasks.ConformanceChecking.MPDeclareAnalyzer import MPDeclareAnalyzer
+from Declare4Py.ProcessMiningTasks.ConformanceChecking.MPDeclareResultsBrowser import MPDeclareResultsBrowser, \
+    MISSING
+from Declare4Py.ProcessModels.DeclareModel import DeclareModel
+from Declare4Py.Utils.Declare.Checkers import ConstraintChecker
+
+LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "test_logs", "Sepsis Cases.xes.gz")
+
+# The second constraint has a time condition that cannot be parsed (0,2,x)
+MODEL = """activity CRP
+activity Leucocytes
+activity ER Registration
+activity LacticAcid
+Response[CRP, Leucocytes] | |same org:group |
+Response[LacticAcid, CRP] | | |0,2,x
+Existence2[CRP] |A.CRP > 50 |
+Absence2[Leucocytes] | |
+Chain Response[ER Registration, ER Triage] | | |
+Precedence[Leucocytes, CRP] |A.CRP > 100 | |0,3,h
+Not Response[LacticAcid, ER Registration] | | |
+"""
+
+CONTROL_FLOW_MODEL = """activity CRP
+activity Leucocytes
+activity ER Registration
+Response[CRP, Leucocytes] | | |
+Alternate Precedence[CRP, Leucocytes] | | |
+Exactly1[ER Registration] | |
+"""
+
+
+def result_key(res):
+    return res.state, res.num_activations, res.num_fulfillments, res.num_violations, res.num_pendings
+
+
+class TestMPDeclareResults(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.filterwarnings("ignore")
+        with contextlib.redirect_stderr(io.StringIO()):
+            cls.log = D4PyEventLog()
+            cls.log.parse_xes_log(LOG_PATH)
+
+    def run_analyzer(self, model: DeclareModel, consider_vacuity: bool, **kwargs) -> MPDeclareResultsBrowser:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return MPDeclareAnalyzer(self.log, model, consider_vacuity).run(**kwargs)
+
+    def check_against_checker_results(self, model: DeclareModel, consider_vacuity: bool,
+                                      browser: MPDeclareResultsBrowser):
+        single_models = []
+        for constraint in model.constraints:
+            single_model = DeclareModel()
+            single_model.constraints.append(constraint)
+            single_model.set_constraints()
+            single_models.append(single_model)
+        checker = ConstraintChecker()
+        model_check_res = browser.model_check_res
+        with contextlib.redirect_stdout(io.StringIO()):
+            for trace_id, trace in enumerate(self.log.get_log()):
+                # The previous results: a list of CheckerResult, without the constraints with malformed conditions
+                trace_results = checker.check_trace_conformance(trace, model, consider_vacuity)
+                self.assertEqual([result_key(res) for res in model_check_res[trace_id]],
+                                 [result_key(res) for res in trace_results])
+                # Each constraint is in its own column, missing when its conditions are malformed
+                for constr_id, single_model in enumerate(single_models):
+                    res = checker.check_trace_conformance(trace, single_model, consider_vacuity)
+                    expected = MPDeclareResultsBrowser.encode_result(res[0] if res else None)
+                    self.assertEqual(browser.results[trace_id, constr_id].tolist(), expected)
+
+    def test_matrix(self):
+        model = DeclareModel().parse_from_string(MODEL)
+        for consider_vacuity in (False, True):
+            browser = self.run_analyzer(model, consider_vacuity)
+            self.assertEqual(browser.results.shape, (self.log.get_length(), len(model.constraints)))
+            self.check_against_checker_results(model, consider_vacuity, browser)
+            self.assertTrue(np.array_equal(browser.results, self.run_analyzer(model, consider_vacuity,
+                                                                              jobs=2).results))
+
+    def test_malformed_column(self):
+        model = DeclareModel().parse_from_string(MODEL)
+        browser = self.run_analyzer(model, False)
+        self.assertTrue((browser.results[:, 1]["state"] == MISSING).all())
+        self.assertTrue((browser.results[:, 2]["state"] != MISSING).all())
+        states = browser.get_metric("state")
+        self.assertEqual(list(states.columns), model.serialized_constraints)
+        self.assertTrue(states[model.serialized_constraints[1]].isna().all())
+        self.assertFalse(states[model.serialized_constraints[2]].isna().any())
+        self.assertIsNone(browser.get_metric("num_activations", trace_id=0, constr_id=1))
+
+    def test_variants(self):
+        model = DeclareModel().parse_from_string(CONTROL_FLOW_MODEL)
+        for consider_vacuity in (False, True):
+            browser = self.run_analyzer(model, consider_vacuity)
+            self.check_against_checker_results(model, consider_vacuity, browser)
+            self.assertTrue(np.array_equal(browser.results, self.run_analyzer(model, consider_vacuity,
+                                                                              use_variants=False).results))
+
+    def test_save_load(self):
+        model = DeclareModel().parse_from_string(MODEL)
+        browser = self.run_analyzer(model, True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "results.npz")
+            browser.save(path)
+            loaded = MPDeclareResultsBrowser.load(path)
+        self.assertTrue(np.array_equal(browser.results, loaded.results))
+        self.assertEqual(browser.serialized_constraints, list(loaded.serialized_constraints))
+        self.assertIsNone(loaded.prefix_offsets)
+        for metric in ("state", "num_activations", "num_fulfillments", "num_violations", "num_pendings"):
+            self.assertTrue(browser.get_metric(metric).equals(loaded.get_metric(metric)))
+
+    def test_save_load_prefixes(self):
+        model = DeclareModel().parse_from_string(CONTROL_FLOW_MODEL)
+        with contextlib.redirect_stdout(io.StringIO()):
+            browser = MPDeclareAnalyzer(self.log, model, False).run_prefixes()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "prefixes.npz")
+            browser.save(path)
+            loaded = MPDeclareResultsBrowser.load(path)
+        self.assertTrue(np.array_equal(browser.results, loaded.results))
+        self.assertTrue(np.array_equal(browser.prefix_offsets, loaded.prefix_offsets))
+        self.assertTrue(browser.get_prefix_index().equals(loaded.get_prefix_index()))
+
+
+if __name__ == '__main__':
+    unittest.main()
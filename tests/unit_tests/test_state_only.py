@@ -0,0 +1,93 @@
+import contextlib
+import io
+import os
+import unittest
+import warnings
+
+from Declare4Py.D4PyEventLog import D4PyEventLog
+from Declare4Py.ProcessMiningTasks.ConformanceChecking.MPDeclareAnalyzer import MPDeclareAnalyzer
+from Declare4Py.ProcessModels.DeclareModel import DeclareModel
+from Declare4Py.Utils.Declare.Checkers import TemplateConstraintChecker
+
+LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "test_logs", "Sepsis Cases.xes.gz")
+
+# Cardinality 0, data and time conditions, and a time condition that cannot be parsed (0,2,x)
+MODEL = """activity CRP
+activity Leucocytes
+activity ER Registration
+activity LacticAcid
+Existence0[CRP] | |
+Exactly0[LacticAcid] | |
+Absence0[CRP] | |
+Existence2[CRP] |A.CRP > 50 |
+Absence2[Leucocytes] | |
+Exactly1[ER Registration] | |
+Init[ER Registration] | |
+Response[CRP, Leucocytes] | |same org:group |
+Response[LacticAcid, CRP] | | |0,2,x
+Alternate Response[CRP, Leucocytes] | | |
+Chain Response[ER Registration, ER Triage] | | |
+Precedence[Leucocytes, CRP] |A.CRP > 100 | |0,3,h
+Alternate Precedence[CRP, Leucocytes] | | |
+Not Response[LacticAcid, ER Registration] | | |
+Not Precedence[CRP, ER Registration] | | |
+Not Chain Precedence[CRP, Leucocytes] | | |
+"""
+
+
+class TestStateOnly(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.filterwarnings("ignore")
+        with contextlib.redirect_stderr(io.StringIO()):
+            cls.log = D4PyEventLog()
+            cls.log.parse_xes_log(LOG_PATH)
+        cls.model = DeclareModel().parse_from_string(MODEL)
+
+    def run_analyzer(self, consider_vacuity: bool, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return MPDeclareAnalyzer(self.log, self.model, consider_vacuity).run(**kwargs)
+
+    def test_analyzer_states(self):
+        for consider_vacuity in (False, True):
+            full = self.run_analyzer(consider_vacuity)
+            state_only = self.run_analyzer(consider_vacuity, state_only=True)
+            self.assertTrue(full.get_metric("state").equals(state_only.get_metric("state")))
+            self.assertTrue(full.get_metric("num_activations").notna().any().any())
+            self.assertTrue(state_only.get_metric("num_activations").isna().all().all())
+
+    def test_analyzer_states_columnar(self):
+        full = self.run_analyzer(False)
+        self.log.get_columnar_log()
+        try:
+            state_only = self.run_analyzer(False, state_only=True)
+        finally:
+            self.log.columnar_log = None
+        self.assertTrue(full.get_metric("state").equals(state_only.get_metric("state")))
+
+    def test_template_checkers(self):
+        traces = self.log.get_log()[:200]
+        for constraint in self.model.constraints:
+            for consider_vacuity in (False, True):
+                rules = {"vacuous_satisfaction": consider_vacuity, "activation": constraint['condition'][0],
+                         "time": constraint['condition'][-1]}
+                if constraint['template'].supports_cardinality:
+                    rules["n"] = constraint['n']
+                if constraint['template'].is_binary:
+                    rules["correlation"] = constraint['condition'][1]
+                for trace in traces:
+                    for completed in (True, False):
+                        states = []
+                        for state_only in (False, True):
+                            checker = TemplateConstraintChecker(trace, completed, constraint['activities'], rules,
+                                                                state_only=state_only)
+                            try:
+                                states.append(checker.get_template(constraint['template'])().state)
+                            except SyntaxError:
+                                states.append(SyntaxError)
+                        self.assertEqual(states[0], states[1])
+
+
+if __name__ == '__main__':
+    unittest.main()